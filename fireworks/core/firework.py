@@ -11,9 +11,10 @@ from __future__ import annotations
 
 import abc
 import datetime
+import heapq
 import os
 import pprint
-from collections import defaultdict
+from collections import Counter, defaultdict
 from copy import deepcopy
 from typing import TYPE_CHECKING, Any, NoReturn
 
@@ -21,10 +22,26 @@ from monty.io import reverse_readline, zopen
 from monty.os.path import zpath
 
 from fireworks.core.fworker import FWorker
-from fireworks.fw_config import EXCEPT_DETAILS_ON_RERUN, TRACKER_LINES
+from fireworks.fw_config import (
+    DB_COMPRESSED_KEYS,
+    DB_COMPRESSION_THRESHOLD,
+    EXCEPT_DETAILS_ON_RERUN,
+    RESERVATION_EXPIRATION_SECS,
+    RUN_EXPIRATION_SECS,
+    TRACKER_LINES,
+)
 from fireworks.fw_config import NEGATIVE_FWID_CTR as NEGATIVE_FWID_CTR  # noqa: PLC0414
-from fireworks.utilities.dict_mods import apply_mod
-from fireworks.utilities.fw_serializers import FWSerializable, recursive_deserialize, recursive_serialize, serialize_fw
+from fireworks.utilities.dict_mods import apply_mod, get_modified_keys
+from fireworks.utilities.fw_serializers import (
+    FWSerializable,
+    compress_values,
+    decodes_dates,
+    reconstitute_dates,
+    recursive_deserialize,
+    recursive_dict,
+    recursive_serialize,
+    serialize_fw,
+)
 from fireworks.utilities.fw_utilities import NestedClassGetter, get_my_host, get_my_ip
 
 if TYPE_CHECKING:
@@ -38,6 +55,42 @@ __maintainer__ = "Anubhav Jain"
 __email__ = "ajain@lbl.gov"
 __date__ = "Feb 5, 2013"
 
+# spec keys that are queried and therefore never compressed in the database
+_UNCOMPRESSED_SPEC_KEYS = frozenset(("_tasks", "_category", "_fworker", "_priority", "_dupefinder"))
+_UNCOMPRESSED_STORED_DATA_KEYS = frozenset(("_exception",))
+
+
+def _get_compressed_keys(uncompressed_keys):
+    """Return the keys of DB_COMPRESSED_KEYS whose large values are stored compressed."""
+    return frozenset(DB_COMPRESSED_KEYS) - uncompressed_keys
+
+
+class _ChangeTracker:
+    """Mixin that records which fields of an object's database document were changed.
+
+    Tracking is off until _track_changes() is called, usually right after the object is loaded
+    from or written to the database. Attribute assignments are recorded automatically; in-place
+    modifications (e.g. of the spec dict) must be recorded with _mark_changed().
+    """
+
+    # maps attribute names to the database field they are stored in
+    _db_fields: dict[str, str] = {}
+    _changes: set[str] | None = None
+
+    def __setattr__(self, name, value) -> None:
+        super().__setattr__(name, value)
+        if self._changes is not None and name in self._db_fields:
+            self._changes.add(self._db_fields[name])
+
+    def _track_changes(self) -> None:
+        """Start tracking changes, forgetting the changes recorded so far."""
+        self._changes = set()
+
+    def _mark_changed(self, *fields) -> None:
+        """Record in-place changes of the given database fields."""
+        if self._changes is not None:
+            self._changes.update(fields)
+
 
 class FiretaskBase(defaultdict, FWSerializable, abc.ABC):
     """FiretaskBase is used like an abstract class that defines a computing task
@@ -228,7 +281,7 @@ class FWAction(FWSerializable):
         return "FWAction\n" + pprint.pformat(self.to_dict())
 
 
-class Firework(FWSerializable):
+class Firework(_ChangeTracker, FWSerializable):
     """A Firework is a workflow step and might be contain several Firetasks."""
 
     STATE_RANKS = {
@@ -243,6 +296,17 @@ class Firework(FWSerializable):
         "COMPLETED": 5,
     }
 
+    _db_fields = {
+        "tasks": "spec",
+        "spec": "spec",
+        "name": "name",
+        "launches": "launches",
+        "archived_launches": "archived_launches",
+        "_state": "state",
+        "created_on": "created_on",
+        "updated_on": "updated_on",
+    }
+
     # note: if you modify this signature, you must also modify LazyFirework
     def __init__(
         self,
@@ -351,6 +415,7 @@ class Firework(FWSerializable):
                 else:
                     # clean spec from stale details
                     self.spec.pop("_exception_details", None)
+            self._mark_changed("spec")
 
         self.archived_launches.extend(self.launches)
         self.archived_launches = list(set(self.archived_launches))  # filter duplicates
@@ -365,8 +430,83 @@ class Firework(FWSerializable):
         # the archived launches are stored separately
         m_dict["archived_launches"] = [launch.launch_id for launch in self.archived_launches]
         m_dict["state"] = self.state
+        m_dict["spec"] = compress_values(
+            m_dict["spec"], self._compression_threshold, _get_compressed_keys(_UNCOMPRESSED_SPEC_KEYS)
+        )
         return m_dict
 
+    @property
+    def _compression_threshold(self):
+        """Minimum size of the spec values stored compressed in the database, see
+        DB_COMPRESSION_THRESHOLD, or None if no spec value is compressed. The spec of a Firework with a
+        _dupefinder is never compressed, as the duplicates are found by querying the spec.
+        """
+        return None if "_dupefinder" in self.spec or not DB_COMPRESSED_KEYS else DB_COMPRESSION_THRESHOLD
+
+    def to_db_updates(self):
+        """Return the fields of the database document that changed since changes were last
+        tracked, or None if changes are not tracked.
+        """
+        if self._changes is None:
+            return None
+        m_dict = {}
+        fields = [field for field in self._changes if not field.startswith("spec.")]
+        spec_fields = sorted(field for field in self._changes if field.startswith("spec."))
+        threshold = self._compression_threshold
+        compressed_keys = _get_compressed_keys(_UNCOMPRESSED_SPEC_KEYS)
+        if threshold:
+            # a compressed value can only be replaced as a whole
+            spec_fields = sorted(
+                {
+                    ".".join(field.split(".")[:2]) if field.split(".")[1] in compressed_keys else field
+                    for field in spec_fields
+                }
+            )
+        elif DB_COMPRESSION_THRESHOLD and compressed_keys and "spec._dupefinder" in spec_fields:
+            # decompress the values compressed before the _dupefinder was added
+            fields.append("spec")
+        if spec_fields and "spec" not in fields:
+            try:
+                m_dict.update(self._get_spec_updates(spec_fields))
+            except (KeyError, TypeError):  # e.g. the key was removed again
+                fields.append("spec")
+        for field in fields:
+            if field == "spec":
+                m_dict["spec"] = self.spec
+                self.spec["_tasks"] = [t.to_dict() for t in self.tasks]
+            elif field in ("launches", "archived_launches"):
+                m_dict[field] = [launch.launch_id for launch in getattr(self, field)]
+            else:
+                m_dict[field] = getattr(self, field)
+        m_dict = recursive_dict(m_dict)
+        if threshold:
+            if "spec" in m_dict:
+                m_dict["spec"] = compress_values(m_dict["spec"], threshold, compressed_keys)
+            spec_updates = {k[5:]: m_dict.pop(k) for k in list(m_dict) if k.startswith("spec.")}
+            spec_updates = compress_values(spec_updates, threshold, compressed_keys)
+            m_dict.update({f"spec.{k}": v for k, v in spec_updates.items()})
+        return m_dict
+
+    def _get_spec_updates(self, spec_fields):
+        """Get the values of the given fields of the spec, e.g. spec.a.b, leaving out the fields
+        nested in another given field, which would conflict with it in an update.
+
+        Args:
+            spec_fields ([str]): sorted fields
+
+        Returns:
+            dict: value of each field
+        """
+        updates = {}
+        for field in spec_fields:
+            if any(field.startswith(f"{prev}.") for prev in updates):
+                continue
+            value = self.spec
+            for tok in field.split(".")[1:]:
+                value = value[tok]
+            updates[field] = value
+        return updates
+
     @classmethod
     @recursive_deserialize
     def from_dict(cls, m_dict: dict[str, Any]) -> Self:
@@ -455,9 +595,22 @@ class Tracker(FWSerializable):
         return f"### Filename: {self.filename}\n{self.content}"
 
 
-class Launch(FWSerializable):
+class Launch(_ChangeTracker, FWSerializable):
     """A Launch encapsulates data about a specific run of a Firework on a computing resource."""
 
+    _db_fields = {
+        "launch_dir": "launch_dir",
+        "fworker": "fworker",
+        "host": "host",
+        "ip": "ip",
+        "trackers": "trackers",
+        "action": "action",
+        "state_history": "state_history",
+        "_state": "state",
+        "launch_id": "launch_id",
+        "fw_id": "fw_id",
+    }
+
     def __init__(
         self,
         state,
@@ -508,6 +661,7 @@ class Launch(FWSerializable):
         if checkpoint:
             self.state_history[-1]["checkpoint"] = checkpoint
         self.state_history[-1]["updated_on"] = update_time
+        self._mark_changed("state_history")
 
     def set_reservation_id(self, reservation_id) -> None:
         """Adds the job_id to the reservation.
@@ -518,6 +672,7 @@ class Launch(FWSerializable):
         for data in self.state_history:
             if data["state"] == "RESERVED" and "reservation_id" not in data:
                 data["reservation_id"] = str(reservation_id)
+                self._mark_changed("state_history")
                 break
 
     @property
@@ -565,6 +720,21 @@ class Launch(FWSerializable):
         """
         return self._get_time("RUNNING", True)
 
+    @property
+    def lease_expires_at(self):
+        """Returns:
+        datetime: the time after which the Launch is considered lost if it is RUNNING and has not
+            pinged since (last ping + RUN_EXPIRATION_SECS), or stuck if it is still RESERVED
+            (reservation + RESERVATION_EXPIRATION_SECS). None in any other state.
+        """
+        if self.state == "RUNNING":
+            last_update, expiration_secs = self.last_pinged, RUN_EXPIRATION_SECS
+        elif self.state == "RESERVED":
+            last_update, expiration_secs = self._get_time("RESERVED", True), RESERVATION_EXPIRATION_SECS
+        else:
+            return None
+        return last_update + datetime.timedelta(seconds=expiration_secs) if last_update else None
+
     @property
     def runtime_secs(self):
         """Returns:
@@ -602,8 +772,15 @@ class Launch(FWSerializable):
             "launch_id": self.launch_id,
         }
 
-    @recursive_serialize
     def to_db_dict(self):
+        m_d = self._to_db_dict()
+        # kept as datetime, so that expired leases can be found with a range query
+        m_d["lease_expires_at"] = self.lease_expires_at
+        self._compress_stored_data(m_d)
+        return m_d
+
+    @recursive_serialize
+    def _to_db_dict(self):
         m_d = self.to_dict()
         m_d["time_start"] = self.time_start
         m_d["time_end"] = self.time_end
@@ -612,6 +789,37 @@ class Launch(FWSerializable):
             m_d["reservedtime_secs"] = self.reservedtime_secs
         return m_d
 
+    def to_db_updates(self):
+        """Return the fields of the database document that changed since changes were last
+        tracked, or None if changes are not tracked.
+        """
+        if self._changes is None:
+            return None
+        m_dict = {field: getattr(self, field) for field in self._changes}
+        if "state_history" in self._changes:
+            # the times are derived from the state history
+            m_dict["time_start"] = self.time_start
+            m_dict["time_end"] = self.time_end
+            m_dict["runtime_secs"] = self.runtime_secs
+            if self.reservedtime_secs:
+                m_dict["reservedtime_secs"] = self.reservedtime_secs
+        m_dict = recursive_dict(m_dict)
+        if "state_history" in self._changes:
+            m_dict["lease_expires_at"] = self.lease_expires_at
+        self._compress_stored_data(m_dict)
+        return m_dict
+
+    @staticmethod
+    def _compress_stored_data(m_dict) -> None:
+        """Compress the large values of the stored_data of the action in a database document."""
+        if DB_COMPRESSION_THRESHOLD and DB_COMPRESSED_KEYS and m_dict.get("action"):
+            action = m_dict["action"] = dict(m_dict["action"])
+            action["stored_data"] = compress_values(
+                action.get("stored_data") or {},
+                DB_COMPRESSION_THRESHOLD,
+                _get_compressed_keys(_UNCOMPRESSED_STORED_DATA_KEYS),
+            )
+
     @classmethod
     @recursive_deserialize
     def from_dict(cls, m_dict):
@@ -648,6 +856,7 @@ class Launch(FWSerializable):
             if state != "COMPLETED" and last_checkpoint:
                 new_history_entry.update(checkpoint=last_checkpoint)
             self.state_history.append(new_history_entry)
+            self._mark_changed("state_history")
             if state in ["RUNNING", "RESERVED"]:
                 self.touch_history()  # add updated_on key
 
@@ -678,47 +887,123 @@ class Workflow(FWSerializable):
     """A Workflow connects a group of FireWorks in an execution order."""
 
     class Links(dict, FWSerializable):
-        """An inner class for storing the DAG links between FireWorks."""
+        """An inner class for storing the DAG links between FireWorks.
+
+        The parents of each FireWork are kept in a reverse adjacency dict that is updated whenever
+        the children of a FireWork are set or deleted, so that parent_links and nodes do not have
+        to go through all links. Lists of children modified in place must be assigned again (or
+        links added with add_link) to keep the parents up to date. Any such change sets _changed.
+        """
 
         def __init__(self, *args, **kwargs) -> None:
             super().__init__(*args, **kwargs)
 
             for k, v in list(self.items()):
                 if not isinstance(v, (list, tuple)):
-                    self[k] = [v]  # v must be list
+                    dict.__setitem__(self, k, [v])  # v must be list
 
-                self[k] = [x.fw_id if hasattr(x, "fw_id") else x for x in self[k]]
+                dict.__setitem__(self, k, [x.fw_id if hasattr(x, "fw_id") else x for x in self[k]])
 
                 if not isinstance(k, int):
                     if hasattr(k, "fw_id"):  # maybe it's a String?
-                        self[k.fw_id] = self[k]
+                        dict.__setitem__(self, k.fw_id, self[k])
                     else:  # maybe it's a String?
                         try:
-                            self[int(k)] = self[k]  # k must be int
+                            dict.__setitem__(self, int(k), self[k])  # k must be int
                         except Exception:
                             pass  # garbage input
-                    del self[k]
+                    dict.__delitem__(self, k)
+            self._build_parent_links()
+            self._changed = False
+
+        def _build_parent_links(self) -> None:
+            self._parent_links = defaultdict(list)
+            for parent, children in self.items():
+                for child in children:
+                    self._parent_links[child].append(parent)
+            self._parent_links = dict(self._parent_links)
+
+        def _add_parent(self, parent, children) -> None:
+            for child in children:
+                self._parent_links.setdefault(child, []).append(parent)
+
+        def _remove_parent(self, parent, children) -> bool:
+            """Returns False if the parent links were out of date, e.g. after an in-place change."""
+            for child in children:
+                parents = self._parent_links.get(child, [])
+                if parent not in parents:
+                    return False
+                parents.remove(parent)
+                if not parents:
+                    del self._parent_links[child]
+            return True
+
+        def __setitem__(self, key, value) -> None:
+            old_children = self.get(key, [])
+            super().__setitem__(key, value)
+            self._changed = True
+            # a list modified in place, e.g. with +=, is the old list
+            if old_children is value or not self._remove_parent(key, old_children):
+                self._build_parent_links()
+            else:
+                self._add_parent(key, value)
+
+        def __delitem__(self, key) -> None:
+            children = self[key]
+            super().__delitem__(key)
+            self._changed = True
+            if not self._remove_parent(key, children):
+                self._build_parent_links()
+
+        def add_link(self, parent, child) -> None:
+            """Add a child to a FireWork, which must already be in the links."""
+            self[parent].append(child)
+            self._add_parent(parent, [child])
+            self._changed = True
+
+        def pop(self, key, *args):
+            if key not in self:
+                return super().pop(key, *args)
+            value = self[key]
+            del self[key]
+            return value
+
+        def popitem(self):
+            key, value = super().popitem()
+            self._changed = True
+            if not self._remove_parent(key, value):
+                self._build_parent_links()
+            return key, value
+
+        def setdefault(self, key, default=None):
+            if key not in self:
+                self[key] = default
+            return self[key]
+
+        def update(self, *args, **kwargs) -> None:
+            for key, value in dict(*args, **kwargs).items():
+                self[key] = value
+
+        def clear(self) -> None:
+            super().clear()
+            self._parent_links = {}
+            self._changed = True
+
+        def __ior__(self, other):
+            self.update(other)
+            return self
 
         @property
         def nodes(self):
             """Return list of all nodes."""
-            all_nodes = list(self)
-            for v in self.values():
-                all_nodes.extend(v)
-            return list(set(all_nodes))
+            return list(set(self).union(self._parent_links))
 
         @property
         def parent_links(self):
-            """Return a dict of child and its parents.
-
-            Note: if performance of parent_links becomes an issue, override delitem/setitem to
-            update parent_links
+            """Return a dict of child and its parents. The dict is kept up to date by the Links and
+            must not be modified.
             """
-            child_parents = defaultdict(list)
-            for parent, children in self.items():
-                for child in children:
-                    child_parents[child].append(parent)
-            return dict(child_parents)
+            return self._parent_links
 
         def to_dict(self):
             """Convert to str form for Mongo, which cannot have int keys.
@@ -812,7 +1097,7 @@ class Workflow(FWSerializable):
                         "added to the workflow!"
                     )
                 if fw.fw_id not in self.links[pfw.fw_id]:
-                    self.links[pfw.fw_id].append(fw.fw_id)
+                    self.links.add_link(pfw.fw_id, fw.fw_id)
 
         self.name = name
 
@@ -832,6 +1117,14 @@ class Workflow(FWSerializable):
         # redundantly for speed purpose
         self.fw_states = fw_states or {key: val.state for key, val in self.id_fw.items()}
 
+        # fw_states as last written to the database, see _track_changes()
+        self._db_fw_states = None
+
+    def _track_changes(self) -> None:
+        """Start tracking changes of the fw_states and links, forgetting the changes recorded so far."""
+        self._db_fw_states = dict(self.fw_states)
+        self.links._changed = False
+
     @property
     def fws(self) -> list[Firework]:
         """Return list of all fireworks."""
@@ -852,40 +1145,52 @@ class Workflow(FWSerializable):
         """Returns:
         state (str): state of workflow.
         """
-        m_state = "READY"
-        # states = [fw.state for fw in self.fws]
-        states = self.fw_states.values()
         leaf_fw_ids = self.leaf_fw_ids  # to save recalculating this
+        fizzled_ids = (fw_id for fw_id, state in self.fw_states.items() if state == "FIZZLED")
+        return self._get_state(
+            Counter(self.fw_states.values()),
+            lambda: all(self.fw_states[fw_id] == "COMPLETED" for fw_id in leaf_fw_ids),
+            fizzled_ids,
+        )
+
+    def _get_state(self, state_counts, leaves_completed, fizzled_ids) -> str:
+        """Returns the state of the workflow given the states of its FireWorks.
+
+        Args:
+            state_counts (Counter): number of FireWorks in each state
+            leaves_completed (callable): returns whether all leaf FireWorks are COMPLETED
+            fizzled_ids (iterable): ids of the FIZZLED FireWorks
 
-        leaf_states = (self.fw_states[fw_id] for fw_id in leaf_fw_ids)
-        if all(s == "COMPLETED" for s in leaf_states):
+        Returns:
+            str
+        """
+        m_state = "READY"
+        n_fws = sum(state_counts.values())
+        if state_counts["COMPLETED"] == n_fws or (state_counts["COMPLETED"] and leaves_completed()):
             m_state = "COMPLETED"
-        elif all(s == "ARCHIVED" for s in states):
+        elif state_counts["ARCHIVED"] == n_fws:
             m_state = "ARCHIVED"
-        elif any(s == "DEFUSED" for s in states):
+        elif state_counts["DEFUSED"]:
             m_state = "DEFUSED"
-        elif any(s == "PAUSED" for s in states):
+        elif state_counts["PAUSED"]:
             m_state = "PAUSED"
-        elif any(s == "FIZZLED" for s in states):
-            fizzled_ids = (fw_id for fw_id, state in self.fw_states.items() if state == "FIZZLED")
+        elif state_counts["FIZZLED"]:
             for fizzled_id in fizzled_ids:
+                children = self.links[fizzled_id]
                 # If a fizzled fw is a leaf fw, then the workflow is fizzled
                 if (
-                    fizzled_id in leaf_fw_ids
+                    not children
                     or
                     # Otherwise all children must be ok with the fizzled parent
-                    not all(
-                        self.id_fw[child_id].spec.get("_allow_fizzled_parents", False)
-                        for child_id in self.links[fizzled_id]
-                    )
+                    not all(self.id_fw[child_id].spec.get("_allow_fizzled_parents", False) for child_id in children)
                 ):
                     m_state = "FIZZLED"
                     break
             else:
                 m_state = "RUNNING"
-        elif any(s == "COMPLETED" for s in states) or any(s == "RUNNING" for s in states):
+        elif state_counts["COMPLETED"] or state_counts["RUNNING"]:
             m_state = "RUNNING"
-        elif any(s == "RESERVED" for s in states):
+        elif state_counts["RESERVED"]:
             m_state = "RESERVED"
         return m_state
 
@@ -904,6 +1209,28 @@ class Workflow(FWSerializable):
         """
         updated_ids = []
 
+        # load the FireWorks whose spec or state the action changes at once
+        targets = []
+        if action.update_spec or action.mod_spec or action.defuse_children:
+            targets = list(self.links[fw_id])
+            if action.propagate and (action.update_spec or action.mod_spec):
+                visited = set(targets)
+                for cfid in targets:  # breadth-first, targets grows while iterating
+                    new_ids = [f for f in self.links[cfid] if f not in visited]
+                    visited.update(new_ids)
+                    targets.extend(new_ids)
+        if action.defuse_workflow:
+            targets = self.links.nodes
+        if targets:
+            self._prefetch_fws(targets)
+
+        # only the changed keys of the specs are written back, if possible
+        if action.update_spec:
+            update_fields = self._get_spec_fields(list(action.update_spec), nested=False)
+        if action.mod_spec:
+            mod_keys = [get_modified_keys(mod) for mod in action.mod_spec]
+            mod_fields = self._get_spec_fields(None if None in mod_keys else [k for keys in mod_keys for k in keys])
+
         # note: update specs before inserting additions to give user more control
         # see: https://github.com/materialsproject/fireworks/pull/407
 
@@ -917,6 +1244,7 @@ class Workflow(FWSerializable):
                     if cfid not in visited_cfid:
                         visited_cfid.add(cfid)
                         self.id_fw[cfid].spec.update(action.update_spec)
+                        self.id_fw[cfid]._mark_changed(*update_fields)
                         updated_ids.append(cfid)
                         recursive_update_spec(cfid)
 
@@ -926,6 +1254,7 @@ class Workflow(FWSerializable):
             # Kept original code here for "backwards readability".
             for cfid in self.links[fw_id]:
                 self.id_fw[cfid].spec.update(action.update_spec)
+                self.id_fw[cfid]._mark_changed(*update_fields)
                 updated_ids.append(cfid)
 
         # update the spec of the children FireWorks using DictMod language
@@ -938,6 +1267,7 @@ class Workflow(FWSerializable):
                         visited_cfid.add(cfid)
                         for mod in action.mod_spec:
                             apply_mod(mod, self.id_fw[cfid].spec)
+                        self.id_fw[cfid]._mark_changed(*mod_fields)
                         updated_ids.append(cfid)
                         recursive_mod_spec(cfid)
 
@@ -946,6 +1276,7 @@ class Workflow(FWSerializable):
             for cfid in self.links[fw_id]:
                 for mod in action.mod_spec:
                     apply_mod(mod, self.id_fw[cfid].spec)
+                self.id_fw[cfid]._mark_changed(*mod_fields)
                 updated_ids.append(cfid)  # seems to me the indentation had been wrong here
 
         # defuse children
@@ -1000,19 +1331,43 @@ class Workflow(FWSerializable):
         Returns:
             list[int]: list of Firework ids that were updated.
         """
-        updated_ids = updated_ids or set()
-        m_fw = self.id_fw[fw_id]
-        m_fw._rerun()
-        updated_ids.add(fw_id)
+        return self.rerun_fws([fw_id], updated_ids)
 
-        # refresh the states of the current fw before rerunning the children
-        # so that they get the correct state of the parent.
-        updated_ids.union(self.refresh(fw_id, updated_ids))
+    def rerun_fws(self, fw_ids, updated_ids=None):
+        """Archives the launches of several Fireworks and of their descendants so that they can be
+        re-run. All of them are reset first, then the states are refreshed once.
 
-        # re-run all the children
-        for child_id in self.links[fw_id]:
-            if self.id_fw[child_id].state != "WAITING":
-                updated_ids = updated_ids.union(self.rerun_fw(child_id, updated_ids))
+        Args:
+            fw_ids ([int]): ids of the fireworks to rerun
+            updated_ids (set(int)): set of fireworks id to rerun
+
+        Returns:
+            list[int]: list of Firework ids that were updated.
+        """
+        updated_ids = set() if updated_ids is None else updated_ids
+        reset = set()
+        # level by level, so that the fireworks of a level can be loaded at once
+        front = sorted(fw_ids)
+        while front:
+            self._prefetch_fws(front)
+            children = []
+            for m_fw_id in front:
+                # a child is only re-run if it is not yet WAITING, e.g. after being re-run through another parent
+                if m_fw_id in reset or (m_fw_id not in fw_ids and self.id_fw[m_fw_id].state == "WAITING"):
+                    continue
+                self.id_fw[m_fw_id]._rerun()
+                self.fw_states[m_fw_id] = self.id_fw[m_fw_id].state
+                reset.add(m_fw_id)
+                # re-run all the children
+                children.extend(self.links[m_fw_id])
+            front = children
+        updated_ids |= reset
+
+        # the descendants are WAITING now, only the fireworks without a reset parent can become READY
+        parent_links = self.links.parent_links
+        for m_fw_id in sorted(reset):
+            if not reset.intersection(parent_links.get(m_fw_id, [])):
+                self.refresh(m_fw_id, updated_ids)
 
         return updated_ids
 
@@ -1071,14 +1426,14 @@ class Workflow(FWSerializable):
                 self.links[new_fw.fw_id] = []
                 for fw_id, det in zip(fw_ids, detours, strict=True):
                     if det:
-                        self.links[new_fw.fw_id] += [f for f in self.links[fw_id] if f >= 0]
+                        self.links[new_fw.fw_id] = self.links[new_fw.fw_id] + [f for f in self.links[fw_id] if f >= 0]
             else:
-                self.links[new_fw.fw_id] = new_wf.links[new_fw.fw_id]
+                self.links[new_fw.fw_id] = list(new_wf.links[new_fw.fw_id])
             updated_ids.append(new_fw.fw_id)
 
         for fw_id in fw_ids:
             for root_id in root_ids:
-                self.links[fw_id].append(root_id)  # add the root id as my child
+                self.links.add_link(fw_id, root_id)  # add the root id as my child
                 if pull_spec_mods:  # re-apply some actions of the parent
                     m_fw = self.id_fw[fw_id]  # get the parent FW
                     m_launch = self._get_representative_launch(m_fw)  # get Launch of parent
@@ -1103,6 +1458,9 @@ class Workflow(FWSerializable):
     def refresh(self, fw_id, updated_ids=None):
         """Refreshes the state of a Firework and any affected children.
 
+        The affected FireWorks are refreshed in topological order without recursion, so that each of
+        them is refreshed once, after all of its affected parents.
+
         Args:
             fw_id (int): id of the Firework on which to perform the refresh
             updated_ids ([int])
@@ -1111,15 +1469,53 @@ class Workflow(FWSerializable):
             set(int): list of Firework ids that were updated
         """
         # these are the fw_ids to re-enter into the database
-        updated_ids = updated_ids or set()
+        updated_ids = set() if updated_ids is None else updated_ids
+
+        # the ranks are only needed once several FireWorks wait to be refreshed
+        ranks = None
+        queue = [(0, fw_id)]
+        queued = {fw_id}
+        while queue:
+            _, m_fw_id = heapq.heappop(queue)
+            queued.discard(m_fw_id)
+            n_fws = len(self.id_fw)
+            children = self._refresh_fw(m_fw_id, updated_ids)
+            if len(self.id_fw) != n_fws:  # FireWorks were added by the action
+                ranks = None
+            if len(children) > 1:
+                self._prefetch_fws([f for f in children if f not in queued])
+            for child_id in children:
+                if child_id in queued:
+                    continue
+                # the ranks of a Workflow whose links are loaded lazily may not cover the child yet
+                if (ranks is None or child_id not in ranks) and (queue or len(children) > 1):
+                    ranks = self._get_topological_ranks()
+                    queue = [(ranks.get(f, 0), f) for _, f in queue]
+                    heapq.heapify(queue)
+                heapq.heappush(queue, (ranks.get(child_id, 0) if ranks else 0, child_id))
+                queued.add(child_id)
+
+        self.updated_on = datetime.datetime.now(datetime.timezone.utc)
+
+        return updated_ids
+
+    def _refresh_fw(self, fw_id, updated_ids):
+        """Refreshes the state of a single Firework.
 
+        Args:
+            fw_id (int): id of the Firework on which to perform the refresh
+            updated_ids (set(int)): the updated Firework ids are added to this set
+
+        Returns:
+            list[int]: ids of the children that need to be refreshed in turn
+        """
         fw = self.id_fw[fw_id]
         prev_state = fw.state
 
         # if we're paused, defused or archived, just skip altogether
         if fw.state == "DEFUSED" or fw.state == "ARCHIVED" or fw.state == "PAUSED":
             self.fw_states[fw_id] = fw.state
-            return updated_ids
+            return []
 
         completed_parent_states = ["COMPLETED"]
         if fw.spec.get("_allow_fizzled_parents"):
@@ -1139,6 +1535,7 @@ class Workflow(FWSerializable):
 
             # report any FIZZLED parents if allow_fizzed allows us to handle FIZZLED jobs
             if fw.spec.get("_allow_fizzled_parents") and "_fizzled_parents" not in fw.spec:
+                self._prefetch_fws(self.links.parent_links.get(fw_id, []))
                 parent_fws = [
                     self.id_fw[p].to_dict()
                     for p in self.links.parent_links.get(fw_id, [])
@@ -1146,27 +1543,82 @@ class Workflow(FWSerializable):
                 ]
                 if len(parent_fws) > 0:
                     fw.spec["_fizzled_parents"] = parent_fws
+                    fw._mark_changed("spec")
                     updated_ids.add(fw_id)
 
         fw.state = m_state
         # Brings self.fw_states in sync with fw_states in db
         self.fw_states[fw_id] = m_state
 
-        if m_state != prev_state:
-            updated_ids.add(fw_id)
+        if m_state == prev_state:
+            return []
+        updated_ids.add(fw_id)
 
-            if m_state == "COMPLETED":
-                updated_ids = updated_ids.union(self.apply_action(m_action, fw.fw_id))
+        if m_state == "COMPLETED":
+            updated_ids.update(self.apply_action(m_action, fw.fw_id))
 
-            # refresh all the children that could possibly now be READY to run
-            # note that "FIZZLED" is for _allow_fizzled_parents children
-            if m_state in ["COMPLETED", "FIZZLED"]:
-                for child_id in self.links[fw_id]:
-                    updated_ids = updated_ids.union(self.refresh(child_id, updated_ids))
+        # refresh all the children that could possibly now be READY to run
+        # note that "FIZZLED" is for _allow_fizzled_parents children
+        if m_state in ["COMPLETED", "FIZZLED"]:
+            return self.links[fw_id]
+        return []
 
-        self.updated_on = datetime.datetime.now(datetime.timezone.utc)
+    @staticmethod
+    def _get_spec_fields(keys, nested=True):
+        """Get the database fields of the given spec keys, e.g. spec.a.b for a->b.
 
-        return updated_ids
+        Args:
+            keys ([str]): keys in "->" notation, or None if unknown
+            nested (bool): whether the keys are in "->" notation (as in a mod_spec) or are
+                top-level keys (as in an update_spec)
+
+        Returns:
+            [str]: the fields, or ["spec"] if a key cannot be written on its own
+        """
+        if keys is None:
+            return ["spec"]
+        fields = []
+        for key in keys:
+            if not isinstance(key, str) or (not nested and ("->" in key or "$" in key)):
+                return ["spec"]
+            toks = key.split("->") if nested else [key]
+            if toks[0] == "_tasks" or any(not tok or "." in tok or tok.startswith("$") for tok in toks):
+                return ["spec"]
+            fields.append(".".join(["spec", *toks]))
+        return fields
+
+    def _prefetch_fws(self, fw_ids) -> None:
+        """Called with the ids of FireWorks that are about to be accessed, e.g. the children to
+        refresh or the targets of an action, so that a Workflow whose FireWorks are loaded lazily
+        can load them at once. Does nothing by default.
+
+        Args:
+            fw_ids ([int])
+        """
+
+    def _get_topological_ranks(self):
+        """Returns the length of the longest path from a root FireWork to each FireWork, so that
+        parents have a lower rank than their children.
+
+        Returns:
+            dict: rank of each Firework id
+        """
+        parent_links = self.links.parent_links
+        n_parents = {fw_id: len(parent_links.get(fw_id, [])) for fw_id in self.links}
+        ranks = {}
+        front = [fw_id for fw_id, n in n_parents.items() if n == 0]
+        rank = 0
+        while front:
+            next_front = []
+            for fw_id in front:
+                ranks[fw_id] = rank
+                for child_id in self.links[fw_id]:
+                    n_parents[child_id] -= 1
+                    if n_parents[child_id] == 0:
+                        next_front.append(child_id)
+            front = next_front
+            rank += 1
+        return ranks
 
     @property
     def root_fw_ids(self) -> list[int]:
@@ -1209,7 +1661,9 @@ class Workflow(FWSerializable):
         new_l = {}
         for parent, children in self.links.items():
             new_l[old_new.get(parent, parent)] = [old_new.get(child, child) for child in children]
+        links_changed = self.links._changed or any(old != new for old, new in old_new.items())
         self.links = Workflow.Links(new_l)
+        self.links._changed = links_changed
 
         # update the states
         new_fw_states = {}
@@ -1237,6 +1691,26 @@ class Workflow(FWSerializable):
         m_dict["fw_states"] = {str(k): v for (k, v) in self.fw_states.items()}
         return m_dict
 
+    def to_db_updates(self):
+        """Return the fields of the database document that changed since changes were last
+        tracked, or None if changes are not tracked.
+
+        The state and updated_on are always returned, the fw_states only where they changed. The
+        links, parent_links, nodes and all fw_states are only returned if the links changed, e.g.
+        through append_wf().
+        """
+        if self._db_fw_states is None:
+            return None
+        m_dict = {"state": self.state, "updated_on": self.updated_on}
+        if self.links._changed:
+            m_dict.update(self.links.to_db_dict())
+            m_dict["fw_states"] = {str(k): v for (k, v) in self.fw_states.items()}
+        else:
+            for fw_id, state in self.fw_states.items():
+                if self._db_fw_states.get(fw_id) != state:
+                    m_dict[f"fw_states.{fw_id}"] = state
+        return m_dict
+
     def to_display_dict(self):
         m_dict = self.to_db_dict()
         nodes = sorted(m_dict["nodes"])
@@ -1324,6 +1798,7 @@ class Workflow(FWSerializable):
         self.fw_states = {key: self.id_fw[key].state for key in self.id_fw}
 
     @classmethod
+    @decodes_dates
     def from_dict(cls, m_dict: dict[str, Any]) -> Workflow:
         """Return Workflow from its dict representation.
 
@@ -1335,13 +1810,14 @@ class Workflow(FWSerializable):
         """
         # accept
         if "fws" in m_dict:
-            created_on = m_dict.get("created_on")
-            updated_on = m_dict.get("updated_on")
+            # the Fireworks reconstitute their own dates
+            created_on = reconstitute_dates(m_dict.get("created_on"))
+            updated_on = reconstitute_dates(m_dict.get("updated_on"))
             return Workflow(
                 [Firework.from_dict(f) for f in m_dict["fws"]],
                 Workflow.Links.from_dict(m_dict["links"]),
                 m_dict.get("name"),
-                m_dict["metadata"],
+                reconstitute_dates(m_dict["metadata"]),
                 created_on,
                 updated_on,
             )
@@ -1404,6 +1880,7 @@ class Workflow(FWSerializable):
         self.fw_states = new_wf.fw_states
         self.id_fw = new_wf.id_fw
         self.links = new_wf.links
+        self.links._changed = True
 
 
 # old spelling
@@ -19,7 +19,9 @@ __date__ = "Dec 12, 2012"
 
 
 class FWorker(FWSerializable):
-    def __init__(self, name="Automatically generated Worker", category="", query=None, env=None) -> None:
+    def __init__(
+        self, name="Automatically generated Worker", category="", query=None, env=None, scheduler=None
+    ) -> None:
         """
         Args:
             name (str): the name of the resource, should be unique
@@ -32,25 +34,38 @@ class FWorker(FWSerializable):
                 fw_spec, which provides for abstraction of resource-specific
                 commands or settings.  See :class:`fireworks.core.firework.FiretaskBase`
                 for information on how to use this env variable in Firetasks.
+            scheduler (SchedulerBase, str or dict): the scheduling policy that picks the next
+                Firework to run, given as object, _fw_name or dict. Defaults to the SCHEDULER
+                setting of the FW_config.
         """
         self.name = name
         self.category = category
         self._query = query or {}
         self.env = env or {}
+        self.scheduler = scheduler
 
     @recursive_serialize
     def to_dict(self):
-        return {
+        m_dict = {
             "name": self.name,
             "category": self.category,
             "query": json.dumps(self._query, default=DATETIME_HANDLER),
             "env": self.env,
         }
+        if self.scheduler is not None:
+            m_dict["scheduler"] = self.scheduler
+        return m_dict
 
     @classmethod
     @recursive_deserialize
     def from_dict(cls, m_dict):
-        return FWorker(m_dict["name"], m_dict["category"], json.loads(m_dict["query"]), m_dict.get("env"))
+        return FWorker(
+            m_dict["name"],
+            m_dict["category"],
+            json.loads(m_dict["query"]),
+            m_dict.get("env"),
+            m_dict.get("scheduler"),
+        )
 
     @property
     def query(self):
@@ -5,36 +5,56 @@ import json
 import os
 import random
 import shutil
+import threading
 import time
 import traceback
+import uuid
 import warnings
-from collections import defaultdict
-from itertools import chain
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count, islice
 
+import bson
 import gridfs
 from bson import ObjectId
 from monty.os.path import zpath
 from monty.serialization import loadfn
-from pymongo import ASCENDING, DESCENDING
+from pymongo import ASCENDING, DESCENDING, DeleteOne, ReplaceOne, ReturnDocument, UpdateMany, UpdateOne
 from pymongo.errors import DocumentTooLarge
 from tqdm import tqdm
 
 from fireworks.core.firework import Firework, FWAction, Launch, Tracker, Workflow
+from fireworks.features.scheduler import get_scheduler
 from fireworks.fw_config import (
     GRIDFS_FALLBACK_COLLECTION,
+    ID_BLOCK_SIZE,
     LAUNCHPAD_LOC,
+    LEAN_CHECKOUT,
     MAINTAIN_INTERVAL,
     MONGO_SOCKET_TIMEOUT_MS,
+    OPTIMISTIC_WF_UPDATES,
+    READY_QUEUE,
     RESERVATION_EXPIRATION_SECS,
+    RUN_EXISTS_CACHE_SECS,
     RUN_EXPIRATION_SECS,
+    SCHEDULER,
     SORT_FWS,
+    SPLIT_WF_MIN_FWS,
     STREAM_LOGLEVEL,
     WFLOCK_EXPIRATION_KILL,
     WFLOCK_EXPIRATION_SECS,
+    WFLOCK_TTL_SECS,
     MongoClient,
 )
 from fireworks.utilities.exceptions import FWValueError
-from fireworks.utilities.fw_serializers import FWSerializable, reconstitute_dates, recursive_dict
+from fireworks.utilities.fw_serializers import (
+    COMPRESSED_KEY,
+    FWSerializable,
+    decompress_value,
+    decompress_values,
+    reconstitute_dates,
+    recursive_dict,
+)
 from fireworks.utilities.fw_utilities import get_fw_logger
 
 __author__ = "Anubhav Jain"
@@ -80,63 +100,212 @@ def sort_aggregation(sort):
     return aggregation
 
 
+# firework fields mirrored in the ready_queue collection and their names there
+_READY_QUEUE_FIELDS = {"spec._priority": "priority", "spec._category": "category", "spec._fworker": "fworker"}
+
+
+def _get_ready_queue_entry(fw_id, spec, created_on):
+    """Build the ready_queue entry of a READY firework.
+
+    Args:
+        fw_id (int): firework id
+        spec (dict): firework spec; only the scheduling keys are copied, and only if present
+        created_on (str): creation date as stored in the fireworks collection
+    """
+    entry = {"fw_id": fw_id, "created_on": created_on}
+    for field, name in _READY_QUEUE_FIELDS.items():
+        key = field.split(".", 1)[1]
+        if key in spec:
+            entry[name] = spec[key]
+    return entry
+
+
+def _get_ready_queue_query(query):
+    """Translate a FWorker query to the ready_queue collection.
+
+    Args:
+        query (dict): query on the fireworks collection
+
+    Returns:
+        dict: the equivalent ready_queue query, or None if the query uses fields that are not in
+            the ready_queue
+    """
+    queue_query = {}
+    for k, v in query.items():
+        if k in ("$and", "$or", "$nor"):
+            sub_queries = [_get_ready_queue_query(q) for q in v]
+            if None in sub_queries:
+                return None
+            queue_query[k] = sub_queries
+        elif k in _READY_QUEUE_FIELDS:
+            queue_query[_READY_QUEUE_FIELDS[k]] = v
+        else:
+            return None
+    return queue_query
+
+
 class LockedWorkflowError(ValueError):
     """Error raised if the context manager WFLock can't acquire the lock on the WF within the selected
     time interval (WFLOCK_EXPIRATION_SECS), if the killing of the lock is disabled (WFLOCK_EXPIRATION_KILL).
     """
 
 
+def _get_backoff_secs(attempt, base_secs=0.01, max_secs=2.0):
+    """Randomized exponential backoff: a random time of up to base_secs * 2**attempt, but at most
+    max_secs, so that processes waiting for the same workflow do not retry in lockstep.
+    """
+    return random.uniform(0, min(base_secs * 2**attempt, max_secs))
+
+
 class WFLock:
     """Lock a Workflow, i.e. for performing update operations
     Raises a LockedWorkflowError if the lock couldn't be acquired within expire_secs and kill==False.
     Calling functions are responsible for handling the error in order to avoid database inconsistencies.
+
+    The lock is stored in the workflow document as a random owner token ("locked") and, if ttl_secs
+    is set, an expiry time ("lock_expires_at"). The owner renews the lease in a background thread
+    while it holds the lock. An expired lock, e.g. of a crashed process, is taken over by the next
+    process and only the owner of a lock releases it. The waiting and holding times and the number of contended
+    acquisitions are added up in the "lock_stats" of the workflow document and in LaunchPad.wf_lock_stats.
     """
 
-    def __init__(self, lp, fw_id, expire_secs=WFLOCK_EXPIRATION_SECS, kill=WFLOCK_EXPIRATION_KILL) -> None:
+    def __init__(
+        self, lp, fw_id, expire_secs=WFLOCK_EXPIRATION_SECS, kill=WFLOCK_EXPIRATION_KILL, *, ttl_secs=WFLOCK_TTL_SECS
+    ) -> None:
         """
         Args:
             lp (LaunchPad)
             fw_id (int): Firework id
             expire_secs (int): max waiting time in seconds.
             kill (bool): force lock acquisition or not.
+            ttl_secs (int): time after which the lock expires unless it is renewed, None for a lock
+                that never expires.
         """
         self.lp = lp
         self.fw_id = fw_id
         self.expire_secs = expire_secs
         self.kill = kill
+        self.ttl_secs = ttl_secs
+        self.token = None
+        self.waiting_time = 0
+        self.contended = False
+        self._acquired_at = None
+        self._renew_stop = None
+
+    @staticmethod
+    def get_unlocked_query():
+        """Query for workflow documents that are not locked or whose lock has expired."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return {"$or": [{"locked": {"$exists": False}}, {"lock_expires_at": {"$lte": now}}]}
+
+    def try_acquire(self, query=None, force=False):
+        """Try once to acquire the lock.
+
+        Args:
+            query (dict): query for the workflow document, by default the workflow of fw_id
+            force (bool): acquire the lock even if it is held by another process
+
+        Returns:
+            bool: whether the lock was acquired
+        """
+        query = query or {"nodes": self.fw_id}
+        if not force:
+            query = {"$and": [query, self.get_unlocked_query()]}
+        token = uuid.uuid4().hex
+        if self.lp.workflows.find_one_and_update(
+            query, {"$set": {"locked": token, "lock_expires_at": self._get_expiry()}}, projection={"_id": 1}
+        ):
+            self.token = token
+            self._acquired_at = time.perf_counter()
+            if self.ttl_secs:
+                self._renew_stop = threading.Event()
+                threading.Thread(target=self._renew_periodically, args=(self._renew_stop,), daemon=True).start()
+            return True
+        return False
+
+    def _get_expiry(self):
+        if self.ttl_secs is None:
+            return None
+        return datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=self.ttl_secs)
+
+    def renew(self):
+        """Extend the lease of the lock.
+
+        Returns:
+            bool: whether the lock is still held, i.e. it did not expire and was taken over
+        """
+        result = self.lp.workflows.update_one(
+            {"nodes": self.fw_id, "locked": self.token}, {"$set": {"lock_expires_at": self._get_expiry()}}
+        )
+        return bool(result.matched_count)
+
+    def _renew_periodically(self, stop_event) -> None:
+        """Renew the lease three times per ttl_secs until stop_event is set or the lock is lost."""
+        while not stop_event.wait(self.ttl_secs / 3):
+            try:
+                if not self.renew():
+                    break
+            except Exception:
+                self.lp.m_logger.warning(f"Could not renew WFLock of WF {self.fw_id}: {traceback.format_exc()}")
+
+    def release(self) -> None:
+        """Release the lock and record its waiting and holding times."""
+        if self._renew_stop is not None:
+            self._renew_stop.set()
+            self._renew_stop = None
+        hold_time = time.perf_counter() - self._acquired_at
+        stats = self.lp.wf_lock_stats
+        stats["lock_acquires"] += 1
+        stats["lock_contended"] += int(self.contended)
+        stats["lock_wait_secs"] += self.waiting_time
+        stats["lock_hold_secs"] += hold_time
+        result = self.lp.workflows.update_one(
+            {"nodes": self.fw_id, "locked": self.token},
+            {
+                "$unset": {"locked": True, "lock_expires_at": True},
+                "$inc": {
+                    "lock_stats.acquires": 1,
+                    "lock_stats.contended": int(self.contended),
+                    "lock_stats.wait_secs": self.waiting_time,
+                    "lock_stats.hold_secs": hold_time,
+                },
+            },
+        )
+        if not result.matched_count:
+            self.lp.m_logger.warning(f"WFLock of WF {self.fw_id} expired before it was released")
+        self.token = None
 
     def __enter__(self):
         ctr = 0
-        waiting_time = 0
+        start = time.perf_counter()
         # acquire lock
-        links_dict = self.lp.workflows.find_one_and_update(
-            {"nodes": self.fw_id, "locked": {"$exists": False}}, {"$set": {"locked": True}}
-        )
+        acquired = self.try_acquire()
         # could not acquire lock b/c WF is already locked for writing
-        while not links_dict:
+        while not acquired:
             ctr += 1
-            time_incr = ctr / 10.0 + random.random() / 100.0
+            time_incr = _get_backoff_secs(ctr)
             time.sleep(time_incr)  # wait a bit for lock to free up
-            waiting_time += time_incr
-            if waiting_time > self.expire_secs:  # too much time waiting, expire lock
-                wf = self.lp.workflows.find_one({"nodes": self.fw_id})
+            self.waiting_time += time_incr
+            if self.waiting_time > self.expire_secs:  # too much time waiting, expire lock
+                wf = self.lp.workflows.find_one({"nodes": self.fw_id}, {"_id": 1})
                 if not wf:
                     raise ValueError(f"Could not find workflow in database: {self.fw_id}")
                 if self.kill:  # force lock acquisition
                     self.lp.m_logger.warning(f"FORCIBLY ACQUIRING LOCK, WF: {self.fw_id}")
-                    links_dict = self.lp.workflows.find_one_and_update(
-                        {"nodes": self.fw_id}, {"$set": {"locked": True}}
-                    )
+                    acquired = self.try_acquire(force=True)
                 else:  # throw error if we don't want to force lock acquisition
+                    self.lp.wf_lock_stats["lock_waits"] += ctr
                     raise LockedWorkflowError(f"Could not get workflow - LOCKED: {self.fw_id}")
             else:
                 # retry lock
-                links_dict = self.lp.workflows.find_one_and_update(
-                    {"nodes": self.fw_id, "locked": {"$exists": False}}, {"$set": {"locked": True}}
-                )
+                acquired = self.try_acquire()
+        self.lp.wf_lock_stats["lock_waits"] += ctr
+        self.contended = ctr > 0
+        self.waiting_time = self._acquired_at - start
+        return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.lp.workflows.find_one_and_update({"nodes": self.fw_id}, {"$unset": {"locked": True}})
+        self.release()
 
 
 class LaunchPad(FWSerializable):
@@ -221,6 +390,8 @@ class LaunchPad(FWSerializable):
         self.offline_runs = self.db.offline_runs
         self.fw_id_assigner = self.db.fw_id_assigner
         self.workflows = self.db.workflows
+        self.wf_links = self.db.wf_links
+        self.ready_queue = self.db.ready_queue
         if GRIDFS_FALLBACK_COLLECTION:
             self.gridfs_fallback = gridfs.GridFS(self.db, GRIDFS_FALLBACK_COLLECTION)
         else:
@@ -228,6 +399,13 @@ class LaunchPad(FWSerializable):
 
         self.backup_launch_data = {}
         self.backup_fw_data = {}
+        self._run_exists_cache = {}
+        # blocks of ids reserved from the fw_id_assigner, see _get_new_ids()
+        self._id_blocks = {}
+        self._id_lock = threading.Lock()
+        # lock_acquires/lock_contended/lock_waits/lock_wait_secs/lock_hold_secs: WFLocks,
+        # cas_commits/cas_conflicts: optimistic updates, see _modify_wf()
+        self.wf_lock_stats = Counter()
 
     def to_dict(self):
         """Note: usernames/passwords are exported as unencrypted Strings!"""
@@ -255,12 +433,16 @@ class LaunchPad(FWSerializable):
                 the spec key are allowed. So if you supply {"_tasks.1.parameter": "hello"},
                 you are effectively modifying spec._tasks.1.parameter in the actual fireworks
                 collection.
-            mongo (bool): spec_document uses mongo syntax to directly update the spec
+            mongo (bool): spec_document uses mongo syntax to directly update the spec. Compressed
+                values (see DB_COMPRESSED_KEYS) that are updated in parts are decompressed first.
         """
+        self._run_exists_cache.clear()
         mod_spec = spec_document if mongo else {"$set": {"spec." + k: v for k, v in spec_document.items()}}
 
         allowed_states = ["READY", "WAITING", "FIZZLED", "DEFUSED", "PAUSED"]
+        self._decompress_updated_spec_values(fw_ids, mod_spec)
         self.fireworks.update_many({"fw_id": {"$in": fw_ids}, "state": {"$in": allowed_states}}, mod_spec)
+        self.sync_ready_queue(fw_ids)
         for fw in self.fireworks.find(
             {"fw_id": {"$in": fw_ids}, "state": {"$nin": allowed_states}}, {"fw_id": 1, "state": 1}
         ):
@@ -268,6 +450,30 @@ class LaunchPad(FWSerializable):
                 f"Cannot update spec of fw_id: {fw['fw_id']} with state: {fw['state']}. Try rerunning first."
             )
 
+    def _decompress_updated_spec_values(self, fw_ids, mod_spec) -> None:
+        """Store the compressed spec values that an update modifies in parts decompressed, so that
+        the update does not write into the compressed value, see DB_COMPRESSED_KEYS.
+
+        Args:
+            fw_ids ([int]): ids of the updated fireworks
+            mod_spec (dict): the update, in mongo syntax
+        """
+        keys = {
+            path.split(".")[1]
+            for op in mod_spec.values()
+            if isinstance(op, dict)
+            for path in op
+            if path.startswith("spec.") and path.count(".") > 1
+        }
+        for key in keys:
+            for fw in self.fireworks.find(
+                {"fw_id": {"$in": fw_ids}, f"spec.{key}.{COMPRESSED_KEY}": {"$exists": True}},
+                {"fw_id": 1, f"spec.{key}": 1},
+            ):
+                self.fireworks.update_one(
+                    {"fw_id": fw["fw_id"]}, {"$set": {f"spec.{key}": decompress_value(fw["spec"][key])}}
+                )
+
     @classmethod
     def from_dict(cls, d):
         port = d.get("port", None)
@@ -317,6 +523,7 @@ class LaunchPad(FWSerializable):
         Raises:
             ValueError: in case of invalid password or failed password override
         """
+        self._run_exists_cache.clear()
         m_password = datetime.datetime.now().strftime("%Y-%m-%d")
 
         if password == m_password or (
@@ -325,7 +532,9 @@ class LaunchPad(FWSerializable):
             self.fireworks.delete_many({})
             self.launches.delete_many({})
             self.workflows.delete_many({})
+            self.wf_links.delete_many({})
             self.offline_runs.delete_many({})
+            self.ready_queue.delete_many({})
             self._restart_ids(1, 1)
             if self.gridfs_fallback is not None:
                 self.db.drop_collection(f"{GRIDFS_FALLBACK_COLLECTION}.chunks")
@@ -397,31 +606,85 @@ class LaunchPad(FWSerializable):
         # update the Workflow with the new ids
         wf._reassign_ids(old_new)
         # insert the WFLinks
-        self.workflows.insert_one(wf.to_db_dict())
+        wf_dict = self._get_wf_db_dict(wf)
+        if wf_dict.get("split"):
+            self._mark_split_fws(wf_dict["_id"], wf_dict["nodes"], wf.leaf_fw_ids)
+        self.workflows.insert_one(wf_dict)
         self.m_logger.info(f"Added a workflow. id_map: {old_new}")
         return old_new
 
-    def bulk_add_wfs(self, wfs) -> None:
+    def bulk_add_wfs(self, wfs, chunk_size=1000, start_chunk=0) -> None:
         """Adds a list of workflows to the fireworks database
         using insert_many for both the fws and wfs, is
         more efficient than adding them one at a time.
 
+        The workflows are consumed in chunks of chunk_size, so that the workflows of an iterator are
+        added with bounded memory. The next chunk is serialized in a background thread while the
+        current one is inserted. If a chunk fails, its inserted documents are removed and the error
+        log names the chunk to resume from with start_chunk.
+
         Args:
-            wfs ([Workflow]): list of workflows or fireworks
+            wfs ([Workflow]): list or iterator of workflows or fireworks
+            chunk_size (int): number of workflows inserted at once
+            start_chunk (int): index of the first chunk to add, the workflows of the chunks before
+                are skipped
 
         Returns:
             None
 
         """
+        self._run_exists_cache.clear()
+        wfs_iter = iter(wfs)
+        chunks = islice(iter(lambda: list(islice(wfs_iter, chunk_size)), []), start_chunk, None)
+        total = max(len(wfs) - start_chunk * chunk_size, 0) if hasattr(wfs, "__len__") else None
+        n_wfs = 0
+        start_time = time.time()
+        with tqdm(total=total, unit="wf") as progress, ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(self._prepare_wf_chunk, next(chunks, []))
+            for idx in count(start_chunk):
+                chunk = next_chunk = None
+                try:
+                    chunk = pending.result()
+                    if not chunk[0]:
+                        break
+                    # serialize the next chunk while this one is inserted
+                    pending = next_chunk = executor.submit(self._prepare_wf_chunk, next(chunks, []))
+                    self._insert_wf_chunk(*chunk)
+                except BaseException:
+                    self.m_logger.exception(
+                        f"Adding the workflows failed in chunk {idx} after {n_wfs} workflows were added, "
+                        f"resume with start_chunk={idx}"
+                    )
+                    # remove what was written of this chunk and of the next one, e.g. the links of split
+                    # workflows, also when interrupted so that they can be added again
+                    new_wfs = list(chunk[0]) if chunk else []
+                    if next_chunk is not None and not next_chunk.cancel() and next_chunk.exception() is None:
+                        new_wfs += next_chunk.result()[0]
+                    self._delete_new_fws(fw_id for wf in new_wfs for fw_id in wf.id_fw)
+                    raise
+                n_wfs += len(chunk[0])
+                progress.update(len(chunk[0]))
+        elapsed = time.time() - start_time
+        self.m_logger.info(f"Added {n_wfs} workflows in {elapsed:.1f} s ({n_wfs / max(elapsed, 1e-9):.0f} workflows/s)")
+
+    def _prepare_wf_chunk(self, wfs):
+        """Assign the fw_ids of new workflows and serialize them, see bulk_add_wfs().
+
+        Args:
+            wfs ([Workflow]): workflows or fireworks
+
+        Returns:
+            ([Workflow], [dict], [dict]): the workflows, their documents and those of their fireworks
+        """
         # Make all fireworks workflows
         wfs = [Workflow.from_firework(wf) if isinstance(wf, Firework) else wf for wf in wfs]
+        if not wfs:
+            return [], [], []
 
         # Initialize new firework counter, starting from the next fw id
         total_num_fws = sum(len(wf) for wf in wfs)
-        new_fw_counter = self.fw_id_assigner.find_one_and_update({}, {"$inc": {"next_fw_id": total_num_fws}})[
-            "next_fw_id"
-        ]
-        for wf in tqdm(wfs):
+        new_fw_counter = self.get_new_fw_id(quantity=total_num_fws)
+        for wf in wfs:
             # Reassign fw_ids and increment the counter
             old_new = dict(zip(wf.id_fw, range(new_fw_counter, new_fw_counter + len(wf)), strict=True))
             for fw in wf:
@@ -434,12 +697,103 @@ class LaunchPad(FWSerializable):
                 wf.id_fw[fw_id].state = "READY"
                 wf.fw_states[fw_id] = "READY"
 
+        wf_dicts = [self._get_wf_db_dict(wf) for wf in wfs]
+        fw_dicts = [fw.to_db_dict() for wf in wfs for fw in wf]
+        return wfs, wf_dicts, fw_dicts
+
+    def _insert_wf_chunk(self, wfs, wf_dicts, fw_dicts) -> None:
+        """Insert workflows prepared with _prepare_wf_chunk().
+
+        Args:
+            wfs ([Workflow])
+            wf_dicts ([dict]): documents of the workflows
+            fw_dicts ([dict]): documents of their fireworks
+        """
         # Insert all fws and wfs, do workflows first so fws don't
         # get checked out prematurely
-        self.workflows.insert_many(wf.to_db_dict() for wf in wfs)
-        all_fws = chain.from_iterable(wf for wf in wfs)
-        self.fireworks.insert_many(fw.to_db_dict() for fw in all_fws)
-        return
+        self.workflows.insert_many(wf_dicts, ordered=False)
+        self.fireworks.insert_many(fw_dicts, ordered=False)
+        for wf, wf_dict in zip(wfs, wf_dicts, strict=True):
+            if wf_dict.get("split"):
+                self._mark_split_fws(wf_dict["_id"], wf_dict["nodes"], wf.leaf_fw_ids)
+        self._update_ready_queue([fw for wf in wfs for fw in wf])
+
+    def _delete_new_fws(self, fw_ids) -> None:
+        """Remove the documents of new fireworks that were not completely added, and of their
+        workflows.
+
+        Args:
+            fw_ids ([int]): ids of the fireworks
+        """
+        fw_ids = list(fw_ids)
+        if fw_ids:
+            self.workflows.delete_many({"nodes": {"$in": fw_ids}})
+            self.fireworks.delete_many({"fw_id": {"$in": fw_ids}})
+            self.wf_links.delete_many({"fw_id": {"$in": fw_ids}})
+            self.ready_queue.delete_many({"fw_id": {"$in": fw_ids}})
+
+    def _get_wf_db_dict(self, wf):
+        """Return the workflows collection document of a new workflow.
+
+        Workflows with at least SPLIT_WF_MIN_FWS FireWorks are stored in the split layout, see
+        LazyWorkflow. Their links are inserted into the wf_links collection here, and their fireworks
+        must be marked with _mark_split_fws().
+
+        Args:
+            wf (Workflow)
+
+        Returns:
+            dict
+        """
+        wf_dict = wf.to_db_dict()
+        if SPLIT_WF_MIN_FWS is None or len(wf) < SPLIT_WF_MIN_FWS:
+            return wf_dict
+        for key in ("links", "parent_links", "fw_states"):
+            del wf_dict[key]
+        wf_dict.update(_id=ObjectId(), split=True)
+        parent_links = wf.links.parent_links
+        self.wf_links.insert_many(
+            {"fw_id": fw_id, "wf_id": wf_dict["_id"], "children": children, "parents": parent_links.get(fw_id, [])}
+            for fw_id, children in wf.links.items()
+        )
+        return wf_dict
+
+    def _mark_split_fws(self, wf_id, fw_ids, leaf_ids, non_leaf_ids=()) -> None:
+        """Mark the fireworks of a workflow in the split layout, see LazyWorkflow.
+
+        Args:
+            wf_id (ObjectId): _id of the workflows collection document
+            fw_ids ([int]): ids of the fireworks to mark as part of the workflow
+            leaf_ids ([int]): ids of the fireworks to mark as leaves
+            non_leaf_ids ([int]): ids of the fireworks that are no longer leaves
+        """
+        for ids, update in (
+            (fw_ids, {"$set": {"wf_id": wf_id}}),
+            (leaf_ids, {"$set": {"wf_leaf": True}}),
+            (non_leaf_ids, {"$unset": {"wf_leaf": True}}),
+        ):
+            if ids:
+                self.fireworks.update_many({"fw_id": {"$in": list(ids)}}, update)
+
+    def _get_wf_links(self, links_dict):
+        """Return the links and parent links of a workflows collection document in either layout.
+
+        Args:
+            links_dict (dict): workflows collection document
+
+        Returns:
+            (dict, dict): links and parent links, with str keys
+        """
+        if not links_dict.get("split"):
+            return links_dict["links"], links_dict["parent_links"]
+        links, parent_links = {}, {}
+        for doc in self.wf_links.find(
+            {"wf_id": links_dict["_id"]}, {"_id": 0, "fw_id": 1, "children": 1, "parents": 1}
+        ):
+            links[str(doc["fw_id"])] = doc["children"]
+            if doc["parents"]:
+                parent_links[str(doc["fw_id"])] = doc["parents"]
+        return links, parent_links
 
     def append_wf(self, new_wf, fw_ids, detour=False, pull_spec_mods=True) -> None:
         """Append a new workflow on top of an existing workflow.
@@ -454,8 +808,8 @@ class LaunchPad(FWSerializable):
         """
         wf = self.get_wf_by_fw_id_lzyfw(fw_ids[0])
         updated_ids = wf.append_wf(new_wf, fw_ids, detour=detour, pull_spec_mods=pull_spec_mods)
-        with WFLock(self, fw_ids[0]):
-            self._update_wf(wf, updated_ids)
+        with WFLock(self, fw_ids[0]) as lock:
+            self._update_wf(wf, updated_ids, lock)
 
     def get_launch_by_id(self, launch_id):
         """Given a Launch id, return details of the Launch.
@@ -472,7 +826,9 @@ class LaunchPad(FWSerializable):
         m_launch = self.launches.find_one({"launch_id": launch_id})
         if m_launch:
             m_launch["action"] = get_action_from_gridfs(m_launch.get("action"), self.gridfs_fallback)
-            return Launch.from_dict(m_launch)
+            m_launch = Launch.from_dict(m_launch)
+            m_launch._track_changes()
+            return m_launch
         raise ValueError(f"No Launch exists with {launch_id=}")
 
     def get_fw_dict_by_id(self, fw_id):
@@ -503,6 +859,11 @@ class LaunchPad(FWSerializable):
         for launch in launches:
             launch["action"] = get_action_from_gridfs(launch.get("action"), self.gridfs_fallback)
         fw_dict["archived_launches"] = launches
+        # values stored compressed, see DB_COMPRESSION_THRESHOLD
+        fw_dict["spec"] = decompress_values(fw_dict["spec"])
+        for launch in fw_dict["launches"] + fw_dict["archived_launches"]:
+            if launch.get("action"):
+                launch["action"]["stored_data"] = decompress_values(launch["action"].get("stored_data") or {})
         return fw_dict
 
     def get_fw_by_id(self, fw_id):
@@ -514,7 +875,9 @@ class LaunchPad(FWSerializable):
         Returns:
             Firework object
         """
-        return Firework.from_dict(self.get_fw_dict_by_id(fw_id))
+        m_fw = Firework.from_dict(self.get_fw_dict_by_id(fw_id))
+        m_fw._track_changes()
+        return m_fw
 
     def get_wf_by_fw_id(self, fw_id):
         """Given a Firework id, give back the Workflow containing that Firework.
@@ -534,7 +897,7 @@ class LaunchPad(FWSerializable):
         fws = map(self.get_fw_by_id, links_dict["nodes"])
         return Workflow(
             fws,
-            links_dict["links"],
+            self._get_wf_links(links_dict)[0],
             links_dict["name"],
             links_dict["metadata"],
             links_dict["created_on"],
@@ -553,18 +916,28 @@ class LaunchPad(FWSerializable):
         Raises:
             ValueError: in case of invalid fw_id
         """
-        links_dict = self.workflows.find_one({"nodes": fw_id})
+        # the nodes are not needed and can be many, see _get_wf_lzyfw()
+        links_dict = self.workflows.find_one({"nodes": fw_id}, {"nodes": False})
         if not links_dict:
             raise ValueError(f"Could not find a Workflow with {fw_id=}")
+        return self._get_wf_lzyfw(links_dict)
 
+    def _get_wf_lzyfw(self, links_dict):
+        """Build a Workflow of LazyFireworks from its workflows collection document, or a
+        LazyWorkflow for the split layout. The nodes of the document are not used.
+        """
+        if links_dict.get("split"):
+            return LazyWorkflow(self, links_dict)
+        # every FireWork has an entry in the links
         fws = [
-            LazyFirework(fw_id, self.fireworks, self.launches, self.gridfs_fallback) for fw_id in links_dict["nodes"]
+            LazyFirework(int(fw_id), self.fireworks, self.launches, self.gridfs_fallback)
+            for fw_id in links_dict["links"]
         ]
 
         # Check for fw_states in links_dict to conform with pre-optimized workflows
         fw_states = {int(k): v for k, v in links_dict["fw_states"].items()} if "fw_states" in links_dict else None
 
-        return Workflow(
+        wf = LazyFireworkWorkflow(
             fws,
             links_dict["links"],
             links_dict["name"],
@@ -573,6 +946,9 @@ class LaunchPad(FWSerializable):
             links_dict["updated_on"],
             fw_states,
         )
+        if fw_states is not None:
+            wf._track_changes()
+        return wf
 
     def delete_fws(self, fw_ids, delete_launch_dirs=False) -> None:
         """Delete a set of fireworks identified by their fw_ids.
@@ -587,6 +963,7 @@ class LaunchPad(FWSerializable):
             delete_launch_dirs (bool): if True all the launch directories associated with
                 the WF will be deleted as well, if possible.
         """
+        self._run_exists_cache.clear()
         potential_launch_ids = []
         launch_ids = []
         for fw_id in fw_ids:
@@ -621,6 +998,7 @@ class LaunchPad(FWSerializable):
         self.launches.delete_many({"launch_id": {"$in": launch_ids}})
         self.offline_runs.delete_many({"launch_id": {"$in": launch_ids}})
         self.fireworks.delete_many({"fw_id": {"$in": fw_ids}})
+        self.ready_queue.delete_many({"fw_id": {"$in": fw_ids}})
 
     def delete_wf(self, fw_id, delete_launch_dirs=False) -> None:
         """Delete the workflow containing firework with the given id.
@@ -636,6 +1014,7 @@ class LaunchPad(FWSerializable):
         self.delete_fws(fw_ids, delete_launch_dirs=delete_launch_dirs)
         print("Removing workflow.")
         self.workflows.delete_one({"nodes": fw_id})
+        self.wf_links.delete_many({"fw_id": {"$in": fw_ids}})
 
     def get_wf_summary_dict(self, fw_id, mode="more"):
         """A much faster way to get summary information about a Workflow by querying only for
@@ -702,11 +1081,11 @@ class LaunchPad(FWSerializable):
             del wf["nodes"]
 
         if mode == "all":
-            del wf["fw_states"]
-            wf["links"] = {id_name_map[int(k)]: [id_name_map[i] for i in v] for k, v in wf["links"].items()}
-            wf["parent_links"] = {
-                id_name_map[int(k)]: [id_name_map[i] for i in v] for k, v in wf["parent_links"].items()
-            }
+            wf.pop("fw_states", None)
+            links, parent_links = self._get_wf_links(wf)
+            wf.pop("split", None)
+            wf["links"] = {id_name_map[int(k)]: [id_name_map[i] for i in v] for k, v in links.items()}
+            wf["parent_links"] = {id_name_map[int(k)]: [id_name_map[i] for i in v] for k, v in parent_links.items()}
         if mode == "reservations":
             wf["states"] = {}
             wf["launches"] = {}
@@ -884,11 +1263,14 @@ class LaunchPad(FWSerializable):
     def run_exists(self, fworker=None):
         """Checks to see if the database contains any FireWorks that are ready to run.
 
+        This is a single indexed query that does not load the FireWorks, so duplicates are only
+        detected at checkout. Results are cached for RUN_EXISTS_CACHE_SECS.
+
         Returns:
             bool: True if the database contains any FireWorks that are ready to run.
         """
         q = fworker.query if fworker else {}
-        return bool(self._get_a_fw_to_run(query=q, checkout=False))
+        return self._get_cached_run_check("run_exists", q, self._run_exists)
 
     def future_run_exists(self, fworker=None) -> bool:
         """Check if database has any current OR future Fireworks available.
@@ -896,23 +1278,70 @@ class LaunchPad(FWSerializable):
         Returns:
             bool: True if database has any ready or waiting Fireworks.
         """
-        if self.run_exists(fworker):
+        q = fworker.query if fworker else {}
+        return self._get_cached_run_check("future_run_exists", q, self._future_run_exists)
+
+    def _run_exists(self, query):
+        m_query = dict(query)
+        m_query["state"] = "READY"
+        return self.fireworks.find_one(m_query, {"_id": 0, "fw_id": 1}) is not None
+
+    def _future_run_exists(self, query):
+        if self._run_exists(query):
             # check first to see if any are READY
             return True
         # retrieve all [RUNNING/RESERVED] fireworks
-        q = fworker.query if fworker else {}
-        q.update(state={"$in": ["RUNNING", "RESERVED"]})
-        active = self.get_fw_ids(q)
-        # then check if they have WAITING children
-        for fw_id in active:
-            children = self.get_wf_by_fw_id_lzyfw(fw_id).links[fw_id]
-            if any(self.get_fw_dict_by_id(i)["state"] == "WAITING" for i in children):
+        m_query = dict(query)
+        m_query["state"] = {"$in": ["RUNNING", "RESERVED"]}
+        active = {fw["fw_id"] for fw in self.fireworks.find(m_query, {"_id": 0, "fw_id": 1})}
+        if not active:
+            return False
+
+        # then check if they have WAITING children, using the states stored in the workflows
+        unknown_children = []
+        query = {"nodes": {"$in": list(active)}, "split": {"$exists": False}}
+        for links_dict in self.workflows.find(query, {"links": 1, "fw_states": 1}):
+            children = [
+                child for parent, children in links_dict["links"].items() if int(parent) in active for child in children
+            ]
+            if "fw_states" not in links_dict:
+                unknown_children.extend(children)
+            elif any(links_dict["fw_states"].get(str(child)) == "WAITING" for child in children):
                 return True
+        # the states of workflows in the split layout are only kept on the fireworks
+        for links in self.wf_links.find({"fw_id": {"$in": list(active)}}, {"children": 1}):
+            unknown_children.extend(links["children"])
+        if unknown_children:
+            return self.fireworks.count_documents({"fw_id": {"$in": unknown_children}, "state": "WAITING"}, limit=1) > 0
 
         # if we loop over all active and none have WAITING children
         # there is no future work to do
         return False
 
+    def _get_cached_run_check(self, name, query, check):
+        """Return check(query), cached for RUN_EXISTS_CACHE_SECS so that polling launchers do not
+        query the database every time. The cache is cleared by any update of the fireworks made
+        through this LaunchPad.
+
+        Args:
+            name (str): name of the check, part of the cache key
+            query (dict): the FWorker query
+            check (callable): function of the query returning a bool
+
+        Returns:
+            bool
+        """
+        if RUN_EXISTS_CACHE_SECS <= 0:
+            return check(query)
+        key = (name, json.dumps(query, sort_keys=True, default=str))
+        now = time.monotonic()
+        cached = self._run_exists_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+        result = check(query)
+        self._run_exists_cache[key] = (now + RUN_EXISTS_CACHE_SECS, result)
+        return result
+
     def tuneup(self, bkground=True) -> None:
         """Database tuneup: build indexes."""
         self.m_logger.info("Performing db tune-up")
@@ -932,13 +1361,25 @@ class LaunchPad(FWSerializable):
 
         for f in ("state", "time_start", "time_end", "host", "ip", "fworker.name"):
             self.launches.create_index(f, background=bkground)
+        # covers the expired lease lookups of detect_lostruns/detect_unreserved
+        self.launches.create_index([("state", ASCENDING), ("lease_expires_at", ASCENDING)], background=bkground)
 
         for f in ("name", "created_on", "updated_on", "nodes"):
             self.workflows.create_index(f, background=bkground)
 
+        # for workflows in the split layout, see LazyWorkflow
+        self.wf_links.create_index("fw_id", unique=True, background=bkground)
+        self.wf_links.create_index("wf_id", background=bkground)
+        self.fireworks.create_index(
+            [("wf_id", ASCENDING), ("wf_leaf", ASCENDING), ("state", ASCENDING)], background=bkground
+        )
+
         for idx in self.user_indices:
             self.fireworks.create_index(idx, background=bkground)
 
+        # covers the fw_id lookups of run_exists/future_run_exists
+        self.fireworks.create_index([("state", DESCENDING), ("fw_id", ASCENDING)], background=bkground)
+
         for idx in self.wf_user_indices:
             self.workflows.create_index(idx, background=bkground)
 
@@ -952,6 +1393,21 @@ class LaunchPad(FWSerializable):
         )
         self.workflows.create_index([("state", DESCENDING), ("_id", DESCENDING)], background=bkground)
 
+        scheduler = get_scheduler(SCHEDULER)
+        for idx in scheduler.indexes if scheduler else []:
+            self.fireworks.create_index(idx, background=bkground)
+
+        if READY_QUEUE:
+            self.ready_queue.create_index("fw_id", unique=True, background=bkground)
+            for direction in (DESCENDING, ASCENDING):
+                self.ready_queue.create_index(
+                    [("priority", DESCENDING), ("created_on", direction)], background=bkground
+                )
+                self.ready_queue.create_index(
+                    [("category", ASCENDING), ("priority", DESCENDING), ("created_on", direction)],
+                    background=bkground,
+                )
+
         if not bkground:
             self.m_logger.debug("Compacting database...")
             try:
@@ -1033,14 +1489,20 @@ class LaunchPad(FWSerializable):
     def defuse_wf(self, fw_id, defuse_all_states=True) -> None:
         """Defuse the workflow containing the given firework id.
 
+        The reserved and running fireworks (and the completed ones with defuse_all_states) are
+        rerun first, then all fireworks are defused in one locked update of the workflow.
+
         Args:
             fw_id (int): firework id
             defuse_all_states (bool)
         """
-        wf = self.get_wf_by_fw_id_lzyfw(fw_id)
-        for fw in wf:
-            if fw.state not in ["COMPLETED", "FIZZLED"] or defuse_all_states:
-                self.defuse_fw(fw.fw_id)
+        rerun_states = ["RESERVED", "RUNNING"]
+        defuse_states = ["WAITING", "READY", "PAUSED"]
+        if defuse_all_states:
+            rerun_states.append("COMPLETED")
+            defuse_states.append("FIZZLED")
+        self._rerun_wf_fws(fw_id, rerun_states)
+        self._set_wf_fws_state(fw_id, "DEFUSED", defuse_states)
 
     def pause_wf(self, fw_id) -> None:
         """Pause the workflow containing the given firework id.
@@ -1048,10 +1510,7 @@ class LaunchPad(FWSerializable):
         Args:
             fw_id (int): firework id
         """
-        wf = self.get_wf_by_fw_id_lzyfw(fw_id)
-        for fw in wf:
-            if fw.state not in ["COMPLETED", "FIZZLED", "DEFUSED"]:
-                self.pause_fw(fw.fw_id)
+        self._set_wf_fws_state(fw_id, "PAUSED", ["WAITING", "READY", "RESERVED"])
 
     def reignite_wf(self, fw_id) -> None:
         """Reignite the workflow containing the given firework id.
@@ -1059,9 +1518,7 @@ class LaunchPad(FWSerializable):
         Args:
             fw_id (int): firework id
         """
-        wf = self.get_wf_by_fw_id_lzyfw(fw_id)
-        for fw in wf:
-            self.reignite_fw(fw.fw_id)
+        self._set_wf_fws_state(fw_id, "WAITING", ["DEFUSED"])
 
     def archive_wf(self, fw_id) -> None:
         """Archive the workflow containing the given firework id.
@@ -1069,21 +1526,77 @@ class LaunchPad(FWSerializable):
         Args:
             fw_id (int): firework id
         """
-        # first archive all the launches, so they are not used in duplicate checks
-        wf = self.get_wf_by_fw_id_lzyfw(fw_id)
-        if wf.state != "ARCHIVED":
-            fw_ids = [f.fw_id for f in wf]
-            for fw_id in fw_ids:
-                self.rerun_fw(fw_id)
-
+        if self.get_wf_by_fw_id_lzyfw(fw_id).state != "ARCHIVED":
+            # first archive all the launches, so they are not used in duplicate checks
+            self._rerun_wf_fws(fw_id, ["READY", "RESERVED", "RUNNING", "COMPLETED", "FIZZLED", "PAUSED"])
             # second set the state of all FWs to ARCHIVED
-            wf = self.get_wf_by_fw_id_lzyfw(fw_id)
-            for fw in wf:
-                self.fireworks.find_one_and_update(
-                    {"fw_id": fw.fw_id},
-                    {"$set": {"state": "ARCHIVED", "updated_on": datetime.datetime.now(datetime.timezone.utc)}},
-                )
-                self._refresh_wf(fw.fw_id)
+            self._set_wf_fws_state(fw_id, "ARCHIVED", list(Firework.STATE_RANKS))
+
+    def _rerun_wf_fws(self, fw_id, states, rerun_duplicates=True) -> None:
+        """Rerun the fireworks of the workflow containing the given firework id that are in one of
+        the given states. Rerunning a firework also resets its descendants, so only the fireworks
+        without a parent that is rerun as well are rerun directly. The workflow is locked, modified
+        and written once, only the duplicates in other workflows are rerun separately.
+
+        Args:
+            fw_id (int): firework id
+            states ([str]): states of the fireworks to rerun
+            rerun_duplicates (bool): flag for whether duplicates should be rerun
+        """
+        dupe_launches = []
+
+        def modify(wf):
+            query = {"fw_id": {"$in": wf.links.nodes}, "state": {"$in": states}}
+            fw_ids = {doc["fw_id"] for doc in self.fireworks.find(query, {"fw_id": 1})}
+            if rerun_duplicates:
+                # detect the FWs that share the same launch, must be done before the rerun
+                dupe_query = {**query, "spec._dupefinder": {"$exists": True}}
+                dupe_launches[:] = {
+                    lid for doc in self.fireworks.find(dupe_query, {"launches": 1}) for lid in doc["launches"]
+                }
+            if isinstance(wf, LazyWorkflow):
+                wf.links._load(fw_ids)
+            parent_links = wf.links.parent_links
+            roots = [f for f in sorted(fw_ids) if not fw_ids.intersection(parent_links.get(f, []))]
+            LazyFirework.prefetch([wf.id_fw[f] for f in roots])
+            for f in roots:
+                # as in rerun_fw() without a launch recovery
+                if wf.id_fw[f].spec.pop("_recovery", None) is not None:
+                    wf.id_fw[f]._mark_changed("spec")
+            return wf.rerun_fws(roots)
+
+        self._modify_wf(fw_id, modify)
+        if dupe_launches:
+            # the reset fireworks no longer have these launches, the rest are duplicates in other workflows
+            for doc in self.fireworks.find({"launches": {"$in": dupe_launches}}, {"fw_id": 1}):
+                self.m_logger.info(f"Also rerunning duplicate fw_id: {doc['fw_id']}")
+                self.rerun_fw(doc["fw_id"], rerun_duplicates=False)
+
+    def _set_wf_fws_state(self, fw_id, state, from_states) -> None:
+        """Set the state of all fireworks of the workflow containing the given firework id that are
+        in one of from_states, and refresh them. The workflow is locked, modified and written once.
+
+        Args:
+            fw_id (int): firework id
+            state (str): the new state
+            from_states ([str]): states of the fireworks to change
+        """
+
+        def modify(wf):
+            query = {"fw_id": {"$in": wf.links.nodes}, "state": {"$in": from_states}}
+            fw_ids = [doc["fw_id"] for doc in self.fireworks.find(query, {"fw_id": 1})]
+            # the state is written with the other changes, the launches are not needed
+            LazyFirework.prefetch([wf.id_fw[f] for f in fw_ids], launches=False)
+            for f in fw_ids:
+                wf.id_fw[f].state = state
+                wf.fw_states[f] = state
+            updated_ids = set(fw_ids)
+            for f in fw_ids:
+                wf.refresh(f, updated_ids)
+            return updated_ids
+
+        self._run_exists_cache.clear()
+        self._modify_wf(fw_id, modify)
 
     def _restart_ids(self, next_fw_id, next_launch_id) -> None:
         """Internal method used to reset firework id counters.
@@ -1092,6 +1605,8 @@ class LaunchPad(FWSerializable):
             next_fw_id (int): id to give next Firework
             next_launch_id (int): id to give next Launch
         """
+        with self._id_lock:
+            self._id_blocks = {}
         self.fw_id_assigner.delete_many({})
         self.fw_id_assigner.find_one_and_replace(
             {"_id": -1}, {"next_fw_id": next_fw_id, "next_launch_id": next_launch_id}, upsert=True
@@ -1115,7 +1630,7 @@ class LaunchPad(FWSerializable):
         self._refresh_wf(m_fw.fw_id)  # since we updated a state, we need to refresh the WF again
         return False
 
-    def _get_a_fw_to_run(self, query=None, fw_id=None, checkout=True):
+    def _get_a_fw_to_run(self, query=None, fw_id=None, checkout=True, scheduler=None):
         """Get the next ready firework to run.
 
         Args:
@@ -1124,18 +1639,15 @@ class LaunchPad(FWSerializable):
                 Note: We want to return None if this specific FW  doesn't exist anymore. This is
                 because our queue params might have been tailored to this FW.
             checkout (bool): if True, check out the matching firework and set state=RESERVED
+            scheduler (SchedulerBase, str or dict): scheduling policy used to pick the firework to
+                check out, defaults to SCHEDULER
 
         Returns:
             Firework
         """
         m_query = dict(query) if query else {}  # make a defensive copy
         m_query["state"] = "READY"
-        sortby = [("spec._priority", DESCENDING)]
-
-        if SORT_FWS.upper() == "FIFO":
-            sortby.append(("created_on", ASCENDING))
-        elif SORT_FWS.upper() == "FILO":
-            sortby.append(("created_on", DESCENDING))
+        sortby = self._get_ready_sort()
 
         # Override query if fw_id defined
         if fw_id:
@@ -1143,7 +1655,9 @@ class LaunchPad(FWSerializable):
 
         while True:
             # check out the matching firework, depending on the query set by the FWorker
-            if checkout:
+            if checkout and not fw_id:
+                m_fw = next(iter(self._claim_ready_fws(query, scheduler=scheduler, projection={"fw_id": 1})), None)
+            elif checkout:
                 m_fw = self.fireworks.find_one_and_update(
                     m_query,
                     {"$set": {"state": "RESERVED", "updated_on": datetime.datetime.now(datetime.timezone.utc)}},
@@ -1158,42 +1672,227 @@ class LaunchPad(FWSerializable):
             try:
                 m_fw = self.get_fw_by_id(fw_id_candidate)
             except Exception:
-                # If the FireWork cannot be deserialized (e.g., missing module/class), mark it FIZZLED
-                # and continue searching for another runnable FireWork instead of crashing the loop.
-                self.m_logger.warning(
-                    f"Failed to deserialize FireWork with fw_id={fw_id_candidate}; marking as FIZZLED and continuing."
-                )
-                try:
-                    err_details = traceback.format_exc()
-                    now = datetime.datetime.now(datetime.timezone.utc)
-                    self.fireworks.find_one_and_update(
-                        {"fw_id": fw_id_candidate},
-                        {
-                            "$set": {
-                                "state": "FIZZLED",
-                                "updated_on": now,
-                                # store minimal details to aid later debugging/rerun
-                                "spec._exception_details": {
-                                    "_message": "FireWork failed to deserialize",
-                                    "_stacktrace": err_details,
-                                },
-                            }
-                        },
-                    )
-                    # attempt to refresh workflow state to keep DB consistent
-                    self._refresh_wf(fw_id_candidate)
-                except Exception:
-                    # if we can't refresh the workflow, issue a debug log and continue;
-                    # might also help unblock the queue on deserialization issues if reason we can't update offending FW
-                    # is because it's no longer in DB (in which case fine to continue with next FW)
-                    self.m_logger.debug(
-                        f"Error while refreshing workflow after fizzling fw_id={fw_id_candidate} due to deserialization"
-                        f" failure.\n{traceback.format_exc()}",
-                    )
+                self._fizzle_undeserializable_fw(fw_id_candidate)
                 continue
             if self._check_fw_for_uniqueness(m_fw):
                 return m_fw
 
+    def _get_fws_to_run(self, query=None, n=1, scheduler=None):
+        """Check out up to n ready fireworks at once.
+
+        Each firework is claimed atomically (READY -> RESERVED) with a lightweight projection, then
+        all claimed fireworks and their launches are loaded with one query per collection.
+
+        Args:
+            query (dict)
+            n (int): maximum number of fireworks to check out
+            scheduler (SchedulerBase, str or dict): scheduling policy, defaults to SCHEDULER
+
+        Returns:
+            [Firework]: the checked out fireworks, possibly fewer than n
+        """
+        m_fws = []
+        while len(m_fws) < n:
+            n_request = n - len(m_fws)
+            claimed = self._claim_ready_fws(query, n=n_request, scheduler=scheduler, projection={"fw_id": 1})
+            claimed_ids = [m_fw["fw_id"] for m_fw in claimed]
+
+            if not claimed_ids:
+                break
+
+            for fw_dict in self._get_fw_dicts_by_ids(claimed_ids):
+                try:
+                    m_fw = Firework.from_dict(fw_dict)
+                except Exception:
+                    self._fizzle_undeserializable_fw(fw_dict["fw_id"])
+                    continue
+                m_fw._track_changes()
+                if self._check_fw_for_uniqueness(m_fw):
+                    m_fws.append(m_fw)
+
+            if len(claimed_ids) < n_request:
+                # no READY fireworks are left, no need to try again
+                break
+        return m_fws
+
+    def _claim_ready_fws(self, query=None, n=1, scheduler=None, **kwargs):
+        """Atomically move up to n READY fireworks matching the query to RESERVED.
+
+        With a scheduling policy (from the FWorker or the SCHEDULER setting), the policy picks the
+        candidate fireworks, which are then claimed by fw_id. Otherwise, if READY_QUEUE is set and
+        the query only involves the FWorker name and category, the fireworks are taken from the
+        ready_queue collection and claimed by fw_id, and their entries are removed after the claim;
+        entries of fireworks that are no longer READY are dropped on the way. Else the fireworks
+        are claimed in priority order.
+
+        Args:
+            query (dict): the FWorker query
+            n (int): maximum number of fireworks to claim
+            scheduler (SchedulerBase, str or dict): scheduling policy, defaults to SCHEDULER
+            kwargs: passed to find_one_and_update (e.g. projection, return_document)
+
+        Returns:
+            [dict]: the claimed firework documents, possibly fewer than n
+        """
+        m_query = dict(query) if query else {}  # make a defensive copy
+        m_query["state"] = "READY"
+        m_update = {"$set": {"state": "RESERVED", "updated_on": datetime.datetime.now(datetime.timezone.utc)}}
+        claimed = []
+
+        policy = get_scheduler(scheduler or SCHEDULER)
+        if policy is not None:
+            prev_fw_ids = None
+            while len(claimed) < n:
+                fw_ids = policy.get_fw_ids(self, m_query, n=n - len(claimed))
+                if not fw_ids or fw_ids == prev_fw_ids:
+                    break
+                prev_fw_ids = fw_ids
+                for fw_id in fw_ids:
+                    # the candidates may have been claimed by someone else in the meantime
+                    m_fw = self.fireworks.find_one_and_update({"fw_id": fw_id, "state": "READY"}, m_update, **kwargs)
+                    if m_fw:
+                        claimed.append(m_fw)
+            return claimed
+
+        queue_query = _get_ready_queue_query(query or {}) if READY_QUEUE else None
+        queue_sort = [(_READY_QUEUE_FIELDS.get(k, k), v) for k, v in self._get_ready_sort()]
+        while len(claimed) < n:
+            if queue_query is None:
+                m_fw = self.fireworks.find_one_and_update(m_query, m_update, sort=self._get_ready_sort(), **kwargs)
+            else:
+                entry = self.ready_queue.find_one(queue_query, {"fw_id": 1}, sort=queue_sort)
+                if not entry:
+                    break
+                m_fw = self.fireworks.find_one_and_update(
+                    {"fw_id": entry["fw_id"], "state": "READY"}, m_update, **kwargs
+                )
+                # the entry is only removed once the firework is claimed, so that a crash in between
+                # cannot drop a READY firework from the queue. Entries of fireworks that were claimed
+                # by someone else or are no longer READY are removed as well.
+                self.ready_queue.delete_one({"_id": entry["_id"]})
+                if not m_fw:
+                    continue
+            if not m_fw:
+                break
+            claimed.append(m_fw)
+        return claimed
+
+    def sync_ready_queue(self, fw_ids=None) -> None:
+        """Bring the ready_queue collection in line with the fireworks collection, e.g. after
+        enabling READY_QUEUE on an existing database or after modifying fireworks directly.
+
+        Args:
+            fw_ids ([int]): only sync these fireworks; all fireworks if None
+        """
+        if not READY_QUEUE:
+            return
+        m_query = {} if fw_ids is None else {"fw_id": {"$in": list(fw_ids)}}
+        ready_ids = []
+        requests = []
+        projection = {"fw_id": 1, "created_on": 1, **{f: 1 for f in _READY_QUEUE_FIELDS if f.startswith("spec.")}}
+        for fw_dict in self.fireworks.find({**m_query, "state": "READY"}, projection):
+            ready_ids.append(fw_dict["fw_id"])
+            entry = _get_ready_queue_entry(fw_dict["fw_id"], fw_dict.get("spec", {}), fw_dict.get("created_on"))
+            requests.append(ReplaceOne({"fw_id": fw_dict["fw_id"]}, entry, upsert=True))
+        if requests:
+            self.ready_queue.bulk_write(requests)
+        if fw_ids is None:
+            self.ready_queue.delete_many({"fw_id": {"$nin": ready_ids}})
+        else:
+            self.ready_queue.delete_many({"fw_id": {"$in": list(set(fw_ids) - set(ready_ids))}})
+
+    def _update_ready_queue(self, fws) -> None:
+        """Add the READY fireworks to the ready_queue collection and remove all others.
+
+        Args:
+            fws ([Firework]): fireworks that were just written to the database
+        """
+        if not READY_QUEUE:
+            return
+        requests = []
+        for fw in fws:
+            if fw.state == "READY":
+                entry = _get_ready_queue_entry(fw.fw_id, fw.spec, recursive_dict(fw.created_on))
+                requests.append(ReplaceOne({"fw_id": fw.fw_id}, entry, upsert=True))
+            else:
+                requests.append(DeleteOne({"fw_id": fw.fw_id}))
+        if requests:
+            self.ready_queue.bulk_write(requests)
+
+    def _get_ready_sort(self):
+        """Return the sort used to pick the next READY firework."""
+        sortby = [("spec._priority", DESCENDING)]
+
+        if SORT_FWS.upper() == "FIFO":
+            sortby.append(("created_on", ASCENDING))
+        elif SORT_FWS.upper() == "FILO":
+            sortby.append(("created_on", DESCENDING))
+        return sortby
+
+    def _fizzle_undeserializable_fw(self, fw_id) -> None:
+        """Mark a checked out firework that cannot be deserialized (e.g., missing module/class) as FIZZLED
+        so that the caller can continue searching for another runnable firework instead of crashing the loop.
+
+        Args:
+            fw_id (int): firework id
+        """
+        self.m_logger.warning(f"Failed to deserialize FireWork with fw_id={fw_id}; marking as FIZZLED and continuing.")
+        try:
+            err_details = traceback.format_exc()
+            now = datetime.datetime.now(datetime.timezone.utc)
+            self.fireworks.find_one_and_update(
+                {"fw_id": fw_id},
+                {
+                    "$set": {
+                        "state": "FIZZLED",
+                        "updated_on": now,
+                        # store minimal details to aid later debugging/rerun
+                        "spec._exception_details": {
+                            "_message": "FireWork failed to deserialize",
+                            "_stacktrace": err_details,
+                        },
+                    }
+                },
+            )
+            # attempt to refresh workflow state to keep DB consistent
+            self._refresh_wf(fw_id)
+        except Exception:
+            # if we can't refresh the workflow, issue a debug log and continue;
+            # might also help unblock the queue on deserialization issues if reason we can't update offending FW
+            # is because it's no longer in DB (in which case fine to continue with next FW)
+            self.m_logger.debug(
+                f"Error while refreshing workflow after fizzling fw_id={fw_id} due to deserialization"
+                f" failure.\n{traceback.format_exc()}",
+            )
+
+    def _get_fw_dicts_by_ids(self, fw_ids):
+        """Given several firework ids, return the firework dicts with one query per collection.
+
+        Args:
+            fw_ids ([int]): Firework ids.
+
+        Returns:
+            [dict]: firework dicts in the order of fw_ids; missing fireworks are skipped
+        """
+        fw_dicts = {fw_dict["fw_id"]: fw_dict for fw_dict in self.fireworks.find({"fw_id": {"$in": fw_ids}})}
+        launch_ids = set()
+        for fw_dict in fw_dicts.values():
+            launch_ids.update(fw_dict.get("launches", []))
+            launch_ids.update(fw_dict.get("archived_launches", []))
+        launches = {}
+        for launch in self.launches.find({"launch_id": {"$in": list(launch_ids)}}, sort=[("launch_id", ASCENDING)]):
+            launch["action"] = get_action_from_gridfs(launch.get("action"), self.gridfs_fallback)
+            launches[launch["launch_id"]] = launch
+        result = []
+        for fw_id in fw_ids:
+            if fw_id not in fw_dicts:
+                continue
+            fw_dict = fw_dicts[fw_id]
+            for key in ("launches", "archived_launches"):
+                fw_dict[key] = [launches[lid] for lid in sorted(fw_dict.get(key, [])) if lid in launches]
+            result.append(fw_dict)
+        return result
+
     def _get_active_launch_ids(self):
         """Get all the launch ids.
 
@@ -1220,6 +1919,41 @@ class LaunchPad(FWSerializable):
         """
         return self.checkout_fw(fworker, launch_dir, host=host, ip=ip, fw_id=fw_id, state="RESERVED")
 
+    def unreserve_fws(self, fw_launches) -> None:
+        """Hand back reserved fireworks that will not be run, e.g. the unused ones reserved ahead
+        by rapidfire. Unlike cancel_reservation(), the fireworks are not rerun: their reserved
+        launches are removed, so that they leave no archived launches behind.
+
+        The launches are pulled from the fireworks in one bulk write, and each affected workflow is
+        refreshed once.
+
+        Args:
+            fw_launches ([(int, int)]): ids of the fireworks and of their reserved launches
+        """
+        fw_launches = list(fw_launches)
+        if not fw_launches:
+            return
+        self.fireworks.bulk_write(
+            [
+                UpdateOne(
+                    {"fw_id": fw_id, "state": "RESERVED", "launches": launch_id}, {"$pull": {"launches": launch_id}}
+                )
+                for fw_id, launch_id in fw_launches
+            ],
+            ordered=False,
+        )
+        self._refresh_wfs([fw_id for fw_id, _ in fw_launches])
+        launch_ids = [launch_id for _, launch_id in fw_launches]
+        # keep the launches that another firework still refers to
+        kept = {
+            launch_id
+            for fw in self.fireworks.find({"launches": {"$in": launch_ids}}, {"launches": 1})
+            for launch_id in fw["launches"]
+        }
+        self.launches.delete_many(
+            {"launch_id": {"$in": [lid for lid in launch_ids if lid not in kept]}, "state": "RESERVED"}
+        )
+
     def get_fw_ids_from_reservation_id(self, reservation_id):
         """Given the reservation id, return the list of firework ids.
 
@@ -1274,25 +2008,54 @@ class LaunchPad(FWSerializable):
         Returns:
             [int]: list of expired launch ids
         """
-        now_time = datetime.datetime.now(datetime.timezone.utc)
-        cutoff_time_str = (now_time - datetime.timedelta(seconds=expiration_secs)).isoformat()
-        bad_launch_data = self.launches.find(
-            {
-                "state": "RESERVED",
-                "state_history": {"$elemMatch": {"state": "RESERVED", "updated_on": {"$lte": cutoff_time_str}}},
-            },
-            {"launch_id": 1, "fw_id": 1},
+        bad_launch_data = list(
+            self.launches.find(
+                self._get_expired_lease_query("RESERVED", expiration_secs, RESERVATION_EXPIRATION_SECS),
+                {"launch_id": 1, "fw_id": 1},
+            )
         )
-        bad_launch_ids = [
-            ld["launch_id"]
-            for ld in bad_launch_data
-            if self.fireworks.find_one({"fw_id": ld["fw_id"], "state": "RESERVED"}, {"fw_id": 1})
-        ]
+        reserved_fw_ids = {
+            fw["fw_id"]
+            for fw in self.fireworks.find(
+                {"fw_id": {"$in": [ld["fw_id"] for ld in bad_launch_data]}, "state": "RESERVED"}, {"fw_id": 1}
+            )
+        }
+        bad_launch_ids = [ld["launch_id"] for ld in bad_launch_data if ld["fw_id"] in reserved_fw_ids]
         if rerun:
             for lid in bad_launch_ids:
                 self.cancel_reservation(lid)
         return bad_launch_ids
 
+    def _get_expired_lease_query(self, state, expiration_secs, lease_secs):
+        """Return the query for the launches in the given state whose lease expired.
+
+        The lease_expires_at of a launch is its last update plus lease_secs, so a launch that has
+        not been updated for expiration_secs has a lease that expired expiration_secs - lease_secs
+        ago. Launches without a lease (written before leases were introduced, and stored with a null
+        lease if saved since) are matched on their state history.
+
+        Args:
+            state (str): RUNNING or RESERVED
+            expiration_secs (seconds): time since the last update after which a launch is expired
+            lease_secs (seconds): length of the leases of launches in this state
+
+        Returns:
+            dict: query on the launches collection
+        """
+        now_time = datetime.datetime.now(datetime.timezone.utc)
+        lease_cutoff = now_time - datetime.timedelta(seconds=expiration_secs - lease_secs)
+        cutoff_time_str = (now_time - datetime.timedelta(seconds=expiration_secs)).isoformat()
+        return {
+            "state": state,
+            "$or": [
+                {"lease_expires_at": {"$lte": lease_cutoff}},
+                {
+                    "lease_expires_at": None,  # missing or null
+                    "state_history": {"$elemMatch": {"state": state, "updated_on": {"$lte": cutoff_time_str}}},
+                },
+            ],
+        }
+
     def mark_fizzled(self, launch_id) -> None:
         """Mark the launch corresponding to the given id as FIZZLED.
 
@@ -1305,6 +2068,23 @@ class LaunchPad(FWSerializable):
         # Do a confirmed write and make sure state_history is preserved
         self.complete_launch(launch_id, state="FIZZLED")
 
+    def _mark_fizzled_bulk(self, launch_ids) -> None:
+        """Mark several launches as FIZZLED with one bulk write and refresh their fireworks, locking
+        each affected workflow only once.
+
+        Args:
+            launch_ids ([int]): launch ids
+        """
+        m_launches = []
+        # the action is not needed (and may live in GridFS), only the changed fields are written back
+        for launch_dict in self.launches.find({"launch_id": {"$in": launch_ids}}, {"action": 0}):
+            m_launch = Launch.from_dict(launch_dict)
+            m_launch._track_changes()
+            m_launch.state = "FIZZLED"
+            m_launches.append(m_launch)
+        self._upsert_launches(m_launches)
+        self._refresh_wfs(fw["fw_id"] for fw in self.fireworks.find({"launches": {"$in": launch_ids}}, {"fw_id": 1}))
+
     def detect_lostruns(
         self,
         expiration_secs=RUN_EXPIRATION_SECS,
@@ -1340,27 +2120,27 @@ class LaunchPad(FWSerializable):
         lost_launch_ids = []
         lost_fw_ids = []
         potential_lost_fw_ids = []
-        now_time = datetime.datetime.now(datetime.timezone.utc)
-        cutoff_timestr = (now_time - datetime.timedelta(seconds=expiration_secs)).isoformat()
 
-        lostruns_query = launch_query or {}
-        lostruns_query["state"] = "RUNNING"
-        lostruns_query["state_history"] = {"$elemMatch": {"state": "RUNNING", "updated_on": {"$lte": cutoff_timestr}}}
+        lostruns_query = self._get_expired_lease_query("RUNNING", expiration_secs, RUN_EXPIRATION_SECS)
+        if launch_query:
+            lostruns_query = {"$and": [launch_query, lostruns_query]}
 
         if query:
             fw_ids = [x["fw_id"] for x in self.fireworks.find(query, {"fw_id": 1})]
             lostruns_query["fw_id"] = {"$in": fw_ids}
 
-        bad_launch_data = self.launches.find(lostruns_query, {"launch_id": 1, "fw_id": 1})
+        projection = {"launch_id": 1, "fw_id": 1}
+        if max_runtime or min_runtime:
+            projection["state_history"] = 1
+        bad_launch_data = self.launches.find(lostruns_query, projection)
         for ld in bad_launch_data:
             bad_launch = True
             if max_runtime or min_runtime:
                 bad_launch = False
-                m_l = self.get_launch_by_id(ld["launch_id"])
-                utime = m_l._get_time("RUNNING", use_update_time=True)
-                ctime = m_l._get_time("RUNNING", use_update_time=False)
-                if (not max_runtime or (utime - ctime).seconds <= max_runtime) and (
-                    not min_runtime or (utime - ctime).seconds >= min_runtime
+                running = next(d for d in reconstitute_dates(ld["state_history"]) if d["state"] == "RUNNING")
+                runtime = running["updated_on"] - running["created_on"]
+                if (not max_runtime or runtime.seconds <= max_runtime) and (
+                    not min_runtime or runtime.seconds >= min_runtime
                 ):
                     bad_launch = True
             if bad_launch:
@@ -1412,18 +2192,17 @@ class LaunchPad(FWSerializable):
                     else:
                         lost_fw_ids.append(fw_id)  # all Launches not lost are anyway FIZZLED / ARCHIVED
 
-        if fizzle or rerun:
-            for lid in lost_launch_ids:
-                self.mark_fizzled(lid)
+        if (fizzle or rerun) and lost_launch_ids:
+            self._mark_fizzled_bulk(lost_launch_ids)
 
-                # for offline runs, you want to forget about the run
-                # see: https://groups.google.com/forum/#!topic/fireworkflows/oimFmE5tZ4E
-                offline_run = self.offline_runs.count_documents({"launch_id": lid, "deprecated": False}) > 0
-                if offline_run:
-                    self.forget_offline(lid, launch_mode=True)
+            # for offline runs, you want to forget about the run
+            # see: https://groups.google.com/forum/#!topic/fireworkflows/oimFmE5tZ4E
+            self.offline_runs.update_many(
+                {"launch_id": {"$in": lost_launch_ids}, "deprecated": False}, {"$set": {"deprecated": True}}
+            )
 
-                if rerun:
-                    fw_id = self.launches.find_one({"launch_id": lid}, {"fw_id": 1})["fw_id"]
+            if rerun:
+                for fw_id in dict.fromkeys(potential_lost_fw_ids):
                     if fw_id in lost_fw_ids:
                         self.rerun_fw(fw_id)
 
@@ -1470,9 +2249,9 @@ class LaunchPad(FWSerializable):
         """
         m_launch = self.get_launch_by_id(launch_id)
         m_launch.set_reservation_id(reservation_id)
-        self.launches.find_one_and_replace({"launch_id": launch_id}, m_launch.to_db_dict())
+        self._upsert_launches([m_launch])
 
-    def checkout_fw(self, fworker, launch_dir, fw_id=None, host=None, ip=None, state="RUNNING"):
+    def checkout_fw(self, fworker, launch_dir, fw_id=None, host=None, ip=None, state="RUNNING", lean=None):
         """Checkout the next ready firework, mark it with the given state(RESERVED or RUNNING) and
         return it to the caller. The caller is responsible for running the Firework.
 
@@ -1483,48 +2262,32 @@ class LaunchPad(FWSerializable):
             host (str): the host making the request (for creating a Launch object)
             ip (str): the ip making the request (for creating a Launch object)
             state (str): RESERVED or RUNNING, the fetched firework's state will be set to this value.
+            lean (bool): if True, use the claimed document directly and write the new launch with
+                targeted updates instead of full document replacements. Defaults to LEAN_CHECKOUT.
 
         Returns:
             (Firework, int): firework and the new launch id.
         """
-        m_fw = self._get_a_fw_to_run(fworker.query, fw_id=fw_id)
+        if LEAN_CHECKOUT if lean is None else lean:
+            return self._checkout_fw_lean(fworker, launch_dir, fw_id=fw_id, host=host, ip=ip, state=state)
+
+        m_fw = self._get_a_fw_to_run(fworker.query, fw_id=fw_id, scheduler=fworker.scheduler)
         if not m_fw:
             return None, None
 
         # If this Launch was previously reserved, overwrite that reservation with this Launch
         # note that adding a new Launch is problematic from a duplicate run standpoint
-        prev_reservations = [launch for launch in m_fw.launches if launch.state == "RESERVED"]
-        reserved_launch = None if not prev_reservations else prev_reservations[0]
-        state_history = reserved_launch.state_history if reserved_launch else None
+        reserved_launch = self._get_reserved_launch(m_fw)
 
         # get new launch
         launch_id = reserved_launch.launch_id if reserved_launch else self.get_new_launch_id()
-        trackers = [Tracker.from_dict(f) for f in m_fw.spec["_trackers"]] if "_trackers" in m_fw.spec else None
-        m_launch = Launch(
-            state,
-            launch_dir,
-            fworker,
-            host,
-            ip,
-            trackers=trackers,
-            state_history=state_history,
-            launch_id=launch_id,
-            fw_id=m_fw.fw_id,
-        )
+        m_launch = self._get_new_launch(m_fw, fworker, launch_dir, host, ip, state, launch_id, reserved_launch)
 
         # insert the launch
-        self.launches.find_one_and_replace({"launch_id": m_launch.launch_id}, m_launch.to_db_dict(), upsert=True)
+        self._upsert_launches([m_launch])
 
         self.m_logger.debug(f"Created/updated Launch with {launch_id=}")
 
-        # update the firework's launches
-        if not reserved_launch:
-            # we're appending a new Firework
-            m_fw.launches.append(m_launch)
-        else:
-            # we're updating an existing launch
-            m_fw.launches = [m_launch if launch.launch_id == m_launch.launch_id else launch for launch in m_fw.launches]
-
         # insert the firework and refresh the workflow
         m_fw.state = state
         self._upsert_fws([m_fw])
@@ -1549,6 +2312,289 @@ class LaunchPad(FWSerializable):
 
         return m_fw, launch_id
 
+    def _checkout_fw_lean(self, fworker, launch_dir, fw_id=None, host=None, ip=None, state="RUNNING"):
+        """Checkout the next ready firework in a few round trips, see checkout_fw().
+
+        The firework is claimed with find_one_and_update, which also returns the document. The new
+        launch is inserted and attached to the firework with a $push, and only the firework's entry
+        in the workflow's fw_states is updated. Fireworks with existing launches (e.g. a previous
+        reservation) or a _dupefinder need the full Firework and go through the regular checkout.
+
+        Returns:
+            (Firework, int): firework and the new launch id.
+        """
+        while True:
+            if fw_id:
+                fw_dict = self.fireworks.find_one_and_update(
+                    {"fw_id": fw_id, "state": {"$in": ["READY", "RESERVED"]}},
+                    {"$set": {"state": "RESERVED", "updated_on": datetime.datetime.now(datetime.timezone.utc)}},
+                    return_document=ReturnDocument.AFTER,
+                )
+            else:
+                claimed = self._claim_ready_fws(
+                    fworker.query, scheduler=fworker.scheduler, return_document=ReturnDocument.AFTER
+                )
+                fw_dict = claimed[0] if claimed else None
+            if not fw_dict:
+                return None, None
+            if fw_dict.get("launches") or "_dupefinder" in fw_dict["spec"]:
+                return self.checkout_fw(
+                    fworker, launch_dir, fw_id=fw_dict["fw_id"], host=host, ip=ip, state=state, lean=False
+                )
+            # the archived launches are not needed to run the firework, keep only their ids
+            archived_launch_ids = fw_dict.pop("archived_launches", [])
+            try:
+                m_fw = Firework.from_dict(fw_dict)
+            except Exception:
+                self._fizzle_undeserializable_fw(fw_dict["fw_id"])
+                continue
+            break
+
+        launch_id = self.get_new_launch_id()
+        m_launch = self._get_new_launch(m_fw, fworker, launch_dir, host, ip, state, launch_id)
+        self.launches.insert_one(m_launch.to_db_dict())
+        self.m_logger.debug(f"Created Launch with {launch_id=}")
+
+        m_fw.state = state
+        self.fireworks.update_one(
+            {"fw_id": m_fw.fw_id},
+            {"$set": {"state": state, "updated_on": m_fw.updated_on}, "$push": {"launches": launch_id}},
+        )
+        self._refresh_wf_checkout(m_fw.fw_id, state)
+
+        # Store backup copies of the initial data for retrieval in case of failure
+        self.backup_launch_data[launch_id] = m_launch.to_db_dict()
+        self.backup_fw_data[m_fw.fw_id] = m_fw.to_db_dict()
+        self.backup_fw_data[m_fw.fw_id]["archived_launches"] = archived_launch_ids
+
+        self.m_logger.debug(f"{m_fw.state} FW with id: {m_fw.fw_id}")
+
+        return m_fw, launch_id
+
+    def start_reserved_fw(self, m_fw, launch_id, launch_dir):
+        """Mark a firework reserved with reserve_fws() RUNNING, e.g. when its prefetched Rocket starts.
+
+        Unlike checkout_fw(), the firework is not claimed and refreshed again: it is moved from
+        RESERVED to RUNNING with one find_one_and_update if it still holds the reservation, and the
+        reserved launch is set RUNNING in place, which renews its lease.
+
+        Args:
+            m_fw (Firework): the reserved firework, as returned by reserve_fws()
+            launch_id (int): id of its reserved launch
+            launch_dir (str): the dir the FW will be run in
+
+        Returns:
+            (Firework, int): firework and launch id, or (None, None) if the reservation was cancelled
+                or the firework was defused in the meantime.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if not self.fireworks.find_one_and_update(
+            {"fw_id": m_fw.fw_id, "state": "RESERVED", "launches": launch_id},
+            {"$set": {"state": "RUNNING", "updated_on": now}},
+            projection={"_id": 1},
+        ):
+            return None, None
+
+        m_launch = next(launch for launch in m_fw.launches if launch.launch_id == launch_id)
+        m_launch._track_changes()
+        m_launch.launch_dir = launch_dir
+        m_launch.state = "RUNNING"
+        self.launches.update_one({"launch_id": launch_id}, {"$set": m_launch.to_db_updates()})
+        m_fw.state = "RUNNING"
+        m_fw.updated_on = now
+        self._refresh_wf_checkout(m_fw.fw_id, "RUNNING")
+
+        # Store backup copies of the initial data for retrieval in case of failure
+        self.backup_launch_data[launch_id] = m_launch.to_db_dict()
+        self.backup_fw_data[m_fw.fw_id] = m_fw.to_db_dict()
+
+        self.m_logger.debug(f"RUNNING reserved FW with id: {m_fw.fw_id}")
+
+        return m_fw, launch_id
+
+    def _refresh_wf_checkout(self, fw_id, state) -> None:
+        """Update the workflow of a firework that was just checked out without a full refresh.
+
+        A READY firework moving to RESERVED or RUNNING does not change the state of any other
+        firework, so only its fw_states entry and possibly the workflow state need to be set.
+        The workflow state is only ever raised (READY -> RESERVED -> RUNNING) so that concurrent
+        checkouts converge. Falls back to _refresh_wf() if the workflow is locked or has no fw_states
+        in the normal layout.
+
+        Args:
+            fw_id (int): the checked out firework id
+            state (str): RESERVED or RUNNING
+        """
+        self._run_exists_cache.clear()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        query = {"nodes": fw_id, "locked": {"$exists": False}}
+        links_dict = self.workflows.find_one_and_update(
+            {**query, "fw_states": {"$exists": True}, "split": {"$exists": False}},
+            {"$set": {f"fw_states.{fw_id}": state, "updated_on": now}, "$inc": {"rev": 1}},
+            projection={"state": 1},
+        )
+        if not links_dict:
+            # the split layout keeps the states on the fireworks only
+            links_dict = self.workflows.find_one_and_update(
+                {**query, "split": True}, {"$set": {"updated_on": now}, "$inc": {"rev": 1}}, projection={"state": 1}
+            )
+        if not links_dict:
+            self._refresh_wf(fw_id)
+            return
+
+        lower_states = ["READY", "RESERVED"] if state == "RUNNING" else ["READY"]
+        if links_dict.get("state") in lower_states:
+            self.workflows.update_one(
+                {"nodes": fw_id, "state": {"$in": lower_states}, "locked": {"$exists": False}},
+                {"$set": {"state": state}},
+            )
+
+    def checkout_fws(self, fworker, launch_dirs, n=None, host=None, ip=None, state="RUNNING"):
+        """Checkout up to n ready fireworks in one call, mark them with the given state (RESERVED or
+        RUNNING) and return them to the caller. The caller is responsible for running the Fireworks.
+
+        Compared to calling checkout_fw() n times, the fireworks and their launches are read, written
+        and refreshed in bulk, and each affected workflow is locked only once.
+
+        Args:
+            fworker (FWorker): A FWorker instance
+            launch_dirs (str or [str]): the dirs the FWs will be run in, one per Firework. If a single
+                str is given, it is used for all the Fireworks.
+            n (int): maximum number of Fireworks to checkout. Defaults to len(launch_dirs).
+            host (str): the host making the request (for creating the Launch objects)
+            ip (str): the ip making the request (for creating the Launch objects)
+            state (str): RESERVED or RUNNING, the fetched fireworks' state will be set to this value.
+
+        Returns:
+            [(Firework, int)]: list of fireworks and their new launch ids, possibly shorter than n.
+        """
+        if isinstance(launch_dirs, str):
+            n = n or 1
+            launch_dirs = [launch_dirs] * n
+        n = len(launch_dirs) if n is None else min(n, len(launch_dirs))
+        if n < 1:
+            return []
+
+        m_fws = self._get_fws_to_run(fworker.query, n=n, scheduler=fworker.scheduler)
+        if not m_fws:
+            return []
+
+        # If a Launch was previously reserved, overwrite that reservation with the new Launch
+        reserved_launches = [self._get_reserved_launch(m_fw) for m_fw in m_fws]
+        n_new_ids = sum(1 for launch in reserved_launches if launch is None)
+        next_launch_id = self.get_new_launch_id(quantity=n_new_ids) if n_new_ids else None
+
+        m_launches = []
+        for m_fw, reserved_launch, launch_dir in zip(m_fws, reserved_launches, launch_dirs, strict=False):
+            if reserved_launch:
+                launch_id = reserved_launch.launch_id
+            else:
+                launch_id = next_launch_id
+                next_launch_id += 1
+            m_launch = self._get_new_launch(m_fw, fworker, launch_dir, host, ip, state, launch_id, reserved_launch)
+            m_launches.append(m_launch)
+            m_fw.state = state
+
+        self._upsert_launches(m_launches)
+        self._upsert_fws(list(m_fws))
+        self._refresh_wfs([m_fw.fw_id for m_fw in m_fws])
+
+        launch_ids = [m_launch.launch_id for m_launch in m_launches]
+
+        # update any duplicated runs
+        if state == "RUNNING":
+            dup_ids = [
+                fw["fw_id"]
+                for fw in self.fireworks.find(
+                    {"launches": {"$in": launch_ids}, "state": {"$in": ["WAITING", "READY", "RESERVED", "FIZZLED"]}},
+                    {"fw_id": 1},
+                )
+            ]
+            if dup_ids:
+                dup_fws = [Firework.from_dict(fw_dict) for fw_dict in self._get_fw_dicts_by_ids(dup_ids)]
+                for fw in dup_fws:
+                    fw._track_changes()
+                    fw.state = state
+                self._upsert_fws(dup_fws)
+                self._refresh_wfs(dup_ids)
+
+        # Store backup copies of the initial data for retrieval in case of failure
+        for m_fw, m_launch in zip(m_fws, m_launches, strict=True):
+            self.backup_launch_data[m_launch.launch_id] = m_launch.to_db_dict()
+            self.backup_fw_data[m_fw.fw_id] = m_fw.to_db_dict()
+            self.m_logger.debug(f"{m_fw.state} FW with id: {m_fw.fw_id}")
+
+        return list(zip(m_fws, launch_ids, strict=True))
+
+    def reserve_fws(self, fworker, launch_dirs, n=None, host=None, ip=None):
+        """Checkout up to n ready fireworks and mark the launches reserved.
+
+        Args:
+            fworker (FWorker)
+            launch_dirs (str or [str]): paths to the launch directories.
+            n (int): maximum number of Fireworks to reserve.
+            host (str): hostname
+            ip (str): ip address
+
+        Returns:
+            [(Firework, int)]: the checked out fireworks and their new launch ids.
+        """
+        return self.checkout_fws(fworker, launch_dirs, n=n, host=host, ip=ip, state="RESERVED")
+
+    @staticmethod
+    def _get_reserved_launch(m_fw):
+        """Return the RESERVED launch of a firework, if any.
+
+        Args:
+            m_fw (Firework)
+
+        Returns:
+            Launch
+        """
+        prev_reservations = [launch for launch in m_fw.launches if launch.state == "RESERVED"]
+        return None if not prev_reservations else prev_reservations[0]
+
+    @staticmethod
+    def _get_new_launch(m_fw, fworker, launch_dir, host, ip, state, launch_id, reserved_launch=None):
+        """Create the Launch of a checked out firework and attach it to the firework.
+
+        Args:
+            m_fw (Firework)
+            fworker (FWorker)
+            launch_dir (str)
+            host (str)
+            ip (str)
+            state (str): RESERVED or RUNNING
+            launch_id (int)
+            reserved_launch (Launch): a previous reservation that is overwritten by the new Launch
+
+        Returns:
+            Launch
+        """
+        state_history = reserved_launch.state_history if reserved_launch else None
+        trackers = [Tracker.from_dict(f) for f in m_fw.spec["_trackers"]] if "_trackers" in m_fw.spec else None
+        m_launch = Launch(
+            state,
+            launch_dir,
+            fworker,
+            host,
+            ip,
+            trackers=trackers,
+            state_history=state_history,
+            launch_id=launch_id,
+            fw_id=m_fw.fw_id,
+        )
+
+        # update the firework's launches
+        if not reserved_launch:
+            # we're appending a new Firework
+            m_fw.launches.append(m_launch)
+            m_fw._mark_changed("launches")
+        else:
+            # we're updating an existing launch
+            m_fw.launches = [m_launch if launch.launch_id == m_launch.launch_id else launch for launch in m_fw.launches]
+        return m_launch
+
     def change_launch_dir(self, launch_id, launch_dir) -> None:
         """Change the launch directory corresponding to the given launch id.
 
@@ -1558,7 +2604,7 @@ class LaunchPad(FWSerializable):
         """
         m_launch = self.get_launch_by_id(launch_id)
         m_launch.launch_dir = launch_dir
-        self.launches.find_one_and_replace({"launch_id": m_launch.launch_id}, m_launch.to_db_dict(), upsert=True)
+        self._upsert_launches([m_launch])
 
     def restore_backup_data(self, launch_id, fw_id) -> None:
         """For the given launch id and firework id, restore the back up data."""
@@ -1586,9 +2632,69 @@ class LaunchPad(FWSerializable):
         m_launch.state = state
         if action:
             m_launch.action = action
+        self._upsert_completed_launch(m_launch)
+
+        # find all the fws that have this launch
+        for fw in self.fireworks.find({"launches": launch_id}, {"fw_id": 1}):
+            fw_id = fw["fw_id"]
+            self._refresh_wf(fw_id)
+
+        # change return type to dict to make return type serializable to support job packing
+        return m_launch.to_dict()
+
+    def complete_launches(self, completions):
+        """Mark several Launches as completed, e.g. those of the sub jobs of a job packing launch.
+
+        The launches are written with one bulk write, and the FireWorks sharing them are refreshed
+        workflow by workflow, locking, refreshing and writing each affected workflow only once.
+
+        Args:
+            completions ([(int, FWAction, str)]): launch_id, FWAction of what to do next (or None)
+                and state (COMPLETED or FIZZLED) of each launch
+
+        Returns:
+            [dict]: updated launches, in the order of the completions
+
+        Raises:
+            ValueError: in case of an invalid launch_id
+            DocumentTooLarge: in some cases when the document size limit is exceeded
+        """
+        launch_ids = [launch_id for launch_id, _, _ in completions]
+        m_launches = {}
+        for launch_dict in self.launches.find({"launch_id": {"$in": launch_ids}}):
+            launch_dict["action"] = get_action_from_gridfs(launch_dict.get("action"), self.gridfs_fallback)
+            m_launch = Launch.from_dict(launch_dict)
+            m_launch._track_changes()
+            m_launches[m_launch.launch_id] = m_launch
+        for launch_id, action, state in completions:
+            if launch_id not in m_launches:
+                raise ValueError(f"No Launch exists with {launch_id=}")
+            m_launches[launch_id].state = state
+            if action:
+                m_launches[launch_id].action = action
+
+        try:
+            self._upsert_launches(list(m_launches.values()))
+        except DocumentTooLarge:
+            # write the launches one by one, moving too large actions to GridFS
+            for m_launch in m_launches.values():
+                self._upsert_completed_launch(m_launch)
+
+        self._refresh_wfs(fw["fw_id"] for fw in self.fireworks.find({"launches": {"$in": launch_ids}}, {"fw_id": 1}))
+
+        return [m_launches[launch_id].to_dict() for launch_id in launch_ids]
+
+    def _upsert_completed_launch(self, m_launch) -> None:
+        """Write a completed launch, saving its action in GridFS if the launch document is too large.
+
+        Args:
+            m_launch (Launch)
 
+        Raises:
+            DocumentTooLarge: if the action is not the cause or there is no GridFS fallback
+        """
         try:
-            self.launches.find_one_and_replace({"launch_id": m_launch.launch_id}, m_launch.to_db_dict(), upsert=True)
+            self._upsert_launches([m_launch])
         except DocumentTooLarge as err:
             launch_db_dict = m_launch.to_db_dict()
             action_dict = launch_db_dict.get("action", None)
@@ -1604,24 +2710,18 @@ class LaunchPad(FWSerializable):
 
             # encoding required for python2/3 compatibility.
             action_id = self.gridfs_fallback.put(
-                json.dumps(action_dict), encoding="utf-8", metadata={"launch_id": launch_id}
+                json.dumps(recursive_dict(m_launch.action)),
+                encoding="utf-8",
+                metadata={"launch_id": m_launch.launch_id},
             )
             launch_db_dict["action"] = {"gridfs_id": str(action_id)}
             self.m_logger.warning("The size of the launch document was too large. Saving the action in gridfs.")
 
             self.launches.find_one_and_replace({"launch_id": m_launch.launch_id}, launch_db_dict, upsert=True)
 
-        # find all the fws that have this launch
-        for fw in self.fireworks.find({"launches": launch_id}, {"fw_id": 1}):
-            fw_id = fw["fw_id"]
-            self._refresh_wf(fw_id)
-
-        # change return type to dict to make return type serializable to support job packing
-        return m_launch.to_dict()
-
     def ping_launch(self, launch_id, ptime=None, checkpoint=None) -> None:
         """Ping that a Launch is still alive: updates the 'update_on 'field of the state history of a
-        Launch.
+        Launch and extends its lease.
 
         Args:
             launch_id (int)
@@ -1637,6 +2737,7 @@ class LaunchPad(FWSerializable):
                 "$set": {
                     "state_history": m_launch.to_db_dict()["state_history"],
                     "trackers": [t.to_dict() for t in m_launch.trackers],
+                    "lease_expires_at": m_launch.lease_expires_at,
                 }
             },
         )
@@ -1652,23 +2753,56 @@ class LaunchPad(FWSerializable):
             ValueError: if next Firework id cannot be found
         """
         try:
-            return self.fw_id_assigner.find_one_and_update({}, {"$inc": {"next_fw_id": quantity}})["next_fw_id"]
+            return self._get_new_ids("next_fw_id", quantity)
         except Exception:
             raise ValueError(
                 "Could not get next FW id! If you have not yet initialized the database,"
                 " please do so by performing a database reset (e.g., lpad reset)"
             )
 
-    def get_new_launch_id(self):
-        """Checkout the next Launch id."""
+    def get_new_launch_id(self, quantity=1):
+        """Checkout the next Launch id.
+
+        Args:
+            quantity (int): optionally ask for many ids, otherwise defaults to 1
+                            this then returns the *first* launch_id in that range
+        """
         try:
-            return self.fw_id_assigner.find_one_and_update({}, {"$inc": {"next_launch_id": 1}})["next_launch_id"]
+            return self._get_new_ids("next_launch_id", quantity)
         except Exception:
             raise ValueError(
                 "Could not get next launch id! If you have not yet initialized the "
                 "database, please do so by performing a database reset (e.g., lpad reset)"
             )
 
+    def _get_new_ids(self, counter, quantity):
+        """Checkout a range of consecutive ids from the fw_id_assigner.
+
+        If ID_BLOCK_SIZE > 1, a block of ids is reserved from the database at once and handed out
+        locally until it is used up. The block is guarded by a lock, as the LaunchPad of a
+        DataServer is used by several processes through threads, and is not reused in a forked
+        process.
+
+        Args:
+            counter (str): "next_fw_id" or "next_launch_id"
+            quantity (int): number of ids
+
+        Returns:
+            int: the first id of the range
+        """
+        if ID_BLOCK_SIZE <= 1:
+            return self.fw_id_assigner.find_one_and_update({}, {"$inc": {counter: quantity}})[counter]
+
+        with self._id_lock:
+            pid, next_id, end_id = self._id_blocks.get(counter, (None, 0, 0))
+            if pid != os.getpid() or next_id + quantity > end_id:
+                # the rest of the current block is skipped
+                size = max(quantity, ID_BLOCK_SIZE)
+                next_id = self.fw_id_assigner.find_one_and_update({}, {"$inc": {counter: size}})[counter]
+                end_id = next_id + size
+            self._id_blocks[counter] = (os.getpid(), next_id + quantity, end_id)
+            return next_id
+
     def _upsert_fws(self, fws, reassign_all=False):
         """Insert the fireworks to the 'fireworks' collection.
 
@@ -1680,9 +2814,11 @@ class LaunchPad(FWSerializable):
         Returns:
             dict: mapping between old and new Firework ids
         """
+        self._run_exists_cache.clear()
         old_new = {}
         # sort the FWs by id, then the new FW_ids will match the order of the old ones...
         fws.sort(key=lambda x: x.fw_id)
+        queued_fws = fws
 
         if reassign_all:
             used_ids = []
@@ -1698,16 +2834,81 @@ class LaunchPad(FWSerializable):
             self.fireworks.delete_many({"fw_id": {"$in": used_ids}})
             self.fireworks.insert_many(fw.to_db_dict() for fw in fws)
         else:
+            requests = []
+            fw_updates = {}
+            queued_fws = []
             for fw in fws:
                 if fw.fw_id < 0:
                     new_id = self.get_new_fw_id()
                     old_new[fw.fw_id] = new_id
                     fw.fw_id = new_id
 
-                self.fireworks.find_one_and_replace({"fw_id": fw.fw_id}, fw.to_db_dict(), upsert=True)
+                # only send the changed fields of fireworks loaded from the DB
+                updates = fw.to_db_updates()
+                if updates is None:
+                    requests.append(ReplaceOne({"fw_id": fw.fw_id}, fw.to_db_dict(), upsert=True))
+                elif updates:
+                    fw_updates[fw.fw_id] = updates
+                if updates is None or any(f == "state" or f.split(".")[0] == "spec" for f in updates):
+                    queued_fws.append(fw)
+            requests += self._get_fw_update_requests(fw_updates)
+            if requests:
+                self.fireworks.bulk_write(requests)
+            for fw in fws:
+                fw._track_changes()
 
+        self._update_ready_queue(queued_fws)
         return old_new
 
+    @staticmethod
+    def _get_fw_update_requests(fw_updates):
+        """Get the requests writing the changed fields of fireworks. A value written to the same
+        field of several fireworks, e.g. a key of the spec set by an update_spec for all children,
+        is written with one UpdateMany.
+
+        Args:
+            fw_updates (dict): the changed fields of each fw_id
+
+        Returns:
+            [UpdateOne or UpdateMany]
+        """
+        field_fw_ids = defaultdict(list)
+        values = {}
+        for fw_id, updates in fw_updates.items():
+            for field, value in updates.items():
+                # equal encodings are written as equal values
+                key = (field, bson.encode({"v": value}))
+                field_fw_ids[key].append(fw_id)
+                values[key] = value
+        fw_ids_updates = defaultdict(dict)
+        for key, fw_ids in field_fw_ids.items():
+            fw_ids_updates[tuple(fw_ids)][key[0]] = values[key]
+        return [
+            UpdateOne({"fw_id": fw_ids[0]}, {"$set": updates})
+            if len(fw_ids) == 1
+            else UpdateMany({"fw_id": {"$in": list(fw_ids)}}, {"$set": updates})
+            for fw_ids, updates in fw_ids_updates.items()
+        ]
+
+    def _upsert_launches(self, launches) -> None:
+        """Insert or update the launches in the 'launches' collection. Only the changed fields of
+        launches loaded from the DB are sent.
+
+        Args:
+            launches ([Launch]): list of launches
+        """
+        requests = []
+        for launch in launches:
+            updates = launch.to_db_updates()
+            if updates is None:
+                requests.append(ReplaceOne({"launch_id": launch.launch_id}, launch.to_db_dict(), upsert=True))
+            elif updates:
+                requests.append(UpdateOne({"launch_id": launch.launch_id}, {"$set": updates}))
+        if requests:
+            self.launches.bulk_write(requests)
+        for launch in launches:
+            launch._track_changes()
+
     def rerun_fw(self, fw_id, rerun_duplicates=True, recover_launch=None, recover_mode=None):
         """Rerun the firework corresponding to the given id.
 
@@ -1777,11 +2978,8 @@ class LaunchPad(FWSerializable):
         elif m_fw["state"] == "WAITING" and not recover_launch:
             self.m_logger.debug(f"Skipping rerun {fw_id=}: it is already WAITING.")
         else:
-            with WFLock(self, fw_id):
-                wf = self.get_wf_by_fw_id_lzyfw(fw_id)
-                updated_ids = wf.rerun_fw(fw_id)
-                self._update_wf(wf, updated_ids)
-                reruns.append(fw_id)
+            self._modify_wf(fw_id, lambda wf: wf.rerun_fw(fw_id))
+            reruns.append(fw_id)
 
         # rerun duplicated FWs
         for fw in duplicates:
@@ -1826,13 +3024,11 @@ class LaunchPad(FWSerializable):
             RuntimeError: in case of an error when refreshing the workflow
                 different from LockedWorkflowError
         """
+        self._run_exists_cache.clear()
         # TODO: time how long it took to refresh the WF!
         # TODO: need a try-except here, high probability of failure if incorrect action supplied
         try:
-            with WFLock(self, fw_id):
-                wf = self.get_wf_by_fw_id_lzyfw(fw_id)
-                updated_ids = wf.refresh(fw_id)
-                self._update_wf(wf, updated_ids)
+            self._modify_wf(fw_id, lambda wf: wf.refresh(fw_id))
         except LockedWorkflowError:
             self.m_logger.info(f"{fw_id=} locked. Can't refresh!")
         except Exception:
@@ -1840,26 +3036,133 @@ class LaunchPad(FWSerializable):
             # code updates and thus the Firework object can no longer be loaded from db description
             # Action: *manually* mark the fw and workflow as FIZZLED
             self.fireworks.find_one_and_update({"fw_id": fw_id}, {"$set": {"state": "FIZZLED"}})
-            self.workflows.find_one_and_update({"nodes": fw_id}, {"$set": {"state": "FIZZLED"}})
-            self.workflows.find_one_and_update({"nodes": fw_id}, {"$set": {f"fw_states.{fw_id}": "FIZZLED"}})
+            self.workflows.find_one_and_update({"nodes": fw_id}, {"$set": {"state": "FIZZLED"}, "$inc": {"rev": 1}})
+            self.workflows.find_one_and_update(
+                {"nodes": fw_id}, {"$set": {f"fw_states.{fw_id}": "FIZZLED"}, "$inc": {"rev": 1}}
+            )
 
             err_message = f"Error refreshing workflow. The full stack trace is: {traceback.format_exc()}"
             raise RuntimeError(err_message)
 
-    def _update_wf(self, wf, updated_ids) -> None:
+    def _refresh_wfs(self, fw_ids) -> None:
+        """Update the FW states of several fireworks, locking and writing each affected workflow
+        only once.
+
+        Args:
+            fw_ids ([int]): the parent fw_ids - children will be refreshed
+
+        Raises:
+            RuntimeError: in case of an error when refreshing a workflow
+                different from LockedWorkflowError
+        """
+        self._run_exists_cache.clear()
+        fw_ids = list(fw_ids)
+        wf_fw_ids = []
+        for links_dict in self.workflows.find({"nodes": {"$in": fw_ids}}, {"nodes": 1}):
+            nodes = set(links_dict["nodes"])
+            wf_fw_ids.append([fw_id for fw_id in fw_ids if fw_id in nodes])
+
+        def refresh(wf, ids):
+            updated_ids = set()
+            for fw_id in ids:
+                updated_ids = wf.refresh(fw_id, updated_ids)
+            return updated_ids
+
+        for ids in wf_fw_ids:
+            try:
+                self._modify_wf(ids[0], lambda wf, ids=ids: refresh(wf, ids))
+            except LockedWorkflowError:
+                self.m_logger.info(f"fw_ids={ids} locked. Can't refresh!")
+            except Exception:
+                # see _refresh_wf: *manually* mark the fws and workflow as FIZZLED
+                self.fireworks.update_many({"fw_id": {"$in": ids}}, {"$set": {"state": "FIZZLED"}})
+                self.workflows.find_one_and_update(
+                    {"nodes": ids[0]},
+                    {
+                        "$set": {"state": "FIZZLED", **{f"fw_states.{fw_id}": "FIZZLED" for fw_id in ids}},
+                        "$inc": {"rev": 1},
+                    },
+                )
+
+                err_message = f"Error refreshing workflow. The full stack trace is: {traceback.format_exc()}"
+                raise RuntimeError(err_message)
+
+    def _modify_wf(self, fw_id, modify) -> None:
+        """Modify the workflow of a firework and write the changes to the database.
+
+        By default the workflow is locked with a WFLock while it is read, modified and written.
+        With OPTIMISTIC_WF_UPDATES the workflow is read and modified without a lock. The changes are
+        only written, under a short WFLock, if the revision of the workflow did not change in the
+        meantime; otherwise the modification is repeated on a fresh copy of the workflow.
+
+        Args:
+            fw_id (int): id of a firework of the workflow
+            modify (callable): modifies the given Workflow in place and returns the updated fw_ids
+
+        Raises:
+            LockedWorkflowError: if the workflow stayed locked for WFLOCK_EXPIRATION_SECS
+        """
+        if not OPTIMISTIC_WF_UPDATES:
+            with WFLock(self, fw_id) as lock:
+                wf = self.get_wf_by_fw_id_lzyfw(fw_id)
+                self._update_wf(wf, modify(wf), lock)
+            return
+
+        lock = WFLock(self, fw_id)
+        ctr = 0
+        while True:
+            links_dict = self.workflows.find_one({"nodes": fw_id, **WFLock.get_unlocked_query()}, {"nodes": False})
+            if links_dict:
+                wf = self._get_wf_lzyfw(links_dict)
+                updated_ids = modify(wf)
+                # the lock is only acquired if nobody wrote the workflow since it was read
+                if lock.try_acquire({"_id": links_dict["_id"], "rev": links_dict.get("rev")}):
+                    lock.contended = ctr > 0
+                    try:
+                        self._update_wf(wf, updated_ids, lock)
+                    finally:
+                        lock.release()
+                    self.wf_lock_stats["cas_commits"] += 1
+                    return
+                self.wf_lock_stats["cas_conflicts"] += 1
+            elif not self.workflows.find_one({"nodes": fw_id}, {"_id": 1}):
+                raise ValueError(f"Could not find a Workflow with {fw_id=}")
+            else:
+                # another process is writing the workflow, a copy read now may be inconsistent
+                self.wf_lock_stats["lock_waits"] += 1
+                if lock.waiting_time > WFLOCK_EXPIRATION_SECS:
+                    if not WFLOCK_EXPIRATION_KILL:
+                        raise LockedWorkflowError(f"Could not get workflow - LOCKED: {fw_id}")
+                    self.m_logger.warning(f"FORCIBLY RELEASING LOCK, WF: {fw_id}")
+                    self.workflows.update_one({"nodes": fw_id}, {"$unset": {"locked": True, "lock_expires_at": True}})
+                    continue
+            ctr += 1
+            time_incr = _get_backoff_secs(ctr)
+            time.sleep(time_incr)
+            lock.waiting_time += time_incr
+
+    def _update_wf(self, wf, updated_ids, lock=None) -> None:
         """Update the workflow with the updated firework ids.
         Note: must be called within an enclosing WFLock.
 
         Args:
             wf (Workflow)
             updated_ids ([int]): list of firework ids
+            lock (WFLock): the enclosing lock, the workflow is only written while it is held
 
         Raises:
             FWValueError: when the query finds no matching workflow
+            LockedWorkflowError: when the lock expired and was taken over by another process
         """
+        lock_query = {"locked": lock.token} if lock else {}
+        # a lease may have expired during a long modification, check it before writing the fireworks
+        if lock and lock.ttl_secs is not None and not lock.renew():
+            raise LockedWorkflowError(f"WFLock of WF {lock.fw_id} was taken over, not writing the workflow")
         updated_fws = [wf.id_fw[fid] for fid in updated_ids]
         old_new = self._upsert_fws(updated_fws)
         wf._reassign_ids(old_new)
+        if isinstance(wf, LazyWorkflow):
+            self._update_wf_links(wf, list(old_new.values()))
 
         # find a node for which the id did not change, so we can query on it to get WF
         query_node = None
@@ -1869,12 +3172,63 @@ class LaunchPad(FWSerializable):
                 break
 
         assert query_node is not None
-        if not self.workflows.find_one({"nodes": query_node}):
-            raise FWValueError(f"BAD QUERY_NODE! {query_node}")
+        # only write the changed fw_states, and the links only if they changed
+        wf_updates = wf.to_db_updates()
+        if wf_updates is not None:
+            # new revision for optimistic updates, see _modify_wf()
+            update = {"$set": wf_updates, "$inc": {"rev": 1}}
+            if isinstance(wf, LazyWorkflow) and old_new:
+                update["$addToSet"] = {"nodes": {"$each": list(old_new.values())}}
+            result = self.workflows.update_one({"nodes": query_node, **lock_query}, update)
+            if not result.matched_count:
+                self._raise_update_wf_error(query_node, lock)
+            wf._track_changes()
+            return
+
+        lock_fields = ["locked", "lock_expires_at", "lock_stats"]
+        old_wf = self.workflows.find_one({"nodes": query_node, **lock_query}, ["rev", *lock_fields])
+        if not old_wf:
+            self._raise_update_wf_error(query_node, lock)
         # redo the links and fw_states
         wf = wf.to_db_dict()
-        wf["locked"] = True  # preserve the lock!
-        self.workflows.find_one_and_replace({"nodes": query_node}, wf)
+        wf.update({k: old_wf[k] for k in lock_fields if k in old_wf})  # preserve the lock!
+        wf["rev"] = old_wf.get("rev", 0) + 1
+        if not self.workflows.find_one_and_replace({"nodes": query_node, **lock_query}, wf, projection={"_id": 1}):
+            self._raise_update_wf_error(query_node, lock)
+
+    def _raise_update_wf_error(self, query_node, lock):
+        """Raise the error for a workflow write of _update_wf() that matched no document.
+
+        Raises:
+            LockedWorkflowError: if the workflow exists, i.e. the lock was taken over
+            FWValueError: otherwise
+        """
+        if lock and self.workflows.find_one({"nodes": query_node}, {"_id": 1}):
+            raise LockedWorkflowError(f"WFLock of WF {lock.fw_id} was taken over, not writing the workflow")
+        raise FWValueError(f"BAD QUERY_NODE! {query_node}")
+
+    def _update_wf_links(self, wf, new_ids) -> None:
+        """Write the changed links of a LazyWorkflow to the wf_links collection and mark its new
+        fireworks and changed leaves.
+
+        Args:
+            wf (LazyWorkflow)
+            new_ids ([int]): ids of the fireworks added to the workflow
+        """
+        dirty = wf.links._dirty
+        leaf_ids = [fw_id for fw_id in dirty if not wf.links[fw_id]]
+        self._mark_split_fws(wf._wf_id, new_ids, leaf_ids, dirty.difference(leaf_ids))
+        parent_links = wf.links.parent_links
+        requests = [
+            UpdateOne(
+                {"fw_id": fw_id},
+                {"$set": {"wf_id": wf._wf_id, "children": wf.links[fw_id], "parents": parent_links.get(fw_id, [])}},
+                upsert=True,
+            )
+            for fw_id in wf.links._dirty
+        ]
+        if requests:
+            self.wf_links.bulk_write(requests)
 
     def _steal_launches(self, thief_fw):
         """Check if there are duplicates. If there are duplicates, the matching firework's launches
@@ -1921,6 +3275,7 @@ class LaunchPad(FWSerializable):
                     ]
                     for launch in valuable_launches:
                         thief_fw.launches.append(launch)
+                        thief_fw._mark_changed("launches")
                         stolen = True
                         self.m_logger.info(f"Duplicate found! fwids {thief_fw.fw_id} and {potential_match['fw_id']}")
         return stolen
@@ -1933,6 +3288,7 @@ class LaunchPad(FWSerializable):
             priority
         """
         self.fireworks.find_one_and_update({"fw_id": fw_id}, {"$set": {"spec._priority": priority}})
+        self.sync_ready_queue([fw_id])
 
     def get_logdir(self):
         """Return the log directory.
@@ -2149,6 +3505,17 @@ class LazyFirework:
     def to_db_dict(self):
         return self.full_fw.to_db_dict()
 
+    def to_db_updates(self):
+        # nothing can have changed if the FireWork was never loaded
+        return self._fw.to_db_updates() if self._fw is not None else {}
+
+    def _track_changes(self) -> None:
+        if self._fw is not None:
+            self._fw._track_changes()
+
+    def _mark_changed(self, *fields) -> None:
+        self.partial_fw._mark_changed(*fields)
+
     def __str__(self) -> str:
         return f"LazyFireWork object: (id: {self.fw_id})"
 
@@ -2230,15 +3597,18 @@ class LazyFirework:
     def partial_fw(self):
         if not self._fw:
             fields = list(self.db_fields) + list(self.db_launch_fields)
-            data = self._fwc.find_one({"fw_id": self.fw_id}, projection=fields)
-            launch_data = {}  # move some data to separate launch dict
-            for key in self.db_launch_fields:
-                launch_data[key] = data[key]
-                del data[key]
-            self._lids = launch_data
-            self._fw = Firework.from_dict(data)
+            self._set_partial_fw(self._fwc.find_one({"fw_id": self.fw_id}, projection=fields))
         return self._fw
 
+    def _set_partial_fw(self, data) -> None:
+        launch_data = {}  # move some data to separate launch dict
+        for key in self.db_launch_fields:
+            launch_data[key] = data[key]
+            del data[key]
+        self._lids = launch_data
+        self._fw = Firework.from_dict(data)
+        self._fw._track_changes()
+
     @property
     def full_fw(self):
         # map(self._get_launch_data, self.db_launch_fields)
@@ -2260,17 +3630,290 @@ class LazyFirework:
         fw = self.partial_fw  # assure stage 1
         if not self._launches[name]:
             launch_ids = self._lids[name]
-            result = []
-            if launch_ids:
-                data = self._lc.find({"launch_id": {"$in": launch_ids}})
-                for ld in data:
-                    ld["action"] = get_action_from_gridfs(ld.get("action"), self._ffs)
-                    result.append(Launch.from_dict(ld))
-
-            setattr(fw, name, result)  # put into real FireWork obj
-            self._launches[name] = True
+            data = self._lc.find({"launch_id": {"$in": launch_ids}}) if launch_ids else []
+            self._set_launch_data(name, data)
         return getattr(fw, name)
 
+    def _set_launch_data(self, name, data) -> None:
+        result = []
+        for ld in data:
+            ld = dict(ld, action=get_action_from_gridfs(ld.get("action"), self._ffs))
+            result.append(Launch.from_dict(ld))
+        setattr(self._fw, name, result)  # put into real FireWork obj
+        self._fw._changes.discard(name)  # loading the launches does not change them
+        self._launches[name] = True
+
+    @classmethod
+    def prefetch(cls, fws, launches=True) -> None:
+        """Load several LazyFireworks and all their launches with one query per collection, e.g. the
+        FireWorks a refresh is about to access, instead of one query per FireWork and launch field.
+        Objects that are not LazyFireworks are skipped.
+
+        Args:
+            fws ([LazyFirework]): LazyFireworks sharing the same collections
+            launches (bool): whether to load the launches as well
+        """
+        fws = [fw for fw in fws if isinstance(fw, cls)]
+        to_load = {fw.fw_id: fw for fw in fws if fw._fw is None}
+        if to_load:
+            some_fw = next(iter(to_load.values()))
+            fields = list(cls.db_fields) + list(cls.db_launch_fields)
+            for data in some_fw._fwc.find({"fw_id": {"$in": list(to_load)}}, projection=fields):
+                to_load[data["fw_id"]]._set_partial_fw(data)
+
+        if not launches:
+            return
+        pending = [(fw, name) for fw in fws if fw._fw is not None for name in cls.db_launch_fields]
+        pending = [(fw, name) for fw, name in pending if not fw._launches[name]]
+        launch_ids = {launch_id for fw, name in pending for launch_id in fw._lids[name]}
+        # keep the order of the database, as for the launches of a single FireWork
+        data = list(pending[0][0]._lc.find({"launch_id": {"$in": list(launch_ids)}})) if launch_ids else []
+        for fw, name in pending:
+            fw_launch_ids = set(fw._lids[name])
+            fw._set_launch_data(name, [ld for ld in data if ld["launch_id"] in fw_launch_ids])
+
+
+class LazyFireworkWorkflow(Workflow):
+    """A Workflow of LazyFireworks, see LaunchPad.get_wf_by_fw_id_lzyfw(). The FireWorks that are
+    about to be accessed, e.g. the children of a refreshed FireWork, are loaded at once with
+    LazyFirework.prefetch().
+    """
+
+    def _prefetch_fws(self, fw_ids) -> None:
+        LazyFirework.prefetch([self.id_fw[fw_id] for fw_id in fw_ids if fw_id in self.id_fw])
+
+
+class _LazyDict(dict):
+    """A dict whose entries are loaded by load([key]) when a missing key is accessed."""
+
+    def __init__(self, load) -> None:
+        dict.__init__(self)
+        self._load_keys = load
+
+    def __missing__(self, key):
+        self._load_keys([key])
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        self._load_keys([key])
+        return dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        self._load_keys([key])
+        return dict.get(self, key, default)
+
+
+class LazyLinks(_LazyDict, Workflow.Links):
+    """The Links of a LazyWorkflow. The children and parents of a FireWork are loaded from the
+    wf_links collection when they are first accessed. The ids of the FireWorks whose children or
+    parents changed are kept in _dirty until they are written back.
+    """
+
+    def __init__(self, wf_links, get_nodes, prefetch) -> None:
+        """
+        Args:
+            wf_links (pymongo.collection): wf_links collection
+            get_nodes (callable): returns the ids of all FireWorks stored in the workflow
+            prefetch (callable): called with the ids of the loaded FireWorks and their neighbours.
+        """
+        _LazyDict.__init__(self, self._load)
+        self._wf_links, self._get_nodes, self._prefetch = wf_links, get_nodes, prefetch
+        self._parent_links = _LazyDict(self._load)
+        self._loaded = set()
+        self._dirty = set()
+        self._changed = False
+
+    def _load(self, fw_ids, with_children=True) -> None:
+        # new FireWorks have negative ids and no links in the database yet
+        fw_ids = [fw_id for fw_id in fw_ids if fw_id not in self._loaded]
+        if not fw_ids:
+            return
+        self._loaded.update(fw_ids)
+        neighbours = set(fw_ids)
+        children = set()
+        query = {"fw_id": {"$in": [fw_id for fw_id in fw_ids if fw_id >= 0]}}
+        for doc in self._wf_links.find(query, {"_id": 0, "fw_id": 1, "children": 1, "parents": 1}):
+            dict.__setitem__(self, doc["fw_id"], doc["children"])
+            if doc["parents"]:
+                dict.__setitem__(self._parent_links, doc["fw_id"], doc["parents"])
+            neighbours.update(doc["children"], doc["parents"])
+            children.update(doc["children"])
+        self._prefetch(neighbours)
+        # the children are usually refreshed next, load them at once
+        if with_children:
+            self._load(children, with_children=False)
+
+    def _build_parent_links(self) -> None:
+        raise ValueError("The children of a LazyWorkflow must not be modified in place")
+
+    def __setitem__(self, key, value) -> None:
+        self._load([key, *value])
+        self._dirty.update([key, *dict.get(self, key, []), *value])
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key) -> None:
+        self._load([key, *self[key]])
+        self._dirty.update([key, *self[key]])
+        super().__delitem__(key)
+
+    def add_link(self, parent, child) -> None:
+        self._load([parent, child])
+        self._dirty.update((parent, child))
+        super().add_link(parent, child)
+
+    @property
+    def nodes(self):
+        return list(set(self._get_nodes()).union(self))
+
+    def _reassign_ids(self, old_new) -> None:
+        """Reassign the ids of the loaded FireWorks, see Workflow._reassign_ids()."""
+        for links in (self, self._parent_links):
+            items = list(dict.items(links))
+            dict.clear(links)
+            for fw_id, fw_ids in items:
+                dict.__setitem__(links, old_new.get(fw_id, fw_id), [old_new.get(f, f) for f in fw_ids])
+        self._loaded = {old_new.get(f, f) for f in self._loaded}
+        self._dirty = {old_new.get(f, f) for f in self._dirty}
+
+
+class LazyWorkflow(LazyFireworkWorkflow):
+    """A Workflow stored in the split layout (see SPLIT_WF_MIN_FWS): its links are kept in the
+    wf_links collection and the states of its FireWorks only on the fireworks documents, which
+    also carry the _id of the workflow as wf_id and whether they are a leaf as wf_leaf.
+
+    Nothing is loaded up front. The FireWorks, their links and states are loaded when they are
+    first accessed, so that refreshing a FireWork only loads its neighbourhood. Operations that go
+    through all FireWorks, like iterating over the Workflow, load all of them. The state of the
+    Workflow is computed by the database from the stored FireWorks.
+    """
+
+    def __init__(self, lp, links_dict) -> None:
+        """
+        Args:
+            lp (LaunchPad)
+            links_dict (dict): workflows collection document, the nodes are not needed.
+        """
+        # Workflow.__init__() would need all FireWorks and links
+        self._lp = lp
+        self._wf_id = links_dict["_id"]
+        self.name = links_dict["name"]
+        self.metadata = links_dict["metadata"]
+        self.created_on = links_dict["created_on"]
+        self.updated_on = links_dict["updated_on"]
+        self.id_fw = _LazyDict(self._load_fws)
+        self.fw_states = _LazyDict(self._load_states)
+        self.links = LazyLinks(lp.wf_links, self._get_nodes, self._load_states)
+        self._db_fw_states = None
+
+    def _get_nodes(self):
+        return self._lp.workflows.find_one({"_id": self._wf_id}, {"nodes": 1})["nodes"]
+
+    def _load_fws(self, fw_ids) -> None:
+        lp = self._lp
+        for fw_id in fw_ids:
+            if fw_id >= 0 and not dict.__contains__(self.id_fw, fw_id):
+                fw = LazyFirework(fw_id, lp.fireworks, lp.launches, lp.gridfs_fallback)
+                dict.__setitem__(self.id_fw, fw_id, fw)
+
+    def _load_states(self, fw_ids) -> None:
+        fw_ids = [fw_id for fw_id in fw_ids if fw_id >= 0 and not dict.__contains__(self.fw_states, fw_id)]
+        if fw_ids:
+            for doc in self._lp.fireworks.find({"fw_id": {"$in": fw_ids}}, {"_id": 0, "fw_id": 1, "state": 1}):
+                dict.__setitem__(self.fw_states, doc["fw_id"], doc["state"])
+
+    def _load_all(self) -> None:
+        nodes = self.links.nodes
+        self.links._load(nodes)
+        self._load_fws(nodes)
+
+    @property
+    def fws(self):
+        self._load_all()
+        return super().fws
+
+    def __iter__(self):
+        self._load_all()
+        return super().__iter__()
+
+    def __len__(self) -> int:
+        return len(self.links.nodes)
+
+    def __getitem__(self, idx):
+        self._load_all()
+        return super().__getitem__(idx)
+
+    @property
+    def root_fw_ids(self):
+        self._load_all()
+        return super().root_fw_ids
+
+    @property
+    def leaf_fw_ids(self):
+        self._load_all()
+        return super().leaf_fw_ids
+
+    def to_dict(self):
+        self._load_all()
+        return super().to_dict()
+
+    @property
+    def state(self) -> str:
+        """The state of the Workflow as stored in the fireworks collection."""
+        fireworks = self._lp.fireworks
+        pipeline = [{"$match": {"wf_id": self._wf_id}}, {"$group": {"_id": "$state", "n": {"$sum": 1}}}]
+        state_counts = Counter({doc["_id"]: doc["n"] for doc in fireworks.aggregate(pipeline)})
+        fizzled_ids = (doc["fw_id"] for doc in fireworks.find({"wf_id": self._wf_id, "state": "FIZZLED"}, {"fw_id": 1}))
+        return self._get_state(state_counts, self._leaves_completed, fizzled_ids)
+
+    def _leaves_completed(self) -> bool:
+        query = {"wf_id": self._wf_id, "wf_leaf": True, "state": {"$ne": "COMPLETED"}}
+        return self._lp.fireworks.find_one(query, {"_id": 1}) is None
+
+    def _get_topological_ranks(self):
+        # only the loaded part of the graph is ranked, which holds the FireWorks being refreshed and
+        # their children. Workflow.refresh() ranks again when it reaches a FireWork loaded later.
+        links = dict(dict.items(self.links))
+        n_parents = Counter(child_id for children in links.values() for child_id in children)
+        ranks = {}
+        front = [fw_id for fw_id in set(links).union(n_parents) if not n_parents[fw_id]]
+        rank = 0
+        while front:
+            next_front = []
+            for fw_id in front:
+                ranks[fw_id] = rank
+                for child_id in links.get(fw_id, []):
+                    n_parents[child_id] -= 1
+                    if n_parents[child_id] == 0:
+                        next_front.append(child_id)
+            front = next_front
+            rank += 1
+        return ranks
+
+    def _reassign_ids(self, old_new) -> None:
+        for fw_dict in (self.id_fw, self.fw_states):
+            items = list(dict.items(fw_dict))
+            dict.clear(fw_dict)
+            for fw_id, value in items:
+                dict.__setitem__(fw_dict, old_new.get(fw_id, fw_id), value)
+        self.links._reassign_ids(old_new)
+
+    def _track_changes(self) -> None:
+        self.links._dirty.clear()
+        self.links._changed = False
+
+    def to_db_dict(self):
+        """Return the Workflow document in the usual layout, with all links and FireWork states,
+        e.g. for to_display_dict(). A LazyWorkflow itself is written by LaunchPad._update_wf().
+        """
+        self._load_all()
+        self._load_states(self.links.nodes)
+        return super().to_db_dict()
+
+    def to_db_updates(self):
+        return {"state": self.state, "updated_on": self.updated_on}
+
 
 def get_action_from_gridfs(action_dict, fallback_fs):
     """Helper function to obtain the correct dictionary of the FWAction associated
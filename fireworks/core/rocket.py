@@ -7,7 +7,6 @@ from __future__ import annotations
 import datetime
 import errno
 import glob
-import json
 import logging
 import multiprocessing
 import os
@@ -32,6 +31,7 @@ from fireworks.fw_config import (
     FWData,
 )
 from fireworks.utilities.dict_mods import apply_mod
+from fireworks.utilities.fw_serializers import json_dumps, json_loads
 from fireworks.utilities.fw_utilities import get_fw_logger
 
 if TYPE_CHECKING:
@@ -72,6 +72,15 @@ def start_ping_launch(launchpad: LaunchPad, launch_id: int) -> Event | None:
     return ping_stop
 
 
+def complete_launch(launchpad: LaunchPad, launch_id: int, action: FWAction, state: str) -> None:
+    fd = FWData()
+    if fd.MULTIPROCESSING and fd.DATASERVER is not None:
+        # the completions of the sub jobs are written together, see CompletionBatcher
+        fd.DATASERVER.Completions().complete_launch(launch_id, action, state)
+    else:
+        launchpad.complete_launch(launch_id, action, state)
+
+
 def stop_backgrounds(ping_stop, btask_stops) -> None:
     fd = FWData()
     if fd.MULTIPROCESSING:
@@ -105,17 +114,23 @@ def start_background_task(btask, spec):
 class Rocket:
     """The Rocket fetches a workflow step from the FireWorks database and executes it."""
 
-    def __init__(self, launchpad: LaunchPad, fworker: FWorker, fw_id: int) -> None:
+    def __init__(
+        self, launchpad: LaunchPad, fworker: FWorker, fw_id: int, prefetched: tuple[Firework, int] | None = None
+    ) -> None:
         """
         Args:
             launchpad (LaunchPad): A LaunchPad object for interacting with the FW database.
                 If none, reads FireWorks from FW.json and writes to FWAction.json
             fworker (FWorker): A FWorker object describing the computing resource
             fw_id (int): id of a specific Firework to run (quit if it cannot be found).
+            prefetched ((Firework, int)): a Firework and launch id already reserved in the current
+                directory (e.g. by LaunchPad.reserve_fws). If set, the Rocket runs this Firework, if it
+                is still reserved, instead of the next job.
         """
         self.launchpad = launchpad
         self.fworker = fworker
         self.fw_id = fw_id
+        self.prefetched = prefetched
 
     def run(self, pdb_on_exception: bool = False, err_file: IO = None) -> bool:
         """Run the rocket (check out a job from the database and execute it).
@@ -140,7 +155,10 @@ class Rocket:
         l_logger = get_fw_logger("rocket.launcher", l_dir=logdir, stream_level=ROCKET_STREAM_LOGLEVEL)
 
         # check a FW job out of the launchpad
-        if lp:
+        if lp and self.prefetched:
+            # the reservation may have been cancelled or the FW defused in the meantime
+            m_fw, launch_id = lp.start_reserved_fw(*self.prefetched, launch_dir)
+        elif lp:
             m_fw, launch_id = lp.checkout_fw(self.fworker, launch_dir, self.fw_id)
         else:  # offline mode
             m_fw = Firework.from_file(os.path.join(os.getcwd(), "FW.json"))
@@ -148,10 +166,10 @@ class Rocket:
             # set the run start time
             fpath = zpath("FW_offline.json")
             with zopen(fpath) as f_in:
-                d = json.loads(f_in.read())
+                d = json_loads(f_in.read())
                 d["started_on"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
                 with zopen(fpath, "wt") as f_out:
-                    f_out.write(json.dumps(d, ensure_ascii=False))
+                    f_out.write(json_dumps(d, ensure_ascii=False))
 
             launch_id = None  # we don't need this in offline mode...
 
@@ -297,16 +315,16 @@ class Rocket:
 
                     if lp:
                         final_state = "FIZZLED"
-                        lp.complete_launch(launch_id, m_action, final_state)
+                        complete_launch(lp, launch_id, m_action, final_state)
                     else:
                         fpath = zpath("FW_offline.json")
                         with zopen(fpath) as f_in:
-                            d = json.loads(f_in.read())
+                            d = json_loads(f_in.read())
                             d["fwaction"] = m_action.to_dict()
                             d["state"] = "FIZZLED"
                             d["completed_on"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
                             with zopen(fpath, "wt") as f_out:
-                                f_out.write(json.dumps(d, ensure_ascii=False))
+                                f_out.write(json_dumps(d, ensure_ascii=False))
 
                     return True
 
@@ -359,16 +377,16 @@ class Rocket:
 
             if lp:
                 final_state = "COMPLETED"
-                lp.complete_launch(launch_id, m_action, final_state)
+                complete_launch(lp, launch_id, m_action, final_state)
             else:
                 fpath = zpath("FW_offline.json")
                 with zopen(fpath) as f_in:
-                    d = json.loads(f_in.read())
+                    d = json_loads(f_in.read())
                     d["fwaction"] = m_action.to_dict()
                     d["state"] = "COMPLETED"
                     d["completed_on"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
                     with zopen(fpath, "wt") as f_out:
-                        f_out.write(json.dumps(d, ensure_ascii=False))
+                        f_out.write(json_dumps(d, ensure_ascii=False))
 
             return True
 
@@ -407,7 +425,7 @@ class Rocket:
 
             if lp:
                 try:
-                    lp.complete_launch(launch_id, m_action, "FIZZLED")
+                    complete_launch(lp, launch_id, m_action, "FIZZLED")
                 except LockedWorkflowError as e:
                     l_logger.log(logging.DEBUG, traceback.format_exc())
                     l_logger.log(
@@ -419,12 +437,12 @@ class Rocket:
             else:
                 fpath = zpath("FW_offline.json")
                 with zopen(fpath) as f_in:
-                    d = json.loads(f_in.read())
+                    d = json_loads(f_in.read())
                     d["fwaction"] = m_action.to_dict()
                     d["state"] = "FIZZLED"
                     d["completed_on"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
                     with zopen(fpath, "wt") as f_out:
-                        f_out.write(json.dumps(d, ensure_ascii=False))
+                        f_out.write(json_dumps(d, ensure_ascii=False))
 
             return True
 
@@ -443,10 +461,10 @@ class Rocket:
         else:
             fpath = zpath(os.path.join(launch_dir, "FW_offline.json"))
             with zopen(fpath) as f_in:
-                d = json.loads(f_in.read())
+                d = json_loads(f_in.read())
                 d["checkpoint"] = checkpoint
                 with zopen(fpath, "wt") as f_out:
-                    f_out.write(json.dumps(d, ensure_ascii=False))
+                    f_out.write(json_dumps(d, ensure_ascii=False))
 
     def decorate_fwaction(
         self, fwaction: FWAction, my_spec: dict[str, any], m_fw: Firework, launch_dir: str
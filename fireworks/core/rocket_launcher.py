@@ -32,7 +32,15 @@ def get_fworker(fworker):
     return my_fwkr
 
 
-def launch_rocket(launchpad, fworker=None, fw_id=None, strm_lvl=STREAM_LOGLEVEL, pdb_on_exception=False, err_file=None):
+def launch_rocket(
+    launchpad,
+    fworker=None,
+    fw_id=None,
+    strm_lvl=STREAM_LOGLEVEL,
+    pdb_on_exception=False,
+    err_file=None,
+    prefetched=None,
+):
     """Run a single rocket in the current directory.
 
     Args:
@@ -42,6 +50,8 @@ def launch_rocket(launchpad, fworker=None, fw_id=None, strm_lvl=STREAM_LOGLEVEL,
         strm_lvl (str): level at which to output logs to stdout
         pdb_on_exception (bool): if True, Python will start the debugger on a firework exception
         err_file (file object): file to which stderr is redirected; None for no redirect
+        prefetched ((Firework, int)): if set, a Firework and launch id already reserved in the
+            current directory to run instead of the next one
 
     Returns:
         bool
@@ -51,7 +61,7 @@ def launch_rocket(launchpad, fworker=None, fw_id=None, strm_lvl=STREAM_LOGLEVEL,
     l_logger = get_fw_logger("rocket.launcher", l_dir=l_dir, stream_level=strm_lvl)
 
     log_multi(l_logger, "Launching Rocket")
-    rocket = Rocket(launchpad, fworker, fw_id)
+    rocket = Rocket(launchpad, fworker, fw_id, prefetched=prefetched)
     rocket_ran = rocket.run(pdb_on_exception=pdb_on_exception, err_file=err_file)
     log_multi(l_logger, "Rocket finished")
     return rocket_ran
@@ -68,6 +78,7 @@ def rapidfire(
     timeout: int | None = None,
     local_redirect: bool = False,
     pdb_on_exception: bool = False,
+    prefetch: int = 1,
 ) -> None:
     """Keeps running Rockets in m_dir until we reach an error. Automatically creates subdirectories
     for each Rocket. Usually stops when we run out of FireWorks from the LaunchPad.
@@ -83,6 +94,9 @@ def rapidfire(
         timeout (int): of seconds after which to stop the rapidfire process
         local_redirect (bool): redirect standard output and standard error to local files
         pdb_on_exception (bool): if True, python will start the debugger on a firework exception
+        prefetch (int): number of FireWorks to reserve from the LaunchPad in one call. The local
+            batch is drained before going back to the database, each FW is only marked RUNNING when
+            its Rocket starts. 1 checks out one FW per Rocket.
     """
     sleep_time = sleep_time or RAPIDFIRE_SLEEP_SECS
     curdir = m_dir or os.getcwd()
@@ -98,41 +112,86 @@ def rapidfire(
         # has the rapidfire run timed out?
         return timeout is None or (datetime.now() - start_time).total_seconds() < timeout
 
-    while num_loops != max_loops and time_ok():
-        skip_check = False  # this is used to speed operation
-        while (skip_check or launchpad.run_exists(fworker)) and time_ok():
-            os.chdir(curdir)
-            launcher_dir = create_datestamp_dir(curdir, l_logger, prefix="launcher_")
-            os.chdir(launcher_dir)
-            if local_redirect:
-                with redirect_local() as err_file:
+    prefetched = []  # local batch of (launcher_dir, (Firework, launch_id)) already reserved
+    try:
+        while num_loops != max_loops and time_ok():
+            skip_check = False  # this is used to speed operation
+            while (skip_check or prefetched or launchpad.run_exists(fworker)) and time_ok():
+                os.chdir(curdir)
+                if prefetch > 1 and not prefetched:
+                    n_batch = prefetch if nlaunches <= 0 else min(prefetch, nlaunches - num_launched)
+                    prefetched = _prefetch_rockets(launchpad, fworker, curdir, n_batch, l_logger)
+                if prefetched:
+                    launcher_dir, fw_launch = prefetched.pop(0)
+                else:
+                    launcher_dir, fw_launch = create_datestamp_dir(curdir, l_logger, prefix="launcher_"), None
+                os.chdir(launcher_dir)
+                if local_redirect:
+                    with redirect_local() as err_file:
+                        rocket_ran = launch_rocket(
+                            launchpad,
+                            fworker,
+                            strm_lvl=strm_lvl,
+                            pdb_on_exception=pdb_on_exception,
+                            err_file=err_file[1],
+                            prefetched=fw_launch,
+                        )
+                else:
                     rocket_ran = launch_rocket(
-                        launchpad, fworker, strm_lvl=strm_lvl, pdb_on_exception=pdb_on_exception, err_file=err_file[1]
+                        launchpad, fworker, strm_lvl=strm_lvl, pdb_on_exception=pdb_on_exception, prefetched=fw_launch
                     )
-            else:
-                rocket_ran = launch_rocket(launchpad, fworker, strm_lvl=strm_lvl, pdb_on_exception=pdb_on_exception)
 
-            if rocket_ran:
-                num_launched += 1
-            elif not os.listdir(launcher_dir):
-                # remove the empty shell of a directory
-                os.chdir(curdir)
-                os.rmdir(launcher_dir)
-            if nlaunches > 0 and num_launched == nlaunches:
-                break
-            if launchpad.run_exists(fworker):
-                skip_check = True  # don't wait, pull the next FW right away
-            else:
-                # add a small amount of buffer breathing time for DB to refresh in case we have a dynamic WF
-                time.sleep(0.15)
-                skip_check = False
-        if nlaunches == 0:
-            if not launchpad.future_run_exists(fworker):
+                if rocket_ran:
+                    num_launched += 1
+                elif not os.listdir(launcher_dir):
+                    # remove the empty shell of a directory
+                    os.chdir(curdir)
+                    os.rmdir(launcher_dir)
+                if nlaunches > 0 and num_launched == nlaunches:
+                    break
+                if prefetched or launchpad.run_exists(fworker):
+                    skip_check = True  # don't wait, pull the next FW right away
+                else:
+                    # add a small amount of buffer breathing time for DB to refresh in case we have a dynamic WF
+                    time.sleep(0.15)
+                    skip_check = False
+            if nlaunches == 0:
+                if not launchpad.future_run_exists(fworker):
+                    break
+            elif num_launched == nlaunches:
                 break
-        elif num_launched == nlaunches:
-            break
-        log_multi(l_logger, f"Sleeping for {sleep_time} secs")
-        time.sleep(sleep_time)
-        num_loops += 1
-        log_multi(l_logger, "Checking for FWs to run...")
-    os.chdir(curdir)
+            log_multi(l_logger, f"Sleeping for {sleep_time} secs")
+            time.sleep(sleep_time)
+            num_loops += 1
+            log_multi(l_logger, "Checking for FWs to run...")
+    finally:
+        # give back any FireWorks that were reserved but never run, e.g. after a timeout
+        os.chdir(curdir)
+        for launcher_dir, (m_fw, _) in prefetched:
+            log_multi(l_logger, f"Returning unused prefetched fw_id: {m_fw.fw_id}")
+            if not os.listdir(launcher_dir):
+                os.rmdir(launcher_dir)
+        if prefetched:
+            launchpad.unreserve_fws([(m_fw.fw_id, launch_id) for _, (m_fw, launch_id) in prefetched])
+
+
+def _prefetch_rockets(launchpad, fworker, curdir, n, l_logger):
+    """Reserve a batch of FireWorks, each in its own new launcher directory. They are marked RUNNING
+    by their Rocket.
+
+    Args:
+        launchpad (LaunchPad)
+        fworker (FWorker)
+        curdir (str): the directory in which to create the launcher directories
+        n (int): maximum number of FireWorks to reserve
+        l_logger (logger)
+
+    Returns:
+        [(str, (Firework, int))]: launcher directories with their reserved Firework and launch id
+    """
+    launcher_dirs = [create_datestamp_dir(curdir, l_logger, prefix="launcher_") for _ in range(n)]
+    fw_launches = launchpad.reserve_fws(fworker, launcher_dirs, n=n)
+    # remove the directories that did not get a FireWork
+    for launcher_dir in launcher_dirs[len(fw_launches) :]:
+        os.rmdir(launcher_dir)
+    return list(zip(launcher_dirs, fw_launches, strict=False))
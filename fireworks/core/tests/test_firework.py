@@ -8,7 +8,10 @@ __date__ = "2/26/14"
 
 import datetime
 import pickle
+import random
 import unittest
+from collections import Counter
+from unittest.mock import patch
 
 import pytest
 
@@ -156,6 +159,49 @@ class WorkflowTest(unittest.TestCase):
         wflow.remove_fws(wflow.root_fw_ids)
         assert sorted(wflow.root_fw_ids) == sorted(children)
 
+    def test_links_parents(self) -> None:
+        def parent_links(links):
+            child_parents = {}
+            for parent, children in links.items():
+                for child in children:
+                    child_parents.setdefault(child, []).append(parent)
+            return child_parents
+
+        links = Workflow.Links({0: [1, 2], 1: [3], 2: [3], 3: []})
+        links[4] = [3]
+        links.add_link(0, 4)
+        links[2] = []
+        links[1] += [2]
+        del links[4]
+        links.update({5: [1]})
+        assert links.parent_links == parent_links(links)
+        assert sorted(links.nodes) == [0, 1, 2, 3, 4, 5]
+        assert pickle.loads(pickle.dumps(links)).parent_links == links.parent_links
+
+    def test_refresh_benchmark(self) -> None:
+        """Benchmark: refresh a wide (fan-out) and a deep (chain) workflow of 5000 fws. Without
+        maintained parent links each refresh of a child went through all links.
+        """
+        n = 5000
+        for links, n_refreshed, n_ranks in (({0: list(range(1, n))}, n, 1), ({i: [i + 1] for i in range(n - 1)}, 2, 0)):
+            fws = [Firework(Task1(), fw_id=i) for i in range(n)]
+            wf = Workflow(fws, links)
+            fws[0].launches = [Launch("COMPLETED", "/tmp", host="localhost", ip="127.0.0.1", action=FWAction())]
+            with (
+                patch.object(Workflow, "_refresh_fw", autospec=True, side_effect=Workflow._refresh_fw) as refresh_fw,
+                patch.object(
+                    Workflow, "_get_topological_ranks", autospec=True, side_effect=Workflow._get_topological_ranks
+                ) as get_ranks,
+                patch.object(Workflow.Links, "_build_parent_links", autospec=True) as build_parent_links,
+            ):
+                updated_ids = wf.refresh(0)
+            assert updated_ids == {0, *links[0]}
+            assert {wf.fw_states[i] for i in links[0]} == {"READY"}
+            # each affected fw is refreshed once, and its parents are looked up without going through the links
+            assert refresh_fw.call_count == n_refreshed
+            assert get_ranks.call_count == n_ranks
+            build_parent_links.assert_not_called()
+
     def test_iter_len_index(self) -> None:
         fws = [self.fw1, self.fw2, self.fw3]
         wflow = Workflow(fws)
@@ -167,6 +213,120 @@ class WorkflowTest(unittest.TestCase):
         assert wflow[0] == self.fw1
 
 
+def _recursive_refresh(wf, fw_id, updated_ids=None):
+    """The former recursive implementation of Workflow.refresh, for comparison."""
+    updated_ids = updated_ids or set()
+    fw = wf.id_fw[fw_id]
+    prev_state = fw.state
+    if fw.state in ["DEFUSED", "ARCHIVED", "PAUSED"]:
+        wf.fw_states[fw_id] = fw.state
+        return updated_ids
+    completed_parent_states = ["COMPLETED"]
+    if fw.spec.get("_allow_fizzled_parents"):
+        completed_parent_states.append("FIZZLED")
+    for parent in wf.links.parent_links.get(fw_id, []):
+        if wf.fw_states[parent] not in completed_parent_states:
+            m_state = "WAITING"
+            break
+    else:
+        m_launch = wf._get_representative_launch(fw)
+        m_state = m_launch.state if m_launch else "READY"
+        m_action = m_launch.action if (m_launch and m_launch.state == "COMPLETED") else None
+        if fw.spec.get("_allow_fizzled_parents") and "_fizzled_parents" not in fw.spec:
+            parent_fws = [
+                wf.id_fw[p].to_dict() for p in wf.links.parent_links.get(fw_id, []) if wf.id_fw[p].state == "FIZZLED"
+            ]
+            if len(parent_fws) > 0:
+                fw.spec["_fizzled_parents"] = parent_fws
+                updated_ids.add(fw_id)
+    fw.state = m_state
+    wf.fw_states[fw_id] = m_state
+    if m_state != prev_state:
+        updated_ids.add(fw_id)
+        if m_state == "COMPLETED":
+            updated_ids = updated_ids.union(wf.apply_action(m_action, fw.fw_id))
+        if m_state in ["COMPLETED", "FIZZLED"]:
+            for child_id in wf.links[fw_id]:
+                updated_ids = updated_ids.union(_recursive_refresh(wf, child_id, updated_ids))
+    return updated_ids
+
+
+def _recursive_rerun_fw(wf, fw_id, updated_ids=None):
+    """The former recursive implementation of Workflow.rerun_fw, for comparison."""
+    updated_ids = updated_ids or set()
+    wf.id_fw[fw_id]._rerun()
+    updated_ids.add(fw_id)
+    updated_ids.union(_recursive_refresh(wf, fw_id, updated_ids))
+    for child_id in wf.links[fw_id]:
+        if wf.id_fw[child_id].state != "WAITING":
+            updated_ids = updated_ids.union(_recursive_rerun_fw(wf, child_id, updated_ids))
+    return updated_ids
+
+
+def _get_random_wf(seed):
+    """A random DAG of FireWorks with random launches."""
+    rng = random.Random(seed)
+    n = rng.randint(1, 12)
+    ids = rng.sample(range(n), n)  # ids that are not in topological order
+    links = {ids[i]: [ids[j] for j in range(i + 1, n) if rng.random() < 0.3] for i in range(n)}
+    fws = []
+    for i in ids:
+        spec = {"_allow_fizzled_parents": True} if rng.random() < 0.2 else {}
+        fw = Firework(Task1(), spec=spec, fw_id=i)
+        state = rng.choice([None, "COMPLETED", "COMPLETED", "FIZZLED", "RUNNING", "RESERVED"])
+        if state:
+            action = FWAction(update_spec={f"from_{i}": True}, propagate=rng.random() < 0.3)
+            fw.launches = [Launch(state, "/tmp", host="localhost", ip="127.0.0.1", action=action)]
+        fws.append(fw)
+    return Workflow(fws, links), rng
+
+
+class TestIterativeRefresh:
+    """Property-based comparison of the iterative refresh and rerun_fw with the former recursive ones."""
+
+    @staticmethod
+    def _get_state(wf):
+        return [
+            (
+                fw_id,
+                fw.state,
+                wf.fw_states[fw_id],
+                {k: v for k, v in fw.spec.items() if k != "_fizzled_parents"},
+                [p["fw_id"] for p in fw.spec.get("_fizzled_parents", [])],
+            )
+            for fw_id, fw in sorted(wf.id_fw.items())
+        ]
+
+    def test_random_dags(self) -> None:
+        for seed in range(300):
+            wf, rng = _get_random_wf(seed)
+            old_wf, _ = _get_random_wf(seed)
+            visits = Counter()
+            refresh_fw = wf._refresh_fw
+            wf._refresh_fw = lambda fw_id, updated_ids: visits.update([fw_id]) or refresh_fw(fw_id, updated_ids)
+            # start with a root, so that some refreshes go down the whole DAG
+            for fw_id in [min(wf.root_fw_ids), *(rng.randrange(len(wf)) for _ in range(5))]:
+                if rng.random() < 0.2:
+                    assert wf.rerun_fw(fw_id) == _recursive_rerun_fw(old_wf, fw_id), seed
+                else:
+                    visits.clear()
+                    assert wf.refresh(fw_id) == _recursive_refresh(old_wf, fw_id), seed
+                    assert max(visits.values()) == 1, seed  # each fw is refreshed once
+                assert self._get_state(wf) == self._get_state(old_wf), seed
+
+    def test_long_chain(self) -> None:
+        n = 5000
+        fws = [Firework(Task1(), fw_id=i) for i in range(n)]
+        for fw in fws:
+            fw.launches = [Launch("COMPLETED", "/tmp", host="localhost", ip="127.0.0.1", action=FWAction())]
+        wf = Workflow(fws, {i: [i + 1] for i in range(n - 1)})
+        assert wf.refresh(0) == set(range(n))
+        assert set(wf.fw_states.values()) == {"COMPLETED"}
+        assert wf.rerun_fw(0) == set(range(n))
+        assert wf.fw_states[0] == "READY"
+        assert set(wf.fw_states.values()) == {"READY", "WAITING"}
+
+
 UTC = datetime.timezone.utc
 
 
@@ -199,3 +359,61 @@ class TestLaunchRuntimeSecs:
             state_history=[{"state": "RUNNING", "created_on": datetime.datetime.now(UTC)}],
         )
         assert launch.runtime_secs is None
+
+
+class TestChangeTracking:
+    """Tests for the database change tracking of Firework and Launch."""
+
+    def test_firework_changes(self) -> None:
+        fw = Firework(PyTask(func="print", args=["hello"]), spec={"a": 1}, fw_id=1)
+        assert fw.to_db_updates() is None  # not tracked
+        fw._track_changes()
+        assert fw.to_db_updates() == {}
+
+        fw.state = "READY"
+        updates = fw.to_db_updates()
+        assert set(updates) == {"state", "updated_on"}
+        assert updates["state"] == "READY"
+
+        fw._track_changes()
+        fw.spec["b"] = 2  # in-place changes need to be marked
+        assert fw.to_db_updates() == {}
+        fw._mark_changed("spec")
+        assert fw.to_db_updates()["spec"] == fw.to_db_dict()["spec"]
+
+        fw._track_changes()
+        fw.launches.append(Launch("RUNNING", "/test", launch_id=3))
+        fw._mark_changed("launches")
+        assert fw.to_db_updates() == {"launches": [3]}
+
+    def test_update_spec_changes(self) -> None:
+        parent = Firework(PyTask(func="print", args=["hello"]), fw_id=1)
+        child = Firework(PyTask(func="print", args=["hello"]), spec={"a": {"b": 0}}, parents=parent, fw_id=2)
+        wf = Workflow([parent, child])
+        child._track_changes()
+        # update_spec keys are literal keys, not "->" paths
+        wf.apply_action(FWAction(update_spec={"a->b": 1, "c": 2}), 1)
+        updates = child.to_db_updates()
+        assert updates["spec"]["a->b"] == 1
+        assert updates["spec"]["a"] == {"b": 0}
+
+        child._track_changes()
+        wf.apply_action(FWAction(update_spec={"c": 3}), 1)
+        assert child.to_db_updates() == {"spec.c": 3}
+
+    def test_launch_changes(self) -> None:
+        launch = Launch("RUNNING", "/test", launch_id=3, fw_id=1)
+        launch._track_changes()
+        launch.launch_dir = "/other"
+        assert launch.to_db_updates() == {"launch_dir": "/other"}
+
+        launch._track_changes()
+        launch.state = "COMPLETED"
+        updates = launch.to_db_updates()
+        db_dict = launch.to_db_dict()
+        assert set(updates) == {"state", "state_history", "time_start", "time_end", "runtime_secs", "lease_expires_at"}
+        assert all(updates[key] == db_dict[key] for key in updates)
+
+        launch._track_changes()
+        launch.touch_history()
+        assert "state_history" in launch.to_db_updates()
@@ -12,7 +12,11 @@ import re
 import shutil
 import time
 import unittest
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from multiprocessing import Process
+from unittest.mock import ANY, patch
 
 import pytest
 from monty.os import cd
@@ -20,7 +24,8 @@ from pymongo import __version__ as pymongo_version
 from pymongo.errors import OperationFailure
 
 import fireworks.fw_config
-from fireworks import Firework, FWorker, LaunchPad, Workflow
+from fireworks import Firework, FWAction, FWorker, LaunchPad, Workflow
+from fireworks.core.launchpad import LockedWorkflowError, WFLock
 from fireworks.core.rocket_launcher import launch_rocket, rapidfire
 from fireworks.core.tests.tasks import (
     DetoursTask,
@@ -30,7 +35,10 @@ from fireworks.core.tests.tasks import (
     WaitWFLockTask,
 )
 from fireworks.queue.queue_launcher import setup_offline_job
+from fireworks.user_objects.dupefinders.dupefinder_exact import DupeFinderExact
 from fireworks.user_objects.firetasks.script_task import PyTask, ScriptTask
+from fireworks.user_objects.schedulers.scheduler_policies import _get_fw_wfs
+from fireworks.utilities.fw_utilities import CompletionBatcher
 
 TEST_DB_NAME = "fireworks_unittest"
 MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -48,6 +56,59 @@ def _run_rapidfire(lpad, fworker) -> None:
     rapidfire(lpad, fworker)
 
 
+class _CountingCollection:
+    """Wraps a collection and counts the calls that make a round trip to the database."""
+
+    QUERY_METHODS = (
+        "aggregate",
+        "bulk_write",
+        "count_documents",
+        "delete_many",
+        "delete_one",
+        "distinct",
+        "find",
+        "find_one",
+        "find_one_and_delete",
+        "find_one_and_replace",
+        "find_one_and_update",
+        "insert_many",
+        "insert_one",
+        "replace_one",
+        "update_many",
+        "update_one",
+    )
+
+    def __init__(self, collection, counter) -> None:
+        self._collection = collection
+        self._counter = counter
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name not in self.QUERY_METHODS:
+            return attr
+
+        def counted(*args, **kwargs):
+            self._counter[self._collection.name] += 1
+            return attr(*args, **kwargs)
+
+        return counted
+
+
+@contextmanager
+def _count_queries(lp):
+    """Count the queries made by a LaunchPad, per collection."""
+    counter = Counter()
+    names = ("fireworks", "launches", "workflows", "wf_links", "fw_id_assigner")
+    originals = {name: getattr(lp, name) for name in names}
+    for name, collection in originals.items():
+        setattr(lp, name, _CountingCollection(collection, counter))
+    try:
+        yield counter
+    finally:
+        for name, collection in originals.items():
+            setattr(lp, name, collection)
+
+
 def _is_mongomock() -> bool:
     """Check if mongomock is being used instead of real MongoDB."""
     try:
@@ -213,6 +274,659 @@ class LaunchPadTest(unittest.TestCase):
         num_wfs_in_db = len(self.lp.get_wf_ids({"name": "lorem wf"}))
         assert num_wfs_in_db == len(wfs)
 
+    def test_add_wfs_chunked(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+
+        def get_wfs():
+            for i in range(10):
+                yield Workflow([Firework(ftask, name="lorem"), Firework(ftask, name="lorem")], name=f"wf {i}")
+
+        insert_wf_chunk = self.lp._insert_wf_chunk
+        calls = []
+
+        def fail_second_chunk(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                self.lp.workflows.insert_many(args[1])
+                raise RuntimeError("connection lost")
+            insert_wf_chunk(*args)
+
+        with patch.object(self.lp, "_insert_wf_chunk", fail_second_chunk), pytest.raises(RuntimeError):
+            self.lp.bulk_add_wfs(get_wfs(), chunk_size=3)
+        # the failed chunk was removed again
+        assert sorted(self.lp.workflows.distinct("name")) == ["wf 0", "wf 1", "wf 2"]
+        assert len(self.lp.get_fw_ids()) == 6
+
+        self.lp.bulk_add_wfs(get_wfs(), chunk_size=3, start_chunk=1)
+        assert sorted(self.lp.workflows.distinct("name")) == [f"wf {i}" for i in range(10)]
+        fw_ids = self.lp.get_fw_ids()
+        assert len(fw_ids) == len(set(fw_ids)) == 20
+        assert len(self.lp.get_fw_ids({"state": "READY"})) == 20
+
+    def test_compressed_values(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        fw_p = Firework(ftask, spec={"big": list(range(1000)), "small": 1}, name="parent")
+        fw_c = Firework(ftask, name="child", parents=fw_p)
+        with (
+            patch("fireworks.core.firework.DB_COMPRESSION_THRESHOLD", 1000),
+            patch("fireworks.core.firework.DB_COMPRESSED_KEYS", ["big", "more", "out"]),
+        ):
+            self.lp.add_wf(Workflow([fw_p, fw_c]))
+            fw, launch_id = self.lp.checkout_fw(self.fworker, ".")
+            action = FWAction(stored_data={"out": "x" * 5000}, update_spec={"more": list(range(1000))})
+            self.lp.complete_launch(launch_id, action)
+
+        parent_id, child_id = fw.fw_id, self.lp.get_fw_ids({"name": "child"})[0]
+        spec = self.lp.fireworks.find_one({"fw_id": parent_id})["spec"]
+        assert list(spec["big"]) == ["_zlib_bson"]
+        assert spec["small"] == 1
+        assert "_zlib_bson" in self.lp.fireworks.find_one({"fw_id": child_id})["spec"]["more"]
+        assert "_zlib_bson" in self.lp.launches.find_one({"launch_id": launch_id})["action"]["stored_data"]["out"]
+
+        assert self.lp.get_fw_by_id(parent_id).spec["big"] == list(range(1000))
+        assert self.lp.get_fw_dict_by_id(parent_id)["spec"]["big"] == list(range(1000))
+        assert self.lp.get_fw_by_id(child_id).spec["more"] == list(range(1000))
+        assert self.lp.get_launch_by_id(launch_id).action.stored_data["out"] == "x" * 5000
+
+    def test_compressed_values_query_update(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        spec = {"big": {str(i): i for i in range(300)}, "other": {"x": list(range(1000))}}
+        with patch("fireworks.core.firework.DB_COMPRESSION_THRESHOLD", 1000):
+            # nothing is compressed unless its key is listed
+            plain_id = next(iter(self.lp.add_wf(Firework(ftask, spec=spec)).values()))
+            with patch("fireworks.core.firework.DB_COMPRESSED_KEYS", ["big"]):
+                fw_id = next(iter(self.lp.add_wf(Firework(ftask, spec=spec)).values()))
+        assert self.lp.get_fw_ids(query={"spec.big.1": 1}) == [plain_id]
+        assert list(self.lp.fireworks.find_one({"fw_id": fw_id})["spec"]["big"]) == ["_zlib_bson"]
+        # the other keys of the spec can still be queried
+        assert sorted(self.lp.get_fw_ids(query={"spec.other.x": 5})) == [plain_id, fw_id]
+
+        # a compressed value updated in parts is decompressed first
+        self.lp.update_spec([fw_id], {"$set": {"spec.big.new": -1}, "$unset": {"spec.big.0": ""}}, mongo=True)
+        self.lp.update_spec([fw_id], {"big.1": -2})
+        expected = {str(i): i for i in range(2, 300)} | {"1": -2, "new": -1}
+        assert self.lp.fireworks.find_one({"fw_id": fw_id})["spec"]["big"] == expected
+        assert self.lp.get_fw_by_id(fw_id).spec["big"] == expected
+
+    def test_compressed_values_dupefinder(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        spec = {"big": list(range(1000)), "_dupefinder": DupeFinderExact()}
+        with (
+            patch("fireworks.core.firework.DB_COMPRESSION_THRESHOLD", 1000),
+            patch("fireworks.core.firework.DB_COMPRESSED_KEYS", ["big"]),
+        ):
+            self.lp.add_wf(Firework(ftask, spec=spec, name="first"))
+            _, launch_id = self.lp.checkout_fw(self.fworker, ".")
+            self.lp.complete_launch(launch_id, FWAction())
+            self.lp.add_wf(Firework(ftask, spec=spec, name="second"))
+            assert self.lp.checkout_fw(self.fworker, ".") == (None, None)
+
+        second_id = self.lp.get_fw_ids({"name": "second"})[0]
+        assert self.lp.fireworks.find_one({"fw_id": second_id})["spec"]["big"] == list(range(1000))
+        assert self.lp.get_fw_by_id(second_id).state == "COMPLETED"
+
+    def test_checkout_fws(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        fw_p = Firework(ftask, name="parent")
+        fw_c = Firework(ftask, name="child", parents=fw_p)
+        self.lp.add_wf(Workflow([fw_p, fw_c]))
+        for _ in range(3):
+            self.lp.add_wf(Firework(ftask, name="single"))
+
+        fw_launches = self.lp.checkout_fws(self.fworker, ["dir_a", "dir_b"])
+        assert len(fw_launches) == 2
+        assert len({fw.fw_id for fw, _ in fw_launches}) == 2
+        assert len({launch_id for _, launch_id in fw_launches}) == 2
+        for (fw, launch_id), launch_dir in zip(fw_launches, ["dir_a", "dir_b"], strict=True):
+            assert fw.state == "RUNNING"
+            assert self.lp.get_fw_dict_by_id(fw.fw_id)["state"] == "RUNNING"
+            launch = self.lp.get_launch_by_id(launch_id)
+            assert launch.launch_dir == launch_dir
+            assert launch.fw_id == fw.fw_id
+
+        # only the 2 remaining READY fws can be reserved, the child is still WAITING
+        fw_launches = self.lp.reserve_fws(self.fworker, "dir_c", n=5)
+        assert len(fw_launches) == 2
+        assert all(self.lp.get_fw_dict_by_id(fw.fw_id)["state"] == "RESERVED" for fw, _ in fw_launches)
+        assert self.lp.checkout_fws(self.fworker, ["dir_d"]) == []
+
+        # completing the parent makes the child READY in the same workflow
+        parent_id = self.lp.get_fw_ids({"name": "parent"})[0]
+        launch_id = self.lp.get_fw_dict_by_id(parent_id)["launches"][0]["launch_id"]
+        self.lp.complete_launch(launch_id, FWAction())
+        (fw, _), *others = self.lp.checkout_fws(self.fworker, ["dir_e", "dir_f"])
+        assert fw.name == "child"
+        assert not others
+
+    def test_checkout_fw_lean(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        fw_p = Firework(ftask, name="parent")
+        fw_c = Firework(ftask, name="child", parents=fw_p)
+        self.lp.add_wf(Workflow([fw_p, fw_c]))
+        fw_s = Firework(ftask, name="single")
+        self.lp.add_wf(fw_s)
+
+        fw, launch_id = self.lp.checkout_fw(self.fworker, "dir_a", fw_id=fw_s.fw_id, state="RESERVED", lean=True)
+        assert fw.state == "RESERVED"
+        assert self.lp.get_fw_dict_by_id(fw.fw_id)["state"] == "RESERVED"
+        assert self.lp.get_launch_by_id(launch_id).state == "RESERVED"
+        assert self.lp.workflows.find_one({"nodes": fw.fw_id})["state"] == "RESERVED"
+
+        # a previous reservation is overwritten by the regular checkout
+        fw, launch_id_2 = self.lp.checkout_fw(self.fworker, "dir_b", fw_id=fw_s.fw_id, lean=True)
+        assert launch_id_2 == launch_id
+        assert self.lp.get_fw_dict_by_id(fw.fw_id)["state"] == "RUNNING"
+        assert self.lp.workflows.find_one({"nodes": fw.fw_id})["state"] == "RUNNING"
+
+        fw, launch_id = self.lp.checkout_fw(self.fworker, "dir_c", lean=True)
+        assert fw.fw_id == fw_p.fw_id
+        fw_dict = self.lp.get_fw_dict_by_id(fw.fw_id)
+        assert fw_dict["state"] == "RUNNING"
+        assert [launch["launch_id"] for launch in fw_dict["launches"]] == [launch_id]
+        assert fw_dict["launches"][0]["launch_dir"] == "dir_c"
+        wf = self.lp.get_wf_by_fw_id(fw.fw_id)
+        assert wf.state == "RUNNING"
+        assert wf.fw_states == {fw_p.fw_id: "RUNNING", fw_c.fw_id: "WAITING"}
+        assert self.lp.workflows.find_one({"nodes": fw.fw_id})["state"] == "RUNNING"
+        assert self.lp.checkout_fw(self.fworker, "dir_d", lean=True) == (None, None)
+
+        # completing the launch works as after a regular checkout
+        self.lp.complete_launch(launch_id, FWAction())
+        assert self.lp.get_fw_dict_by_id(fw_c.fw_id)["state"] == "READY"
+
+    def test_checkout_fw_query_count(self) -> None:
+        """Micro-benchmark: count the queries of one checkout in a workflow of two fws."""
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        n_queries = {}
+        for lean in (False, True):
+            self.lp.reset(password=None, require_password=False)
+            self.lp.add_wf(Workflow([Firework(ftask, name="fw_1"), Firework(ftask, name="fw_2")]))
+            with _count_queries(self.lp) as counter:
+                fw, _ = self.lp.checkout_fw(self.fworker, "dir_a", lean=lean)
+            assert fw is not None
+            n_queries[lean] = sum(counter.values())
+        # claim, new launch id, insert launch, push launch, update fw_states and workflow state
+        assert n_queries[True] <= 6
+        assert n_queries[True] < n_queries[False] / 2
+
+    def test_id_blocks(self) -> None:
+        with patch("fireworks.core.launchpad.ID_BLOCK_SIZE", 10):
+            first_id = self.lp.get_new_launch_id()
+            assert self.lp.get_new_launch_id() == first_id + 1
+            # a whole block was reserved in the DB
+            assert self.lp.fw_id_assigner.find_one()["next_launch_id"] == first_id + 10
+            # a range that does not fit in the rest of the block gets a new block
+            assert self.lp.get_new_launch_id(quantity=15) == first_id + 10
+            assert self.lp.fw_id_assigner.find_one()["next_launch_id"] == first_id + 25
+
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                ids = list(executor.map(lambda _: self.lp.get_new_fw_id(), range(200)))
+            assert len(set(ids)) == 200
+
+            self.lp.reset(password=None, require_password=False)
+            assert self.lp.get_new_fw_id() == 1
+
+    def test_ready_queue(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        with patch("fireworks.core.launchpad.READY_QUEUE", True):
+            fw_p = Firework(ftask, name="parent", spec={"_category": "cat"})
+            fw_c = Firework(ftask, name="child", parents=fw_p, spec={"_priority": 2})
+            self.lp.add_wf(Workflow([fw_p, fw_c]))
+            fws = [Firework(ftask, name=f"single_{idx}", spec={"_priority": p}) for idx, p in enumerate((1, 0, 1))]
+            self.lp.bulk_add_wfs(fws)
+            entry = self.lp.ready_queue.find_one({"fw_id": fw_p.fw_id}, {"_id": 0})
+            assert entry == {"fw_id": fw_p.fw_id, "created_on": entry["created_on"], "category": "cat"}
+            assert self.lp.ready_queue.count_documents({}) == 4
+
+            # the fworker query is applied to the queue
+            fw, _ = self.lp.checkout_fw(FWorker(category="cat"), "dir_a")
+            assert fw.fw_id == fw_p.fw_id
+            assert self.lp.ready_queue.count_documents({}) == 3
+            self.lp.complete_launch(fw.launches[0].launch_id, FWAction())
+            assert self.lp.ready_queue.find_one({"fw_id": fw_c.fw_id})["priority"] == 2
+
+            self.lp.set_priority(fws[2].fw_id, 3)
+            assert self.lp.ready_queue.find_one({"fw_id": fws[2].fw_id})["priority"] == 3
+            fw, _ = self.lp.checkout_fw(self.fworker, "dir_b", lean=True)
+            assert fw.fw_id == fws[2].fw_id
+
+            # stale entries are skipped
+            self.lp.pause_fw(fw_c.fw_id)
+            fw, _ = self.lp.checkout_fw(self.fworker, "dir_b")
+            assert fw.fw_id == fws[0].fw_id
+            assert self.lp.ready_queue.find_one({"fw_id": fw_c.fw_id}) is None
+
+            # a custom query falls back to the fireworks collection
+            self.lp.ready_queue.delete_many({})
+            fw, _ = self.lp.checkout_fw(FWorker(query={"name": "single_1"}), "dir_c")
+            assert fw.fw_id == fws[1].fw_id
+            assert self.lp.checkout_fw(self.fworker, "dir_d") == (None, None)
+
+            self.lp.resume_fw(fw_c.fw_id)
+            self.lp.ready_queue.delete_many({})
+            self.lp.sync_ready_queue()
+            assert [entry["fw_id"] for entry in self.lp.ready_queue.find()] == [fw_c.fw_id]
+            assert [fw.fw_id for fw in self.lp._get_fws_to_run(self.fworker.query, n=2)] == [fw_c.fw_id]
+
+            # a crash while claiming keeps the firework in the queue
+            fw_id = next(iter(self.lp.add_wf(Firework(ftask, name="crash")).values()))
+            with (
+                patch.object(self.lp.fireworks, "find_one_and_update", side_effect=RuntimeError("crash")),
+                pytest.raises(RuntimeError),
+            ):
+                self.lp.checkout_fw(self.fworker, "dir_e")
+            assert [entry["fw_id"] for entry in self.lp.ready_queue.find()] == [fw_id]
+            fw, _ = self.lp.checkout_fw(self.fworker, "dir_e")
+            assert fw.fw_id == fw_id
+            assert self.lp.ready_queue.count_documents({}) == 0
+
+    def test_schedulers(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        big_wf = Workflow(
+            [Firework(ftask, name="big", spec={"_priority": 1}) for _ in range(4)], metadata={"user": "a"}
+        )
+        self.lp.add_wf(big_wf)
+        small_wfs = [Workflow([Firework(ftask, name="small")], metadata={"user": "b"}) for _ in range(2)]
+        for wf in small_wfs:
+            self.lp.add_wf(wf)
+
+        def checkout_names(fworker, n):
+            return [self.lp.checkout_fw(fworker, "dir")[0].name for _ in range(n)]
+
+        # by priority, the big workflow starves the small ones
+        assert checkout_names(self.fworker, 2) == ["big", "big"]
+        for fw_id in big_wf.id_fw:
+            self.lp.rerun_fw(fw_id)
+
+        # round robin visits the small workflows in between
+        fworker = FWorker(scheduler="RoundRobinScheduler")
+        assert checkout_names(fworker, 3).count("big") == 1
+        for fw_id in self.lp.get_fw_ids():
+            self.lp.rerun_fw(fw_id)
+        # only the fields needed for the grouping are read from the workflows
+        fw_id = big_wf.fws[0].fw_id
+        assert _get_fw_wfs(self.lp, [fw_id], {"group": "$_id"}) == {fw_id: {"_id": ANY, "group": ANY}}
+        # only the first READY FireWorks in priority order are grouped
+        fworker = FWorker(scheduler={"_fw_name": "RoundRobinScheduler", "n_candidates": 1})
+        assert checkout_names(fworker, 2) == ["big", "big"]
+
+        for fw_id in self.lp.get_fw_ids():
+            self.lp.rerun_fw(fw_id)
+        # user "a" gets twice the share of user "b"
+        scheduler = {"_fw_name": "FairShareScheduler", "weights": {"a": 2}}
+        fworker = FWorker.from_dict(FWorker(scheduler=scheduler).to_dict())
+        assert sorted(checkout_names(fworker, 3)) == ["big", "big", "small"]
+
+        for fw_id in self.lp.get_fw_ids():
+            self.lp.rerun_fw(fw_id)
+        self.lp.update_spec([small_wfs[1].fws[0].fw_id], {"_expected_runtime": 10})
+        self.lp.update_spec([big_wf.fws[0].fw_id], {"_expected_runtime": 100})
+        fws = self.lp._get_fws_to_run(self.fworker.query, n=3, scheduler="ShortestRuntimeScheduler")
+        # the higher priority still comes first
+        assert fws[0].fw_id == big_wf.fws[0].fw_id
+        assert {fw.name for fw in fws} == {"big"}
+        fw, _ = self.lp.checkout_fw(FWorker(scheduler="ShortestRuntimeScheduler", query={"name": "small"}), "dir")
+        assert fw.fw_id == small_wfs[1].fws[0].fw_id
+
+    def test_lease_expires_at(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        for _ in range(3):
+            self.lp.add_wf(Firework(ftask))
+        (fw_1, launch_1), (fw_2, launch_2) = self.lp.checkout_fws(self.fworker, ["dir_a", "dir_b"])
+        _, launch_3 = self.lp.reserve_fw(self.fworker, "dir_c")
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        lease = self.lp.launches.find_one({"launch_id": launch_1})["lease_expires_at"]
+        assert abs(lease - now - datetime.timedelta(seconds=fireworks.fw_config.RUN_EXPIRATION_SECS)).seconds < 60
+        assert self.lp.detect_lostruns() == ([], [], [])
+
+        # the lease is renewed by pings
+        long_ago = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=30)
+        self.lp.ping_launch(launch_1, ptime=long_ago)
+        self.lp.ping_launch(launch_2, ptime=long_ago)
+        self.lp.ping_launch(launch_2)
+        # launches without a lease (legacy launches re-saved with a null one) are matched on their state history
+        self.lp.launches.update_one({"launch_id": launch_3}, {"$set": {"lease_expires_at": None}})
+        self.lp.launches.update_one(
+            {"launch_id": launch_3}, {"$set": {"state_history.0.updated_on": long_ago.isoformat()}}
+        )
+        assert self.lp.detect_lostruns(launch_query={"host": {"$exists": True}}) == ([launch_1], [fw_1.fw_id], [])
+        assert self.lp.detect_unreserved() == [launch_3]
+
+        lost_launch_ids, lost_fw_ids, _ = self.lp.detect_lostruns(rerun=True)
+        assert (lost_launch_ids, lost_fw_ids) == ([launch_1], [fw_1.fw_id])
+        launch = self.lp.launches.find_one({"launch_id": launch_1})
+        assert launch["state"] == "FIZZLED"
+        assert launch["lease_expires_at"] is None
+        assert self.lp.get_fw_dict_by_id(fw_1.fw_id)["state"] == "READY"
+        assert self.lp.detect_lostruns(expiration_secs=0) == ([launch_2], [fw_2.fw_id], [])
+
+    def test_update_wf_delta(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        fw_p = Firework(ftask, name="parent")
+        fw_c = Firework(ftask, name="child", parents=fw_p)
+        self.lp.add_wf(Workflow([fw_p, fw_c]))
+        fw, launch_id = self.lp.checkout_fw(self.fworker, "dir_a")
+        child_id = self.lp.get_fw_ids({"name": "child"})[0]
+
+        def get_wf_updates(func, *args):
+            with (
+                patch.object(self.lp.workflows, "update_one", wraps=self.lp.workflows.update_one) as update_one,
+                patch.object(self.lp.workflows, "find_one_and_replace") as replace,
+            ):
+                func(*args)
+            replace.assert_not_called()
+            return [c.args[1]["$set"] for c in update_one.call_args_list if "fw_states" in str(c.args[1])]
+
+        # a completion only sets the changed fw_states, the state and updated_on
+        (updates,) = get_wf_updates(self.lp.complete_launch, launch_id, FWAction())
+        assert set(updates) == {"state", "updated_on", f"fw_states.{fw.fw_id}", f"fw_states.{child_id}"}
+        wf = self.lp.workflows.find_one({"nodes": fw.fw_id})
+        assert wf["fw_states"] == {str(fw.fw_id): "COMPLETED", str(child_id): "READY"}
+        assert wf["state"] == "RUNNING"
+
+        # the links are written when the graph changes
+        (updates,) = get_wf_updates(self.lp.append_wf, Workflow([Firework(ftask)]), [child_id])
+        assert {"links", "parent_links", "nodes", "fw_states"} <= set(updates)
+        expected = self.lp.get_wf_by_fw_id(fw.fw_id).to_db_dict()
+        wf = self.lp.workflows.find_one({"nodes": fw.fw_id})
+        for key in ("links", "parent_links", "fw_states", "state"):
+            assert wf[key] == expected[key]
+        assert sorted(wf["nodes"]) == sorted(expected["nodes"])
+
+    def test_update_spec_fan_out(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        fw_p = Firework(ftask, name="parent")
+        fws_c = [Firework(ftask, name="child", parents=fw_p, spec={"tags": []}) for _ in range(19)]
+        fws_c.append(Firework(ftask, name="child", parents=fw_p, spec={"tags": ["other"]}))
+        self.lp.add_wf(Workflow([fw_p, *fws_c]))
+        _, launch_id = self.lp.checkout_fw(self.fworker, "dir_a", fw_id=fw_p.fw_id)
+
+        action = FWAction(update_spec={"x": {"y": 1}}, mod_spec=[{"_push": {"tags": "new"}}])
+        with patch.object(self.lp.fireworks, "bulk_write", wraps=self.lp.fireworks.bulk_write) as bulk_write:
+            self.lp.complete_launch(launch_id, action)
+        requests = [r for c in bulk_write.call_args_list for r in c.args[0]]
+        updates = [r._doc["$set"] for r in requests]
+        # the same values are written to all children at once, the divergent spec on its own
+        fw_ids = [fw.fw_id for fw in fws_c]
+        many_fw_ids = [set(r._filter["fw_id"]["$in"]) for r in requests if isinstance(r._filter["fw_id"], dict)]
+        assert set(fw_ids) in many_fw_ids
+        assert set(fw_ids[:-1]) in many_fw_ids
+        assert {"fw_id": fw_ids[-1]} in [r._filter for r in requests]
+        assert not any("spec" in u for u in updates)
+        assert sum(len(u) for u in updates if "spec.x" in u or "spec.tags" in u) <= 6
+        for fw in fws_c:
+            spec = self.lp.get_fw_by_id(fw.fw_id).spec
+            assert spec["x"] == {"y": 1}
+            assert spec["tags"] == (["other", "new"] if fw is fws_c[-1] else ["new"])
+            assert spec["_tasks"] == [ftask.to_dict()]
+
+        # keys that are removed again are written with the whole spec
+        fw = self.lp.get_fw_by_id(fw_ids[0])
+        fw._mark_changed("spec.removed")
+        assert set(fw.to_db_updates()) == {"spec"}
+
+    def test_split_wf_refresh_order(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        fws = [Firework(ftask, name=name) for name in ("root", "mid", "leaf")]
+        root, mid, leaf = (fw.fw_id for fw in fws)
+        with patch("fireworks.core.launchpad.SPLIT_WF_MIN_FWS", 2):
+            self.lp.add_wf(Workflow(fws, links_dict={root: [leaf, mid], mid: [leaf]}))
+        root_id, mid_id, leaf_id = (self.lp.get_fw_ids({"name": name})[0] for name in ("root", "mid", "leaf"))
+
+        refreshed = []
+        refresh_fw = Workflow._refresh_fw
+
+        def count_refresh(wf, fw_id, updated_ids):
+            refreshed.append(fw_id)
+            return refresh_fw(wf, fw_id, updated_ids)
+
+        _, launch_id = self.lp.checkout_fw(self.fworker, "dir_a", fw_id=root_id)
+        with patch.object(Workflow, "_refresh_fw", count_refresh):
+            self.lp.complete_launch(launch_id, FWAction())
+        # the leaf is refreshed after its other parent, and only once
+        assert refreshed == [root_id, mid_id, leaf_id]
+
+        display = self.lp.get_wf_by_fw_id_lzyfw(root_id).to_display_dict()
+        assert display["states"] == {
+            f"root--{root_id}": "COMPLETED",
+            f"mid--{mid_id}": "READY",
+            f"leaf--{leaf_id}": "WAITING",
+        }
+        assert sorted(display["links"][f"root--{root_id}"]) == sorted([f"mid--{mid_id}", f"leaf--{leaf_id}"])
+
+    def test_split_wf_layout(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        fw_root = Firework(ftask, name="root")
+        fws_mid = [Firework(ftask, name="mid", parents=fw_root) for _ in range(10)]
+        fw_join = Firework(ftask, name="join", parents=fws_mid)
+        with patch("fireworks.core.launchpad.SPLIT_WF_MIN_FWS", 5):
+            self.lp.add_wf(Workflow([fw_root, *fws_mid, fw_join]))
+            self.lp.add_wf(Workflow([Firework(ftask, name="small")]))
+        root_id = self.lp.get_fw_ids({"name": "root"})[0]
+        join_id = self.lp.get_fw_ids({"name": "join"})[0]
+        wf_dict = self.lp.workflows.find_one({"nodes": root_id})
+        assert wf_dict["split"]
+        assert not {"links", "parent_links", "fw_states"} & set(wf_dict)
+        assert self.lp.wf_links.count_documents({"wf_id": wf_dict["_id"]}) == 12
+        assert self.lp.fireworks.count_documents({"wf_id": wf_dict["_id"]}) == 12
+        assert "split" not in self.lp.workflows.find_one({"nodes": self.lp.get_fw_ids({"name": "small"})[0]})
+        expected = Workflow([fw_root, *fws_mid, fw_join])
+        summary = self.lp.get_wf_summary_dict(root_id, mode="all")
+        assert len(summary["links"]) == 12
+        assert sorted(summary["parent_links"][f"join--{join_id}"]) == sorted(summary["links"][f"root--{root_id}"])
+        assert self.lp.get_wf_by_fw_id(root_id).links == {
+            root_id + fw_id - fw_root.fw_id: [root_id + c - fw_root.fw_id for c in children]
+            for fw_id, children in expected.links.items()
+        }
+
+        # the root and then one of the middle FireWorks complete, which only loads their neighbourhood
+        _, launch_id = self.lp.checkout_fw(self.fworker, "dir_a", fw_id=root_id)
+        self.lp.complete_launch(launch_id, FWAction())
+        assert self.lp.get_wf_summary_dict(root_id)["state"] == "RUNNING"
+        assert self.lp.fireworks.count_documents({"name": "mid", "state": "READY"}) == 10
+        mid_fw, launch_id = self.lp.checkout_fw(self.fworker, "dir_b")
+        with _count_queries(self.lp) as counter:
+            self.lp.complete_launch(launch_id, FWAction())
+        assert counter["wf_links"] <= 3
+        assert counter["workflows"] <= 4
+        assert self.lp.get_fw_by_id(mid_fw.fw_id).state == "COMPLETED"
+        assert self.lp.get_fw_by_id(join_id).state == "WAITING"
+        assert self.lp.future_run_exists()
+
+        # FireWorks can be appended, and the state of the workflow follows its FireWorks
+        rapidfire(self.lp, self.fworker, m_dir=MODULE_DIR)
+        assert self.lp.get_wf_summary_dict(root_id, mode="less")["state"] == "COMPLETED"
+        self.lp.append_wf(Workflow([Firework(ftask, name="added")]), [join_id])
+        added_id = self.lp.get_fw_ids({"name": "added"})[0]
+        assert self.lp.get_fw_by_id(added_id).state == "READY"
+        assert self.lp.wf_links.find_one({"fw_id": join_id})["children"] == [added_id]
+        assert added_id in self.lp.workflows.find_one({"nodes": root_id})["nodes"]
+        wf = self.lp.get_wf_by_fw_id(added_id)
+        assert len(wf) == 13
+        assert wf.state == self.lp.get_wf_summary_dict(root_id)["state"] == "RUNNING"
+        rapidfire(self.lp, self.fworker, m_dir=MODULE_DIR)
+        assert self.lp.get_wf_summary_dict(added_id)["state"] == "COMPLETED"
+
+    def test_run_exists(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        fw_p = Firework(ftask, name="parent", spec={"_category": "cat"})
+        fw_c = Firework(ftask, name="child", parents=fw_p)
+        self.lp.add_wf(Workflow([fw_p, fw_c]))
+        fworker = FWorker(category="cat")
+        assert self.lp.run_exists(fworker)
+        assert not self.lp.run_exists(FWorker(category="other"))
+
+        self.lp.checkout_fw(fworker, "dir_a")
+        assert fworker.query == FWorker(category="cat").query  # the query is not modified
+        assert not self.lp.run_exists(fworker)
+        assert self.lp.future_run_exists(fworker)
+        assert not self.lp.future_run_exists(FWorker(category="other"))
+
+        # without fw_states in the workflow the children states are read from the fireworks
+        self.lp.workflows.update_one({"nodes": fw_p.fw_id}, {"$unset": {"fw_states": ""}})
+        self.lp._run_exists_cache.clear()
+        assert self.lp.future_run_exists(fworker)
+
+    def test_run_exists_cache(self) -> None:
+        self.lp.add_wf(Firework(ScriptTask.from_str('echo "lorem ipsum"')))
+        with _count_queries(self.lp) as counter:
+            assert self.lp.run_exists(self.fworker)
+            assert self.lp.run_exists(self.fworker)
+        assert counter == {"fireworks": 1}
+
+        # changes made through the LaunchPad clear the cache
+        self.lp.checkout_fw(self.fworker, "dir_a")
+        assert not self.lp.run_exists(self.fworker)
+        assert not self.lp.future_run_exists(self.fworker)
+
+        # changes made elsewhere are seen once the cache expires
+        self.lp.fireworks.update_one({}, {"$set": {"state": "READY"}})
+        assert not self.lp.run_exists(self.fworker)
+        time.sleep(fireworks.fw_config.RUN_EXISTS_CACHE_SECS)
+        assert self.lp.run_exists(self.fworker)
+
+    def test_refresh_prefetch(self) -> None:
+        """The children refreshed after their parent completes are loaded with a few queries."""
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        fw_p = Firework(ftask, name="parent")
+        fws_c = [Firework(ftask, name="child", parents=fw_p) for _ in range(20)]
+        self.lp.add_wf(Workflow([fw_p, *fws_c]))
+        _, launch_id = self.lp.checkout_fw(self.fworker, "dir_a", fw_id=fw_p.fw_id)
+        with _count_queries(self.lp) as counter:
+            self.lp.complete_launch(launch_id, FWAction(update_spec={"x": 1}))
+        assert counter["fireworks"] <= 6
+        assert counter["launches"] <= 4
+        assert self.lp.fireworks.count_documents({"name": "child", "state": "READY", "spec.x": 1}) == 20
+
+        # re-running the parent archives the launches of the children
+        rapidfire(self.lp, self.fworker, m_dir=MODULE_DIR)
+        with _count_queries(self.lp) as counter:
+            self.lp.rerun_fw(fw_p.fw_id)
+        assert counter["fireworks"] <= 6
+        assert counter["launches"] <= 4
+        assert self.lp.fireworks.count_documents({"name": "child", "state": "WAITING"}) == 20
+
+    def test_complete_launches(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        fw_p = Firework(ftask, name="parent")
+        fws_c = [Firework(ftask, name="child", parents=fw_p) for _ in range(6)]
+        fw_g = Firework(ftask, name="grandchild", parents=fws_c[0])
+        self.lp.add_wf(Workflow([fw_p, *fws_c, fw_g]))
+        _, launch_id = self.lp.checkout_fw(self.fworker, "dir_a", fw_id=fw_p.fw_id)
+        self.lp.complete_launch(launch_id, FWAction())
+        launch_ids = [self.lp.checkout_fw(self.fworker, "dir_a", fw_id=fw.fw_id)[1] for fw in fws_c]
+
+        # the workflow is locked, refreshed and written once for all completions
+        completions = [(launch_ids[0], FWAction(update_spec={"x": 1}), "COMPLETED")]
+        completions += [(launch_id, FWAction(), "COMPLETED") for launch_id in launch_ids[1:3]]
+        with _count_queries(self.lp) as counter:
+            launches = self.lp.complete_launches(completions)
+        assert [launch["launch_id"] for launch in launches] == launch_ids[:3]
+        # find the workflow, lock, read, write and unlock it
+        assert counter["workflows"] <= 5
+        assert self.lp.get_fw_by_id(fw_g.fw_id).state == "READY"
+        assert self.lp.get_fw_by_id(fw_g.fw_id).spec["x"] == 1
+        with pytest.raises(ValueError, match="No Launch exists"):
+            self.lp.complete_launches([(launch_ids[3], FWAction(), "COMPLETED"), (-1, FWAction(), "COMPLETED")])
+        assert self.lp.get_fw_by_id(fws_c[3].fw_id).state == "RUNNING"
+
+        # concurrent completions through a CompletionBatcher are written together
+        batcher = CompletionBatcher(self.lp)
+        states = ["COMPLETED", "FIZZLED", "COMPLETED"]
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(batcher.complete_launch, launch_ids[3:], [FWAction()] * 3, states))
+        assert [self.lp.get_fw_by_id(fw.fw_id).state for fw in fws_c[3:]] == states
+        assert self.lp.get_wf_summary_dict(fw_p.fw_id)["state"] == "FIZZLED"
+        with pytest.raises(ValueError, match="No Launch exists"):
+            batcher.complete_launch(-1, FWAction())
+
+    def test_upsert_changed_fields(self) -> None:
+        fw = Firework(ScriptTask.from_str('echo "lorem ipsum"'), spec={"big": "x" * 1000}, name="fw")
+        self.lp.add_wf(fw)
+        fw, launch_id = self.lp.checkout_fw(self.fworker, "dir_a")
+
+        m_fw = self.lp.get_fw_by_id(fw.fw_id)
+        m_fw.name = "renamed"
+        m_launch = self.lp.get_launch_by_id(launch_id)
+        m_launch.launch_dir = "dir_b"
+        # fields that were not changed are not written back
+        self.lp.fireworks.update_one({"fw_id": fw.fw_id}, {"$set": {"spec.big": "y"}})
+        self.lp.launches.update_one({"launch_id": launch_id}, {"$set": {"host": "other_host"}})
+        with _count_queries(self.lp) as counter:
+            self.lp._upsert_fws([m_fw])
+            self.lp._upsert_fws([m_fw])  # nothing changed since the last write
+            self.lp._upsert_launches([m_launch])
+        assert counter == {"fireworks": 1, "launches": 1}
+
+        fw_dict = self.lp.get_fw_dict_by_id(fw.fw_id)
+        assert fw_dict["name"] == "renamed"
+        assert fw_dict["spec"]["big"] == "y"
+        assert fw_dict["state"] == "RUNNING"
+        assert [launch["launch_id"] for launch in fw_dict["launches"]] == [launch_id]
+        assert fw_dict["launches"][0]["launch_dir"] == "dir_b"
+        assert fw_dict["launches"][0]["host"] == "other_host"
+
+    def test_rapidfire_prefetch(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        fw_p = Firework(ftask, name="parent")
+        fws_c = [Firework(ftask, name="child", parents=fw_p) for _ in range(4)]
+        self.lp.add_wf(Workflow([fw_p, *fws_c]))
+        for _ in range(3):
+            self.lp.add_wf(Firework(ftask, name="single"))
+        with cd(MODULE_DIR):
+            rapidfire(self.lp, self.fworker, prefetch=3)
+        assert self.lp.get_fw_ids({"state": "COMPLETED"}, count_only=True) == 8
+        # every launcher dir holds exactly one launch, empty dirs were cleaned up
+        launcher_dirs = glob.glob(os.path.join(MODULE_DIR, "launcher_*"))
+        assert len(launcher_dirs) == 8
+        assert {launch["launch_dir"] for launch in self.lp.launches.find()} == set(launcher_dirs)
+
+    def test_rapidfire_prefetch_queries(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        n_queries = []
+        for prefetch in (1, 3):
+            for _ in range(6):
+                self.lp.add_wf(Firework(ftask, name="single"))
+            with cd(MODULE_DIR), _count_queries(self.lp) as counter:
+                rapidfire(self.lp, self.fworker, prefetch=prefetch)
+            n_queries.append(sum(counter.values()))
+        assert self.lp.get_fw_ids({"state": "COMPLETED"}, count_only=True) == 12
+        # the prefetched fws are started without checking them out again
+        assert n_queries[1] < n_queries[0]
+
+    def test_rapidfire_prefetch_timeout(self) -> None:
+        ftask = ScriptTask.from_str("sleep 2")
+        for _ in range(4):
+            self.lp.add_wf(Firework(ftask, name="single"))
+        with cd(MODULE_DIR):
+            rapidfire(self.lp, self.fworker, prefetch=4, timeout=1)
+        # the unused prefetched fws were given back to the queue, without leaving launches behind
+        assert self.lp.get_fw_ids({"state": "COMPLETED"}, count_only=True) == 1
+        assert self.lp.get_fw_ids({"state": "READY"}, count_only=True) == 3
+        assert len(glob.glob(os.path.join(MODULE_DIR, "launcher_*"))) == 1
+        assert self.lp.launches.count_documents({}) == 1
+        assert not any(fw["archived_launches"] for fw in self.lp.fireworks.find())
+
+    def test_prefetched_rocket(self) -> None:
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        for _ in range(2):
+            self.lp.add_wf(Firework(ftask, name="single"))
+        with cd(MODULE_DIR):
+            os.mkdir("launcher_a")
+            os.mkdir("launcher_b")
+            (fw_a, launch_a), (fw_b, launch_b) = self.lp.reserve_fws(self.fworker, ["launcher_a", "launcher_b"])
+            # waiting prefetched fws are not lost runs
+            assert self.lp.detect_lostruns(expiration_secs=0, fizzle=True)[0] == []
+            self.lp.defuse_fw(fw_b.fw_id)
+            with cd("launcher_b"):
+                assert not launch_rocket(self.lp, self.fworker, prefetched=(fw_b, launch_b))
+            with cd("launcher_a"):
+                assert launch_rocket(self.lp, self.fworker, prefetched=(fw_a, launch_a))
+        assert self.lp.get_fw_by_id(fw_b.fw_id).state == "DEFUSED"
+        fw_a = self.lp.get_fw_by_id(fw_a.fw_id)
+        assert fw_a.state == "COMPLETED"
+        assert [launch.launch_id for launch in fw_a.launches] == [launch_a]
+
 
 class LaunchPadDefuseReigniteRerunArchiveDeleteTest(unittest.TestCase):
     @classmethod
@@ -512,6 +1226,63 @@ class LaunchPadDefuseReigniteRerunArchiveDeleteTest(unittest.TestCase):
         fw = self.lp.get_fw_by_id(self.zeus_fw_id)
         assert fw.state == "ARCHIVED"
 
+    def test_wf_state_operations_query_count(self) -> None:
+        """The fireworks of a workflow are paused, defused and reignited in one locked update."""
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        fw_p = Firework(ftask, name="parent")
+        fws_c = [Firework(ftask, name="child", parents=fw_p) for _ in range(30)]
+        self.lp.add_wf(Workflow([fw_p, *fws_c]))
+        _, launch_id = self.lp.checkout_fw(self.fworker, "dir_a", fw_id=fw_p.fw_id)
+        self.lp.complete_launch(launch_id, FWAction())
+        fw_ids = [fw.fw_id for fw in fws_c]
+
+        with _count_queries(self.lp) as counter:
+            self.lp.pause_wf(fw_p.fw_id)
+        assert counter["fireworks"] <= 4
+        assert counter["workflows"] <= 4
+        assert self.lp.fireworks.count_documents({"fw_id": {"$in": fw_ids}, "state": "PAUSED"}) == 30
+        assert self.lp.get_fw_by_id(fw_p.fw_id).state == "COMPLETED"
+        assert self.lp.get_wf_summary_dict(fw_p.fw_id)["state"] == "PAUSED"
+
+        # the completed parent is rerun, which resets its children, then everything is defused
+        with _count_queries(self.lp) as counter:
+            self.lp.defuse_wf(fw_p.fw_id)
+        assert counter["fireworks"] <= 15
+        assert self.lp.fireworks.count_documents({"fw_id": {"$in": [fw_p.fw_id, *fw_ids]}, "state": "DEFUSED"}) == 31
+        assert self.lp.get_wf_summary_dict(fw_p.fw_id)["state"] == "DEFUSED"
+
+        with _count_queries(self.lp) as counter:
+            self.lp.reignite_wf(fw_p.fw_id)
+        assert counter["fireworks"] <= 6
+        assert self.lp.get_fw_by_id(fw_p.fw_id).state == "READY"
+        assert self.lp.fireworks.count_documents({"fw_id": {"$in": fw_ids}, "state": "WAITING"}) == 30
+        assert self.lp.get_wf_summary_dict(fw_p.fw_id)["state"] == "READY"
+
+    def test_archive_wf_many_roots_query_count(self) -> None:
+        """The completed roots of a workflow and their children are rerun in one locked update."""
+        ftask = ScriptTask.from_str('echo "lorem ipsum"')
+        fws_p = [Firework(ftask, name="parent") for _ in range(20)]
+        fws_c = [Firework(ftask, name="child", parents=fw_p) for fw_p in fws_p]
+        self.lp.add_wf(Workflow([*fws_p, *fws_c]))
+        launch_ids = []
+        for fw_p in fws_p:
+            _, launch_id = self.lp.checkout_fw(self.fworker, "dir_a", fw_id=fw_p.fw_id)
+            self.lp.complete_launch(launch_id, FWAction())
+            launch_ids.append(launch_id)
+        fw_ids = [fw.fw_id for fw in [*fws_p, *fws_c]]
+
+        with (
+            _count_queries(self.lp) as counter,
+            patch.object(self.lp, "_modify_wf", wraps=self.lp._modify_wf) as modify_wf,
+        ):
+            self.lp.archive_wf(fws_p[0].fw_id)
+        # one modification rerunning the roots, one setting the state
+        assert modify_wf.call_count == 2
+        assert counter["fireworks"] <= 10
+        assert self.lp.fireworks.count_documents({"fw_id": {"$in": fw_ids}, "state": "ARCHIVED"}) == 40
+        assert self.lp.fireworks.count_documents({"archived_launches": {"$in": launch_ids}}) == 20
+        assert self.lp.fireworks.count_documents({"launches": {"$ne": []}, "fw_id": {"$in": fw_ids}}) == 0
+
     def test_delete_wf(self) -> None:
         # Run a firework before deleting Zeus
         rapidfire(self.lp, self.fworker, nlaunches=1)
@@ -1253,6 +2024,76 @@ class WFLockTest(unittest.TestCase):
 
         assert fast_fw.state == "FIZZLED"
 
+    def test_lock_owner_and_expiry(self) -> None:
+        with WFLock(self.lp, 3) as lock:
+            assert self.lp.workflows.find_one({"nodes": 3})["locked"] == lock.token
+            with pytest.raises(LockedWorkflowError):
+                WFLock(self.lp, 3, expire_secs=0.05).__enter__()
+        wf = self.lp.workflows.find_one({"nodes": 3})
+        assert "locked" not in wf
+        assert "lock_expires_at" not in wf
+        assert wf["lock_stats"]["acquires"] == 1
+
+        # the expired lock of a crashed process is taken over
+        expired = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=1)
+        self.lp.workflows.update_one({"nodes": 3}, {"$set": {"locked": "crashed", "lock_expires_at": expired}})
+        with WFLock(self.lp, 3) as lock:
+            assert not lock.contended
+
+        # an expired lock does not release the lock of its successor
+        old_lock = WFLock(self.lp, 3, ttl_secs=0).__enter__()
+        new_lock = WFLock(self.lp, 3).__enter__()
+        # nor does it write the workflow
+        with pytest.raises(LockedWorkflowError):
+            self.lp._update_wf(self.lp.get_wf_by_fw_id_lzyfw(3), [], old_lock)
+        # a query of the caller does not replace the check for the lock
+        assert not WFLock(self.lp, 3).try_acquire({"$or": [{"nodes": 3}, {"nodes": -1}]})
+        old_lock.release()
+        assert self.lp.workflows.find_one({"nodes": 3})["locked"] == new_lock.token
+        new_lock.release()
+        wf = self.lp.workflows.find_one({"nodes": 3})
+        assert "locked" not in wf
+        assert wf["lock_stats"]["acquires"] == 3
+        assert wf["lock_stats"]["hold_secs"] > 0
+
+        # the lease is renewed while the lock is held
+        with WFLock(self.lp, 3, ttl_secs=0.3):
+            time.sleep(0.6)
+            with pytest.raises(LockedWorkflowError):
+                WFLock(self.lp, 3, expire_secs=0.05).__enter__()
+
+    @patch("fireworks.core.launchpad.OPTIMISTIC_WF_UPDATES", True)
+    def test_optimistic_wf_updates(self) -> None:
+        self.lp.fireworks.update_one({"fw_id": 3}, {"$set": {"state": "PAUSED"}})
+        self.lp.wf_lock_stats.clear()
+        rev = self.lp.workflows.find_one({"nodes": 3}).get("rev", 0)
+        attempts = []
+
+        def refresh(wf):
+            if not attempts:  # another process writes the workflow in the meantime
+                self.lp.workflows.update_one({"nodes": 3}, {"$inc": {"rev": 1}})
+            attempts.append(wf)
+            return wf.refresh(3)
+
+        self.lp._modify_wf(3, refresh)
+        assert len(attempts) == 2
+        wf = self.lp.workflows.find_one({"nodes": 3})
+        assert wf["fw_states"]["3"] == "PAUSED"
+        assert wf["rev"] == rev + 2
+        assert "locked" not in wf
+        assert self.lp.wf_lock_stats["cas_conflicts"] == 1
+        assert self.lp.wf_lock_stats["cas_commits"] == 1
+
+        # a locked workflow is not read until the lock expires
+        self.lp.workflows.update_one({"nodes": 3}, {"$set": {"locked": True}})
+        with patch("fireworks.core.launchpad.WFLOCK_EXPIRATION_SECS", 0.1):
+            with pytest.raises(LockedWorkflowError):
+                self.lp._modify_wf(3, refresh)
+            assert self.lp.wf_lock_stats["lock_waits"] > 0
+            with patch("fireworks.core.launchpad.WFLOCK_EXPIRATION_KILL", True):
+                self.lp._modify_wf(3, refresh)
+        assert "locked" not in self.lp.workflows.find_one({"nodes": 3})
+
 
 class LaunchPadOfflineTest(unittest.TestCase):
     @classmethod
@@ -54,6 +54,7 @@ def rapidfire_process(
     running_ids_dict,
     local_redirect,
     max_loops: int,
+    prefetch: int = 1,
 ) -> None:
     """Initializes shared data with multiprocessing parameters and starts a rapidfire.
 
@@ -72,6 +73,7 @@ def rapidfire_process(
         max_loops (int) : After `max_loops` attempts to search for
             new fireworks to run, a single rapidfire process will terminate.
             -1 indicates that the process will not stop searching for new jobs to run.
+        prefetch (int): number of FireWorks to check out from the LaunchPad at once
     """
     # Register LaunchPad before connecting to the DataServer (client-side)
     DataServer.register_launchpad()
@@ -98,6 +100,7 @@ def rapidfire_process(
         strm_lvl=loglvl,
         timeout=timeout,
         local_redirect=local_redirect,
+        prefetch=prefetch,
     )
     while nlaunches == 0:
         time.sleep(1.5)  # wait for LaunchPad to be initialized
@@ -134,6 +137,7 @@ def rapidfire_process(
                 strm_lvl=loglvl,
                 timeout=timeout,
                 local_redirect=local_redirect,
+                prefetch=prefetch,
             )
         else:
             break
@@ -152,6 +156,7 @@ def start_rockets(
     running_ids_dict=None,
     local_redirect=False,
     max_loops: int = -1,
+    prefetch: int = 1,
 ):
     """Create each sub job and start a rocket launch in each one.
 
@@ -169,6 +174,7 @@ def start_rockets(
         max_loops (int) : After `max_loops` attempts to search for
             new fireworks to run, a single rapidfire process will terminate.
             -1 indicates that the process will not stop searching for new jobs to run.
+        prefetch (int): number of FireWorks each sub job checks out from the LaunchPad at once
 
     Returns:
         ([multiprocessing.Process]) all the created processes
@@ -188,6 +194,7 @@ def start_rockets(
                 running_ids_dict,
                 local_redirect,
                 max_loops,
+                prefetch,
             ),
         )
         for nl, sub_nproc in zip(node_lists, sub_nproc_list, strict=True)
@@ -237,6 +244,7 @@ def launch_multiprocess(
     exclude_current_node=False,
     local_redirect=False,
     max_loops: int = -1,
+    prefetch: int = 1,
 ) -> None:
     """Launch the jobs in the job packing mode.
 
@@ -255,6 +263,8 @@ def launch_multiprocess(
         max_loops (int, default = -1): After `max_loops` attempts to search for
             new fireworks to run, a single rapidfire process will terminate.
             -1 indicates that the process will not stop searching for new jobs to run.
+        prefetch (int, default = 1): number of FireWorks each sub job checks out from the LaunchPad
+            at once; the local batch is drained before going back to the database.
     """
     # parse node file contents
     if exclude_current_node:
@@ -287,6 +297,7 @@ def launch_multiprocess(
         running_ids_dict=running_ids_dict,
         local_redirect=local_redirect,
         max_loops=max_loops,
+        prefetch=prefetch,
     )
     FWData().Running_IDs = running_ids_dict
 
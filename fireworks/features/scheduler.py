@@ -0,0 +1,66 @@
+"""This module contains the base class for implementing scheduling policies."""
+
+import abc
+
+from fireworks.utilities.fw_serializers import FWSerializable, load_object, serialize_fw
+
+__copyright__ = "Copyright 2013, The Materials Project"
+
+
+class SchedulerBase(FWSerializable):
+    """This serves an Abstract class for implementing scheduling policies, which decide
+    which READY FireWorks are checked out next.
+
+    A policy is selected with the SCHEDULER setting of the FW_config or the ``scheduler``
+    of a FWorker, either by its _fw_name or as a dict with its parameters.
+    """
+
+    def __init__(self) -> None:
+        pass
+
+    @property
+    def indexes(self):
+        """Indexes of the fireworks collection the policy relies on, built by LaunchPad.tuneup()."""
+        return []
+
+    @abc.abstractmethod
+    def get_fw_ids(self, lp, query, n=1) -> list[int]:
+        """Return the ids of up to n READY FireWorks in the order they should be checked out.
+
+        The LaunchPad claims the returned FireWorks one by one, skipping those that were
+        claimed by someone else in the meantime. Implementations should use indexed queries or
+        aggregations rather than loading the candidates into the client.
+
+        Args:
+            lp (LaunchPad)
+            query (dict): query on the fireworks collection, includes the state and the FWorker query
+            n (int): maximum number of fw_ids to return
+
+        Returns:
+            [int]
+        """
+        raise NotImplementedError
+
+    @serialize_fw
+    def to_dict(self):
+        return {}
+
+    @classmethod
+    def from_dict(cls, m_dict):
+        return cls()
+
+
+def get_scheduler(scheduler):
+    """Load a scheduling policy.
+
+    Args:
+        scheduler (SchedulerBase, str or dict): the policy, its _fw_name or its dict representation
+
+    Returns:
+        SchedulerBase: the policy, or None if scheduler is None
+    """
+    if scheduler is None or isinstance(scheduler, SchedulerBase):
+        return scheduler
+    if isinstance(scheduler, str):
+        return load_object({"_fw_name": scheduler})
+    return load_object(dict(scheduler))
@@ -181,6 +181,7 @@ def workflow_json(wf_id):
 
     wf = app.lp.workflows.find_one({"nodes": wf_id})
     fireworks = list(app.lp.fireworks.find({"fw_id": {"$in": wf["nodes"]}}, projection=["name", "fw_id", "state"]))
+    links = app.lp._get_wf_links(wf)[0]
     nodes_and_edges = {"nodes": list(), "edges": list()}
     for fw in fireworks:
         fw_id = fw["fw_id"]
@@ -190,8 +191,8 @@ def workflow_json(wf_id):
         node_obj["state"] = state_to_color[fw["state"]]
         node_obj["width"] = len(node_obj["name"]) * 10
         nodes_and_edges["nodes"].append({"data": node_obj})
-        if str(fw_id) in wf["links"]:
-            for link in wf["links"][str(fw_id)]:
+        if str(fw_id) in links:
+            for link in links[str(fw_id)]:
                 link_object = dict()
                 link_object["source"] = str(fw_id)
                 link_object["target"] = str(link)
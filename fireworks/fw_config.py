@@ -31,8 +31,15 @@ FW_NAME_UPDATES = {
     "Dupe Finder Exact": "DupeFinderExact",
 }
 
+# JSON index of the classes by _fw_name, built by 'lpad admin build_registry', for load_object() to
+# import classes directly instead of searching USER_PACKAGES (None to always search)
+FW_NAME_INDEX = None
+
 YAML_STYLE = False  # controls whether YAML documents will be nested as braces or blocks (False = blocks)
 
+# "fast" reads and writes JSON with orjson and reads YAML with the C parser of ruamel.yaml when they are installed
+SERIALIZER_BACKEND = "default"
+
 FW_BLOCK_FORMAT = "%Y-%m-%d-%H-%M-%S-%f"  # date format for writing block directories in "rapid-fire" mode
 
 FW_LOGGING_FORMAT = "%(asctime)s %(levelname)s %(message)s"  # format for loggers
@@ -59,9 +66,16 @@ RESERVATION_EXPIRATION_SECS = 60 * 60 * 24 * 14  # a job can stay in a queue thi
 
 WFLOCK_EXPIRATION_SECS = 60 * 5  # wait this long for a WFLock before expiring
 WFLOCK_EXPIRATION_KILL = False  # kill WFLock on expiration (or give a warning)
+WFLOCK_TTL_SECS = None  # lease of a WFLock, renewed while held; taken over by others once expired. None: no expiry
+OPTIMISTIC_WF_UPDATES = False  # refresh WFs without a WFLock, retrying if the WF changed in the meantime
+SPLIT_WF_MIN_FWS = None  # store WFs with at least this many FWs with their links in a separate collection
+DB_COMPRESSION_THRESHOLD = None  # store values of DB_COMPRESSED_KEYS above this many bytes compressed in the DB
+DB_COMPRESSED_KEYS = []  # spec and stored_data keys whose values may be stored compressed, see above
 
 RAPIDFIRE_SLEEP_SECS = 60  # seconds to sleep between rapidfire loops
 
+ID_BLOCK_SIZE = 1  # number of fw_ids/launch_ids a LaunchPad reserves from the DB at once (>1 leaves gaps)
+
 LAUNCHPAD_LOC = None  # where to find the my_launchpad.yaml file
 FWORKER_LOC = None  # where to find the my_fworker.yaml file
 QUEUEADAPTER_LOC = None  # where to find the my_qadapter.yaml file
@@ -89,6 +103,14 @@ TRACKER_LINES = 25  # number of lines to return in Tracker
 
 SORT_FWS = ""  # sort equal priority FWs? "FILO" or "FIFO".
 
+SCHEDULER = None  # scheduling policy used to pick the next FW, e.g. "RoundRobinScheduler" (None: priority order)
+
+RUN_EXISTS_CACHE_SECS = 1  # cache run_exists/future_run_exists results locally for this long (0 to disable)
+
+LEAN_CHECKOUT = False  # check out FWs with targeted updates instead of re-reading and replacing whole documents
+
+READY_QUEUE = False  # keep READY FWs in a small 'ready_queue' collection and check out from there
+
 ENCODE_MONTY = True  # detect and use Monty-style as_dict()
 
 DECODE_MONTY = True  # detect and use Monty-style from_dict() with @class and @module
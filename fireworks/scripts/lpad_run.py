@@ -11,6 +11,7 @@ import re
 import sys
 import time
 from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from importlib import metadata
 from typing import TYPE_CHECKING, Any
 
@@ -26,6 +27,7 @@ from fireworks.features.fw_report import FWReport
 from fireworks.features.introspect import Introspector
 from fireworks.fw_config import (
     CONFIG_FILE_DIR,
+    FW_NAME_INDEX,
     FWORKER_LOC,
     LAUNCHPAD_LOC,
     MAINTAIN_INTERVAL,
@@ -37,7 +39,7 @@ from fireworks.fw_config import (
     WEBSERVER_PORT,
 )
 from fireworks.user_objects.firetasks.script_task import ScriptTask
-from fireworks.utilities.fw_serializers import DATETIME_HANDLER, recursive_dict
+from fireworks.utilities.fw_serializers import DATETIME_HANDLER, build_fw_name_index, recursive_dict
 
 from ._helpers import _validate_config_file_paths
 
@@ -206,21 +208,132 @@ def reset(args: Namespace) -> None:
     lp.reset(args.password)
 
 
+def _load_wf_file(filename: str, check: bool = False) -> Workflow:
+    """Load a Workflow from file, optionally checking it. Runs in the worker processes of add_wf."""
+    fwf = Workflow.from_file(filename)
+    if check:
+        from fireworks.utilities.dagflow import DAGFlow
+
+        DAGFlow.from_fireworks(fwf).check()
+    return fwf
+
+
+def _add_wf_files(
+    lp: LaunchPad,
+    files: list[str],
+    check: bool = False,
+    nprocs: int = 1,
+    chunk_size: int = 1000,
+    checkpoint: str | None = None,
+) -> None:
+    """Add the workflows of many files in chunks, parsing the files in a process pool.
+
+    The files of the next chunk are parsed while the current chunk is inserted with
+    LaunchPad.bulk_add_wfs(). The files of each inserted chunk are appended to the checkpoint file,
+    and files listed there are skipped, so that an interrupted run can be repeated without adding
+    workflows twice.
+
+    With a checkpoint, the workflows are stored with their file in the _source_file key of their
+    metadata, and the files of a chunk are written to the checkpoint file plus ".pending" before the
+    chunk is inserted. A repeated run keeps the completely inserted workflows of a pending chunk,
+    removes the partially inserted ones and adds the remaining files again.
+
+    Args:
+        lp (LaunchPad): The Launchpad instance.
+        files ([str]): paths of the Firework or Workflow files
+        check (bool): whether to check the workflows before adding them
+        nprocs (int): number of processes parsing the files
+        chunk_size (int): number of workflows inserted at once
+        checkpoint (str): path of the checkpoint file
+    """
+    files = [os.path.abspath(f) for f in files]
+    if checkpoint:
+        _reconcile_pending_wf_files(lp, checkpoint)
+        if os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                done = set(f.read().splitlines())
+            lp.m_logger.info(f"Skipping {len(done)} files already added according to {checkpoint}")
+            files = [f for f in files if f not in done]
+    chunks = [files[i : i + chunk_size] for i in range(0, len(files), chunk_size)]
+    n_wfs = 0
+    start_time = time.time()
+    with ProcessPoolExecutor(max_workers=nprocs) as executor:
+        pending = [executor.submit(_load_wf_file, f, check) for f in chunks[0]] if chunks else []
+        for idx, chunk in enumerate(chunks):
+            wfs = []
+            for filename, future in zip(chunk, pending, strict=True):
+                try:
+                    wfs.append(future.result())
+                except Exception:
+                    lp.m_logger.exception(f"Loading {filename} failed, none of its chunk was added")
+                    raise
+            # parse the next chunk while this one is inserted
+            pending = (
+                [executor.submit(_load_wf_file, f, check) for f in chunks[idx + 1]] if idx + 1 < len(chunks) else []
+            )
+            if checkpoint:
+                for filename, wf in zip(chunk, wfs, strict=True):
+                    wf.metadata["_source_file"] = filename
+                _write_wf_files(f"{checkpoint}.pending", chunk, "w")
+            lp.bulk_add_wfs(wfs, chunk_size=len(wfs))
+            if checkpoint:
+                _write_wf_files(checkpoint, chunk, "a")
+                os.remove(f"{checkpoint}.pending")
+            n_wfs += len(wfs)
+    elapsed = time.time() - start_time
+    lp.m_logger.info(f"Added {n_wfs} workflows in {elapsed:.1f} s ({n_wfs / max(elapsed, 1e-9):.0f} workflows/s)")
+
+
+def _write_wf_files(filename: str, files: list[str], mode: str) -> None:
+    """Write the paths of files to a checkpoint file of _add_wf_files(), one per line."""
+    with open(filename, mode) as f:
+        f.writelines(f"{wf_file}\n" for wf_file in files)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _reconcile_pending_wf_files(lp: LaunchPad, checkpoint: str) -> None:
+    """Settle the chunk that _add_wf_files() was inserting when it was interrupted.
+
+    The files of the pending chunk whose workflows were completely inserted are appended to the
+    checkpoint file. The documents of partially inserted workflows are removed, so that their files
+    are added again.
+
+    Args:
+        lp (LaunchPad): The Launchpad instance.
+        checkpoint (str): path of the checkpoint file
+    """
+    pending_file = f"{checkpoint}.pending"
+    if not os.path.exists(pending_file):
+        return
+    with open(pending_file) as f:
+        pending = f.read().splitlines()
+    added = set()
+    for wf in lp.workflows.find({"metadata._source_file": {"$in": pending}}, {"nodes": 1, "metadata": 1}):
+        if lp.fireworks.count_documents({"fw_id": {"$in": wf["nodes"]}}) == len(wf["nodes"]):
+            added.add(wf["metadata"]["_source_file"])
+        else:
+            lp._delete_new_fws(wf["nodes"])
+    lp.m_logger.info(f"{len(added)} of the {len(pending)} files pending in {pending_file} were added")
+    _write_wf_files(checkpoint, [f for f in pending if f in added], "a")
+    os.remove(pending_file)
+
+
+def _get_wf_files(paths: list[str], directory: bool = False) -> list[str]:
+    """Return the given files, or the files in the given directories if directory is True."""
+    if not directory:
+        return paths
+    return [os.path.join(d, f) for d in paths for f in sorted(os.listdir(d))]
+
+
 def add_wf(args: Namespace) -> None:
     lp = get_lp(args)
-    if args.dir:
-        files = []
-        for f in args.wf_file:
-            files.extend([os.path.join(f, i) for i in os.listdir(f)])
-    else:
-        files = args.wf_file
+    files = _get_wf_files(args.wf_file, args.dir)
+    if args.nprocs > 1 or args.chunk_size or args.checkpoint:
+        _add_wf_files(lp, files, args.check, args.nprocs, args.chunk_size or 1000, args.checkpoint)
+        return
     for f in files:
-        fwf = Workflow.from_file(f)
-        if args.check:
-            from fireworks.utilities.dagflow import DAGFlow
-
-            DAGFlow.from_fireworks(fwf).check()
-        lp.add_wf(fwf)
+        lp.add_wf(_load_wf_file(f, args.check))
 
 
 def append_wf(args: Namespace) -> None:
@@ -242,9 +355,8 @@ def check_wf(args: Namespace) -> None:
 
 def add_wf_dir(args: Namespace) -> None:
     lp = get_lp(args)
-    for filename in os.listdir(args.wf_dir):
-        fwf = Workflow.from_file(filename)
-        lp.add_wf(fwf)
+    for filename in _get_wf_files([args.wf_dir], directory=True):
+        lp.add_wf(Workflow.from_file(filename))
 
 
 def print_fws(ids, lp, args: Namespace) -> None:
@@ -549,12 +661,34 @@ def tuneup(args: Namespace) -> None:
     lp.tuneup(bkground=not args.full)
 
 
+def build_registry(args: Namespace) -> None:
+    filename = os.path.expanduser(args.index_file or FW_NAME_INDEX or "fw_name_index.json")
+    index = build_fw_name_index(filename)
+    print(f"Wrote {len(index)} _fw_names to {filename}, set FW_NAME_INDEX in the FW_config to use them.")
+
+
+def _process_wfs(lp: LaunchPad, fw_ids: list[int], process, nthreads: int = 1) -> None:
+    """Process the workflows of the given fw_ids, nthreads workflows at a time.
+
+    Args:
+        lp (LaunchPad): The Launchpad instance.
+        fw_ids ([int]): one fw_id per workflow
+        process (callable): called with each fw_id
+        nthreads (int): number of workflows to process concurrently
+    """
+
+    def process_wf(fw_id) -> None:
+        process(fw_id)
+        lp.m_logger.debug(f"Processed {fw_id=}")
+
+    with ThreadPoolExecutor(max_workers=nthreads) as executor:
+        list(executor.map(process_wf, fw_ids))
+
+
 def defuse_wfs(args: Namespace) -> None:
     lp = get_lp(args)
     fw_ids = parse_helper(lp, args, wf_mode=True)
-    for f in fw_ids:
-        lp.defuse_wf(f, defuse_all_states=args.defuse_all_states)
-        lp.m_logger.debug(f"Processed fw_id: {f}")
+    _process_wfs(lp, fw_ids, lambda f: lp.defuse_wf(f, defuse_all_states=args.defuse_all_states), args.nthreads)
     lp.m_logger.info(f"Finished defusing {len(fw_ids)} FWs.")
     if not args.defuse_all_states:
         lp.m_logger.info(
@@ -566,27 +700,21 @@ def defuse_wfs(args: Namespace) -> None:
 def pause_wfs(args: Namespace) -> None:
     lp = get_lp(args)
     fw_ids = parse_helper(lp, args, wf_mode=True)
-    for f in fw_ids:
-        lp.pause_wf(f)
-        lp.m_logger.debug(f"Processed fw_id: {f}")
+    _process_wfs(lp, fw_ids, lp.pause_wf, args.nthreads)
     lp.m_logger.info(f"Finished defusing {len(fw_ids)} FWs.")
 
 
 def archive(args: Namespace) -> None:
     lp = get_lp(args)
     fw_ids = parse_helper(lp, args, wf_mode=True)
-    for f in fw_ids:
-        lp.archive_wf(f)
-        lp.m_logger.debug(f"Processed fw_id: {f}")
+    _process_wfs(lp, fw_ids, lp.archive_wf, args.nthreads)
     lp.m_logger.info(f"Finished archiving {len(fw_ids)} WFs")
 
 
 def reignite_wfs(args: Namespace) -> None:
     lp = get_lp(args)
     fw_ids = parse_helper(lp, args, wf_mode=True)
-    for f in fw_ids:
-        lp.reignite_wf(f)
-        lp.m_logger.debug(f"Processed Workflow with fw_id: {f}")
+    _process_wfs(lp, fw_ids, lp.reignite_wf, args.nthreads)
     lp.m_logger.info(f"Finished reigniting {len(fw_ids)} Workflows")
 
 
@@ -687,7 +815,7 @@ def set_priority(args: Namespace) -> None:
         all_fw_ids = set()
         for fw_id in fw_ids:
             wf = lp.get_wf_by_fw_id_lzyfw(fw_id)
-            all_fw_ids.update(wf.id_fw)
+            all_fw_ids.update(fw.fw_id for fw in wf)
         fw_ids = list(all_fw_ids)
     for f in fw_ids:
         lp.set_priority(f, args.priority)
@@ -954,6 +1082,9 @@ def lpad(argv: Sequence[str] | None = None) -> int:
     qid_args = ["--qid"]
     qid_kwargs = {"help": "Query by reservation id of job in queue"}
 
+    nthreads_args = ["--nthreads"]
+    nthreads_kwargs = {"type": arg_positive_int, "default": 1, "help": "Number of workflows to process concurrently"}
+
     # for using fw- and wf-specific options on one command line, distinguish by prefix fw and wf
     # prefix short one-dash options with 'wf', i.e. '-i' -> '-wfi'
     # prefix long two-dash options with 'wf_', i.e. '--fw_id' -> '--wf_fw_id'
@@ -1011,6 +1142,22 @@ def lpad(argv: Sequence[str] | None = None) -> int:
     addwf_parser.add_argument(
         "-c", "--check", help="check the workflow before adding", dest="check", action="store_true"
     )
+    addwf_parser.add_argument(
+        "--nprocs",
+        type=arg_positive_int,
+        default=1,
+        help="Number of processes parsing the files. With more than one, the workflows are added in chunks.",
+    )
+    addwf_parser.add_argument(
+        "--chunk_size",
+        type=arg_positive_int,
+        help="Add the workflows in chunks of this many workflows (default: 1000 with --nprocs or --checkpoint)",
+    )
+    addwf_parser.add_argument(
+        "--checkpoint",
+        help="Add the workflows in chunks and record the added files in this file. Files recorded there "
+        "are skipped, so that an interrupted run can be repeated without adding workflows twice.",
+    )
     addwf_parser.set_defaults(func=add_wf, check=False)
 
     check_wf_parser = subparsers.add_parser("check_wflow", help="check a workflow from launchpad")
@@ -1245,12 +1392,13 @@ def lpad(argv: Sequence[str] | None = None) -> int:
     defuse_wf_parser.add_argument("-n", "--name", help="name")
     defuse_wf_parser.add_argument(*state_args, **state_kwargs)
     defuse_wf_parser.add_argument(*query_args, **query_kwargs)
+    defuse_wf_parser.add_argument(*nthreads_args, **nthreads_kwargs)
     defuse_wf_parser.add_argument(
         "--password",
         help="Today's date, e.g. 2012-02-25. Password or positive response to "
         f"input prompt required when modifying more than {PW_CHECK_NUM} entries.",
     )
-    defuse_wf_parser.set_defaults(func=pause_wfs)
+    defuse_wf_parser.set_defaults(func=defuse_wfs)
 
     pause_wf_parser = subparsers.add_parser(
         "pause_wflows",
@@ -1261,6 +1409,7 @@ def lpad(argv: Sequence[str] | None = None) -> int:
     pause_wf_parser.add_argument("-n", "--name", help="name")
     pause_wf_parser.add_argument(*state_args, **state_kwargs)
     pause_wf_parser.add_argument(*query_args, **query_kwargs)
+    pause_wf_parser.add_argument(*nthreads_args, **nthreads_kwargs)
     pause_wf_parser.add_argument(
         "--password",
         help="Today's date, e.g. 2012-02-25. Password or positive response to "
@@ -1277,6 +1426,7 @@ def lpad(argv: Sequence[str] | None = None) -> int:
     reignite_wfs_parser.add_argument("-n", "--name", help="name")
     reignite_wfs_parser.add_argument(*state_args, **state_kwargs)
     reignite_wfs_parser.add_argument(*query_args, **query_kwargs)
+    reignite_wfs_parser.add_argument(*nthreads_args, **nthreads_kwargs)
     reignite_wfs_parser.add_argument(
         "--password",
         help="Today's date, e.g. 2012-02-25. Password or positive response to "
@@ -1293,6 +1443,7 @@ def lpad(argv: Sequence[str] | None = None) -> int:
     archive_parser.add_argument("-n", "--name", help="name")
     archive_parser.add_argument(*state_args, **state_kwargs)
     archive_parser.add_argument(*query_args, **query_kwargs)
+    archive_parser.add_argument(*nthreads_args, **nthreads_kwargs)
     archive_parser.add_argument(
         "--password",
         help="Today's date, e.g. 2012-02-25. Password or positive response to "
@@ -1484,6 +1635,14 @@ def lpad(argv: Sequence[str] | None = None) -> int:
     )
     tuneup_parser.set_defaults(func=tuneup)
 
+    build_registry_parser = admin_subparser.add_parser(
+        "build_registry", help="Index the Firetasks and other classes of USER_PACKAGES by _fw_name"
+    )
+    build_registry_parser.add_argument(
+        "index_file", nargs="?", help="File to write the index to (default: FW_NAME_INDEX or fw_name_index.json)"
+    )
+    build_registry_parser.set_defaults(func=build_registry)
+
     refresh_parser = admin_subparser.add_parser(
         "refresh", help="manually force a workflow refresh (not usually needed)"
     )
@@ -84,6 +84,12 @@ def mlaunch(argv: Sequence[str] | None = None) -> int:
         default=-1,
         type=int,
     )
+    parser.add_argument(
+        "--prefetch",
+        help="number of FireWorks to reserve from the LaunchPad at once (default 1)",
+        default=1,
+        type=int,
+    )
 
     if argcomplete is not None:
         argcomplete.autocomplete(parser)
@@ -125,6 +131,7 @@ def mlaunch(argv: Sequence[str] | None = None) -> int:
         timeout=args.timeout,
         exclude_current_node=args.exclude_current_node,
         max_loops=args.max_loops,
+        prefetch=args.prefetch,
     )
 
     return 0
@@ -92,6 +92,12 @@ def rlaunch(argv: Sequence[str] | None = None) -> int:
     rapid_parser.add_argument(
         "--local_redirect", help="Redirect stdout and stderr to the launch directory", action="store_true"
     )
+    rapid_parser.add_argument(
+        "--prefetch",
+        help="number of FireWorks to reserve from the LaunchPad at once (default 1)",
+        default=1,
+        type=int,
+    )
 
     multi_parser.add_argument("num_jobs", help="the number of jobs to run in parallel", type=int)
     multi_parser.add_argument(
@@ -124,6 +130,12 @@ def rlaunch(argv: Sequence[str] | None = None) -> int:
         default=-1,
         type=int,
     )
+    multi_parser.add_argument(
+        "--prefetch",
+        help="number of FireWorks to reserve from the LaunchPad at once (default 1)",
+        default=1,
+        type=int,
+    )
 
     parser.add_argument("-l", "--launchpad_file", help="path to launchpad file")
     parser.add_argument("-w", "--fworker_file", help="path to fworker file")
@@ -180,6 +192,7 @@ def rlaunch(argv: Sequence[str] | None = None) -> int:
             strm_lvl=args.loglvl,
             timeout=args.timeout,
             local_redirect=args.local_redirect,
+            prefetch=args.prefetch,
         )
     elif args.command == "multi":
         total_node_list = None
@@ -201,6 +214,7 @@ def rlaunch(argv: Sequence[str] | None = None) -> int:
             exclude_current_node=args.exclude_current_node,
             local_redirect=args.local_redirect,
             max_loops=args.max_loops,
+            prefetch=args.prefetch,
         )
     else:
         launch_rocket(launchpad, fworker, args.fw_id, args.loglvl, pdb_on_exception=args.pdb)
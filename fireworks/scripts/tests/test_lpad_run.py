@@ -1,8 +1,11 @@
+from unittest.mock import patch
+
 import pytest
 
 from fireworks import Firework, ScriptTask
 from fireworks.core.launchpad import LaunchPad
-from fireworks.scripts.lpad_run import lpad
+from fireworks.scripts import lpad_run
+from fireworks.scripts.lpad_run import _add_wf_files, lpad
 
 __author__ = "Janosh Riebesell <janosh.riebesell@gmail.com>"
 
@@ -45,6 +48,53 @@ def test_lpad_get_fws(capsys, lp, detail, expected_1, expected_2) -> None:
     assert stderr == ""
 
 
+@pytest.mark.mongodb
+def test_add_wf_files(lp, tmp_path) -> None:
+    """Test adding workflow files in chunks and resuming from the checkpoint."""
+    files = []
+    for i in range(5):
+        files.append(str(tmp_path / f"fw_{i}.yaml"))
+        Firework(ScriptTask.from_str("echo hello"), name=f"fw {i}").to_file(files[-1])
+    with open(files[-1], "w") as f:
+        f.write("- not a firework")
+    checkpoint = str(tmp_path / "checkpoint.txt")
+
+    with pytest.raises(Exception, match="must be a dict"):
+        _add_wf_files(lp, files, nprocs=2, chunk_size=2, checkpoint=checkpoint)
+    assert sorted(lp.fireworks.distinct("name")) == [f"fw {i}" for i in range(4)]
+    with open(checkpoint) as f:
+        assert f.read().splitlines() == files[:4]
+
+    Firework(ScriptTask.from_str("echo hello"), name="fw 4").to_file(files[-1])
+    _add_wf_files(lp, files, nprocs=2, chunk_size=2, checkpoint=checkpoint)
+    assert sorted(lp.fireworks.distinct("name")) == [f"fw {i}" for i in range(5)]
+    assert len(lp.get_fw_ids()) == 5
+
+    # interrupted after inserting a chunk, with one of its workflows partially inserted
+    for i in (5, 6):
+        files.append(str(tmp_path / f"fw_{i}.yaml"))
+        Firework(ScriptTask.from_str("echo hello"), name=f"fw {i}").to_file(files[-1])
+    write_wf_files = lpad_run._write_wf_files
+
+    def interrupt_checkpoint(filename, wf_files, mode):
+        if mode == "a":
+            raise KeyboardInterrupt
+        write_wf_files(filename, wf_files, mode)
+
+    with (
+        patch("fireworks.scripts.lpad_run._write_wf_files", interrupt_checkpoint),
+        pytest.raises(KeyboardInterrupt),
+    ):
+        _add_wf_files(lp, files, nprocs=2, chunk_size=2, checkpoint=checkpoint)
+    lp.fireworks.delete_one({"name": "fw 6"})
+    _add_wf_files(lp, files, nprocs=2, chunk_size=2, checkpoint=checkpoint)
+    assert sorted(lp.fireworks.distinct("name")) == [f"fw {i}" for i in range(7)]
+    assert len(lp.get_fw_ids()) == 7
+    assert lp.workflows.count_documents({}) == 7
+    with open(checkpoint) as f:
+        assert f.read().splitlines() == files
+
+
 @pytest.mark.parametrize("arg", ["-v", "--version"])
 def test_lpad_report_version(capsys, arg) -> None:
     """Test lpad CLI version flag."""
@@ -4,6 +4,7 @@ completed properly.
 
 import datetime
 import unittest
+from unittest.mock import patch
 
 import pytest
 
@@ -11,6 +12,7 @@ from fireworks import Firework, FWAction
 from fireworks.core.firework import Workflow
 from fireworks.user_objects.firetasks.script_task import ScriptTask
 from fireworks.user_objects.queue_adapters.common_adapter import CommonAdapter
+from fireworks.utilities import fw_serializers
 from fireworks.utilities.fw_serializers import load_object, reconstitute_dates
 
 __author__ = "Anubhav Jain"
@@ -101,6 +103,43 @@ class SerializationTests(unittest.TestCase):
         }
         FWAction.from_dict(my_dict)
 
+    def test_recursive_deserialize_decodes_once(self) -> None:
+        my_dict = {
+            "update_spec": {},
+            "mod_spec": [],
+            "stored_data": {},
+            "exit": False,
+            "defuse_children": False,
+            "additions": [
+                {
+                    "fw_id": -2,
+                    "spec": {"_tasks": [{"use_shell": True, "_fw_name": "ScriptTask", "script": ['echo "1"']}]},
+                    "created_on": "2014-10-14T00:56:27.758669",
+                }
+            ],
+            "detours": [],
+        }
+        with patch.object(fw_serializers, "_parse_date", wraps=fw_serializers._parse_date) as parse_date:
+            action = FWAction.from_dict(my_dict)
+        # the Firework of the addition does not decode the already decoded dict again
+        assert parse_date.call_count == 1
+        assert action.additions[0].fws[0].created_on == datetime.datetime(2014, 10, 14, 0, 56, 27, 758669)
+        assert isinstance(action.additions[0].fws[0].tasks[0], ScriptTask)
+
+    def test_recursive_deserialize_temporary_dicts(self) -> None:
+        @fw_serializers.recursive_deserialize
+        def load_date(_, m_dict):
+            return m_dict["date"]
+
+        @fw_serializers.recursive_deserialize
+        def load_dates(_, m_dict):
+            # the decoded dicts are dropped, the new dicts built afterwards are not decoded yet
+            m_dict.pop("tmp")
+            return [load_date(None, {"date": "2014-10-14T00:56:27.758669"}) for _ in range(50)]
+
+        dates = load_dates(None, {"tmp": [{"a": i} for i in range(50)]})
+        assert all(date == datetime.datetime(2014, 10, 14, 0, 56, 27, 758669) for date in dates)
+
 
 @pytest.mark.parametrize(
     ("input_str", "expected"),
@@ -111,6 +150,9 @@ class SerializationTests(unittest.TestCase):
         ("not-a-date", "not-a-date"),
         ("2014-10-14T00:56:27.758673", datetime.datetime(2014, 10, 14, 0, 56, 27, 758673)),
         ("2024-03-15T08:30:00", datetime.datetime(2024, 3, 15, 8, 30)),
+        ("2024-03-15T08:30:00+00:00", datetime.datetime(2024, 3, 15, 8, 30, tzinfo=datetime.timezone.utc)),
+        ("Ti", "Ti"),
+        ("Task 2024-03-15T08:30:00", "Task 2024-03-15T08:30:00"),
     ],
 )
 def test_reconstitute_dates_preserves_date_only_strings(input_str: str, expected: str | datetime.datetime) -> None:
@@ -0,0 +1,3 @@
+"""Scheduling policies for picking the next FireWorks to run."""
+
+__copyright__ = "Copyright 2013, The Materials Project"
@@ -0,0 +1,203 @@
+"""Scheduling policies shipped with FireWorks."""
+
+from collections import Counter
+
+from pymongo import ASCENDING, DESCENDING
+
+from fireworks.features.scheduler import SchedulerBase
+from fireworks.utilities.fw_serializers import serialize_fw
+
+__copyright__ = "Copyright 2013, The Materials Project"
+
+
+def _get_fw_wfs(lp, fw_ids, fields):
+    """Return the workflow of each firework, with only the given fields.
+
+    The workflows are read with an aggregation that keeps only the given fw_ids of their nodes, so
+    that the links and fw_states of large workflows are not transferred.
+
+    Args:
+        lp (LaunchPad)
+        fw_ids ([int]): ids of the fireworks
+        fields (dict): expressions on the workflow document to return, e.g. {"group": "$_id"}
+
+    Returns:
+        dict: the workflow document of each fw_id, with _id and the fields
+    """
+    pipeline = [
+        {"$match": {"nodes": {"$in": fw_ids}}},
+        {"$project": {**fields, "nodes": {"$filter": {"input": "$nodes", "cond": {"$in": ["$$this", fw_ids]}}}}},
+    ]
+    return {fw_id: wf for wf in lp.workflows.aggregate(pipeline) for fw_id in wf.pop("nodes")}
+
+
+def _get_best_fw_per_group(lp, query, group, n_candidates, **fields):
+    """Group the READY fireworks by their workflows and return the first firework of each group
+    in the usual priority order.
+
+    Only the first n_candidates fireworks in priority order are grouped, so that a claim does not
+    go through every READY firework and its workflow.
+
+    Args:
+        lp (LaunchPad)
+        query (dict): query on the fireworks collection
+        group (str): expression on the workflow document to group by, e.g. "$_id"
+        n_candidates (int): number of fireworks to group
+        fields (str): further expressions on the workflow document to return for each group
+
+    Returns:
+        [dict]: one document with _id (the group), fw_id and the fields per group, in priority order
+    """
+    fw_ids = [
+        fw["fw_id"] for fw in lp.fireworks.find(query, {"fw_id": 1}, sort=lp._get_ready_sort(), limit=n_candidates)
+    ]
+    wfs = _get_fw_wfs(lp, fw_ids, {"group": group, **fields}) if fw_ids else {}
+    groups = {}
+    for fw_id in fw_ids:
+        wf = wfs.get(fw_id)
+        if wf is not None and wf.get("group") not in groups:
+            groups[wf.get("group")] = {"_id": wf.get("group"), "fw_id": fw_id, **{k: wf.get(k) for k in fields}}
+    return list(groups.values())
+
+
+class RoundRobinScheduler(SchedulerBase):
+    """Take turns between workflows: the next FireWork comes from the workflow that was updated
+    least recently, so that one large workflow cannot starve the others. Within a workflow the
+    usual priority order applies.
+    """
+
+    _fw_name = "RoundRobinScheduler"
+
+    def __init__(self, n_candidates=1000) -> None:
+        """
+        Args:
+            n_candidates (int): number of READY FireWorks, in priority order, to pick from.
+        """
+        self.n_candidates = n_candidates
+
+    def get_fw_ids(self, lp, query, n=1):
+        candidates = _get_best_fw_per_group(lp, query, "$_id", self.n_candidates, updated_on="$updated_on")
+        candidates.sort(key=lambda c: c["updated_on"])
+        return [c["fw_id"] for c in candidates[:n]]
+
+    @serialize_fw
+    def to_dict(self):
+        return {"n_candidates": self.n_candidates}
+
+    @classmethod
+    def from_dict(cls, m_dict):
+        return cls(m_dict.get("n_candidates", 1000))
+
+
+class FairShareScheduler(SchedulerBase):
+    """Share the FireWorkers between groups of workflows in proportion to their weights.
+
+    The workflows are grouped by a key of their metadata, e.g. the user or project. The next
+    FireWork comes from the group with the fewest RESERVED and RUNNING FireWorks per weight.
+    Within a group the usual priority order applies.
+    """
+
+    _fw_name = "FairShareScheduler"
+
+    def __init__(self, key="user", weights=None, default_weight=1, n_candidates=1000) -> None:
+        """
+        Args:
+            key (str): key of the workflow metadata to group by; nested keys are separated by dots
+            weights (dict): weight of each value of the key
+            default_weight (float): weight of the values not in weights, including workflows
+                without the key.
+            n_candidates (int): number of READY FireWorks, in priority order, to pick from, and of
+                RESERVED and RUNNING FireWorks to count the usage of the groups over.
+        """
+        self.key = key
+        self.weights = weights or {}
+        self.default_weight = default_weight
+        self.n_candidates = n_candidates
+
+    def get_fw_ids(self, lp, query, n=1):
+        group = f"$metadata.{self.key}"
+        candidates = _get_best_fw_per_group(lp, query, group, self.n_candidates)
+        if not candidates:
+            return []
+        # the usage is counted over at most n_candidates RESERVED and RUNNING fireworks
+        running_ids = [
+            fw["fw_id"]
+            for fw in lp.fireworks.find(
+                {"state": {"$in": ["RESERVED", "RUNNING"]}}, {"fw_id": 1}, limit=self.n_candidates
+            )
+        ]
+        usage = Counter(wf.get("group") for wf in _get_fw_wfs(lp, running_ids, {"group": group}).values())
+        candidates.sort(key=lambda c: usage.get(c["_id"], 0) / self.weights.get(c["_id"], self.default_weight))
+        return [c["fw_id"] for c in candidates[:n]]
+
+    @serialize_fw
+    def to_dict(self):
+        return {
+            "key": self.key,
+            "weights": self.weights,
+            "default_weight": self.default_weight,
+            "n_candidates": self.n_candidates,
+        }
+
+    @classmethod
+    def from_dict(cls, m_dict):
+        return cls(
+            m_dict.get("key", "user"),
+            m_dict.get("weights"),
+            m_dict.get("default_weight", 1),
+            m_dict.get("n_candidates", 1000),
+        )
+
+
+class ShortestRuntimeScheduler(SchedulerBase):
+    """Run the FireWorks with the shortest expected runtime, given in their spec, first.
+
+    Higher priority FireWorks still run first. Among FireWorks of the same priority, those
+    without an expected runtime run last.
+    """
+
+    _fw_name = "ShortestRuntimeScheduler"
+
+    def __init__(self, runtime_key="_expected_runtime") -> None:
+        """
+        Args:
+            runtime_key (str): spec key of the expected runtime.
+        """
+        self.runtime_key = runtime_key
+
+    @property
+    def indexes(self):
+        return [[("state", DESCENDING), ("spec._priority", DESCENDING), (f"spec.{self.runtime_key}", ASCENDING)]]
+
+    def get_fw_ids(self, lp, query, n=1):
+        field = f"spec.{self.runtime_key}"
+        fw_ids = []
+        level_query = query
+        # go through the priority levels from the highest down, a few indexed queries per level
+        while len(fw_ids) < n:
+            top_fw = lp.fireworks.find_one(level_query, {"spec._priority": 1}, sort=[("spec._priority", DESCENDING)])
+            if top_fw is None:
+                break
+            priority = top_fw.get("spec", {}).get("_priority")
+            for runtime_query, sortby in (
+                ({field: {"$exists": True}}, [(field, ASCENDING)]),
+                ({field: {"$exists": False}}, lp._get_ready_sort()[1:] or None),
+            ):
+                m_query = {"$and": [query, {"spec._priority": priority}, runtime_query]}
+                fw_ids += [
+                    fw["fw_id"] for fw in lp.fireworks.find(m_query, {"fw_id": 1}, sort=sortby, limit=n - len(fw_ids))
+                ]
+                if len(fw_ids) >= n:
+                    break
+            if priority is None:
+                break
+            level_query = {"$and": [query, {"$or": [{"spec._priority": {"$lt": priority}}, {"spec._priority": None}]}]}
+        return fw_ids
+
+    @serialize_fw
+    def to_dict(self):
+        return {"runtime_key": self.runtime_key}
+
+    @classmethod
+    def from_dict(cls, m_dict):
+        return cls(m_dict.get("runtime_key", "_expected_runtime"))
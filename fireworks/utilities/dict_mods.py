@@ -177,3 +177,20 @@ def apply_mod(modification, obj) -> None:
             DictMods().supported_actions[action].__call__(obj, settings)
         else:
             raise ValueError(f"{action} is not a supported action!")
+
+
+def get_modified_keys(modification):
+    """Get the keys of the values a modification changes, e.g. to write only those values.
+
+    Args:
+        modification (dict): {action_keyword : settings}, see apply_mod()
+
+    Returns:
+        [str]: the keys in "->" notation, or None if the modification removes or renames keys
+    """
+    keys = []
+    for action, settings in modification.items():
+        if action in ("_unset", "_rename"):
+            return None
+        keys.extend(settings)
+    return keys
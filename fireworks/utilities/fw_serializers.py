@@ -29,12 +29,19 @@ from __future__ import annotations
 
 import abc
 import datetime
+import functools
 import importlib
 import inspect
 import json  # note that ujson is faster, but at this time does not support "default" in dumps()
+import math
+import os
 import pkgutil
+import re
+import threading
+import zlib
 from typing import Any, NoReturn
 
+import bson
 from monty.json import MontyDecoder, MSONable
 from ruamel.yaml import YAML
 from ruamel.yaml.compat import StringIO
@@ -42,9 +49,11 @@ from ruamel.yaml.compat import StringIO
 from fireworks.fw_config import (
     DECODE_MONTY,
     ENCODE_MONTY,
+    FW_NAME_INDEX,
     FW_NAME_UPDATES,
     JSON_SCHEMA_VALIDATE,
     JSON_SCHEMA_VALIDATE_LIST,
+    SERIALIZER_BACKEND,
     STREAM_LOGLEVEL,
     USER_PACKAGES,
     YAML_STYLE,
@@ -62,6 +71,21 @@ __date__ = "Dec 13, 2012"
 
 SAVED_FW_MODULES = {}
 
+# start of the date-time strings reconstituted as datetimes: a calendar or week date and the 'T'
+_ISO_DATETIME_START = re.compile(r"\d{4}-?(?:\d{2}-?\d{2}|W\d{2}-?\d?)T")
+
+_MONTY_DECODER = MontyDecoder()
+
+# the dicts decoded by the outermost from_dict() of each thread by their ids, see recursive_deserialize().
+# The dicts are kept alive, so that a freed dict cannot pass its id on to a dict that is not decoded.
+_DECODED_DICTS = threading.local()
+
+# key of the documents that hold a compressed value, see compress_values()
+COMPRESSED_KEY = "_zlib_bson"
+
+# classes by their _fw_name, registered when they are defined (see register_fw_class())
+FW_NAME_REGISTRY = {}
+
 
 def DATETIME_HANDLER(obj):
     """Handle datetime objects for JSON serialization."""
@@ -77,46 +101,274 @@ try:
 except ModuleNotFoundError:
     NUMPY_INSTALLED = False
 
+try:
+    import orjson
+
+    ORJSON_INSTALLED = True
+except ModuleNotFoundError:
+    ORJSON_INSTALLED = False
+
 if JSON_SCHEMA_VALIDATE:
     import fireworks_schema
 
 
+def json_loads(m_str):
+    """Parse a JSON document, with orjson if the SERIALIZER_BACKEND is "fast".
+
+    Documents that only the json module accepts, e.g. with NaN, are parsed by it.
+    """
+    if SERIALIZER_BACKEND == "fast" and ORJSON_INSTALLED:
+        try:
+            return orjson.loads(m_str)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(m_str)
+
+
+def json_dumps(obj, **kwargs):
+    """Serialize to a JSON string like json.dumps(obj, default=DATETIME_HANDLER, **kwargs), with
+    orjson if the SERIALIZER_BACKEND is "fast" and no formatting options other than ensure_ascii
+    are given.
+
+    orjson writes compact UTF-8 that parses to the same document. It also converts numpy arrays
+    and scalars, which the json module writes as null. Documents that orjson cannot write the same
+    way, e.g. with NaN or integers beyond 64 bit, are written by the json module.
+    """
+    if SERIALIZER_BACKEND == "fast" and ORJSON_INSTALLED and set(kwargs) <= {"ensure_ascii"}:
+        try:
+            options = (
+                orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_SERIALIZE_NUMPY
+                | orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS
+            )
+            m_bytes = orjson.dumps(obj, default=_orjson_default, option=options)
+        except TypeError:  # including orjson.JSONEncodeError
+            pass
+        else:
+            # orjson writes NaN and Infinity as null, which the json module writes as NaN and Infinity
+            if b"null" not in m_bytes or not _has_non_finite(obj):
+                return m_bytes.decode()
+    return json.dumps(obj, default=DATETIME_HANDLER, **kwargs)
+
+
+def _has_non_finite(obj):
+    """Whether a document contains a NaN or infinite float, including in numpy arrays."""
+    obj_type = type(obj)
+    if obj_type is float:
+        return not math.isfinite(obj)
+    if obj_type is dict:
+        obj = obj.values()
+    elif obj_type not in (list, tuple):
+        if isinstance(obj, float):
+            return not math.isfinite(obj)
+        if isinstance(obj, dict):
+            obj = obj.values()
+        elif NUMPY_INSTALLED and isinstance(obj, (np.ndarray, np.generic)):
+            if obj.dtype.kind == "O":
+                return any(_has_non_finite(v) for v in np.ravel(obj))
+            return obj.dtype.kind in "fc" and not np.isfinite(obj).all()
+        elif not isinstance(obj, (list, tuple)):
+            return False
+    for v in obj:
+        v_type = type(v)
+        if v_type is float:
+            if not math.isfinite(v):
+                return True
+        elif v_type not in _FINITE_TYPES and _has_non_finite(v):
+            return True
+    return False
+
+
+# types that cannot hold a non-finite float, see _has_non_finite()
+_FINITE_TYPES = frozenset((type(None), bool, int, str))
+
+
+def _orjson_default(obj):
+    """Serialize the datetimes passed through by orjson like DATETIME_HANDLER, leave other objects
+    to the json module.
+    """
+    if isinstance(obj, datetime.datetime):
+        return obj.isoformat()
+    raise TypeError
+
+
+def yaml_load(m_str):
+    """Parse a YAML document, with the C parser of ruamel.yaml if the SERIALIZER_BACKEND is "fast"
+    and it is installed.
+    """
+    return YAML(typ="safe", pure=SERIALIZER_BACKEND != "fast").load(m_str)
+
+
+def compress_values(m_dict, threshold, keys):
+    """Compress the large values of the given keys of a document for the database.
+
+    Each value of keys that takes more than threshold bytes as BSON is replaced by a document
+    {COMPRESSED_KEY: <zlib-compressed BSON>}, which is decompressed by recursive_deserialize().
+    A compressed value cannot be queried or updated in parts in the database.
+
+    Args:
+        m_dict (dict): a document as returned by recursive_dict()
+        threshold (int): minimum size of the compressed values, nothing is compressed if None
+        keys ([str]): keys whose values are compressed
+
+    Returns:
+        dict: a copy of the document with the large values compressed
+    """
+    if not threshold or not keys:
+        return m_dict
+    m_dict = dict(m_dict)
+    for k, v in m_dict.items():
+        # only containers and strings can be large, the threshold is checked before compressing
+        if k not in keys or not isinstance(v, (dict, list, str, bytes)) or is_compressed(v):
+            continue
+        data = bson.encode({"v": v})
+        if len(data) > threshold:
+            m_dict[k] = {COMPRESSED_KEY: zlib.compress(data)}
+    return m_dict
+
+
+def decompress_values(m_dict):
+    """Return a copy of a document with the values compressed by compress_values() decompressed."""
+    return {k: decompress_value(v) if is_compressed(v) else v for k, v in m_dict.items()}
+
+
+def is_compressed(obj):
+    """Whether obj is a value compressed by compress_values()."""
+    return type(obj) is dict and len(obj) == 1 and COMPRESSED_KEY in obj
+
+
+def decompress_value(obj):
+    """Decompress a value compressed by compress_values()."""
+    return bson.decode(zlib.decompress(obj[COMPRESSED_KEY]))["v"]
+
+
 def recursive_dict(obj, preserve_unicode=True):
     """Recursively convert an object to a dictionary representation."""
-    if obj is None:
-        return None
+    encoder = _RECURSIVE_DICT_ENCODERS.get(type(obj))
+    if encoder is None:
+        encoder = _get_recursive_dict_encoder(obj)
+    return encoder(obj, preserve_unicode)
+
 
+def _get_recursive_dict_encoder(obj):
+    """Return the function that converts obj in recursive_dict().
+
+    The function is cached for the class of obj unless the choice may depend on the instance,
+    e.g. for classes with __getattr__.
+    """
+    cls = type(obj)
+    dynamic = hasattr(cls, "__getattr__")
     if ENCODE_MONTY and hasattr(obj, "as_dict"):  # compatible with new monty JSONEncoder (MontyEncoder)
-        return recursive_dict(obj.as_dict(), preserve_unicode)
+        # FWSerializable.as_dict() returns to_dict(), which may be converted already
+        encoder = _encode_to_dict if getattr(cls, "as_dict", None) is FWSerializable.as_dict else _encode_as_dict
+        cached = hasattr(cls, "as_dict")
+    elif hasattr(obj, "to_dict"):
+        encoder = _encode_to_dict
+        cached = hasattr(cls, "to_dict") and not dynamic
+    else:
+        cached = not dynamic
+        if isinstance(obj, dict):
+            encoder = _encode_dict
+        elif isinstance(obj, (list, tuple)):
+            encoder = _encode_list
+        elif isinstance(obj, (int, float)):
+            encoder = _encode_unchanged
+        elif isinstance(obj, datetime.datetime):
+            encoder = _encode_datetime
+        elif isinstance(obj, str):
+            encoder = _encode_str
+        elif NUMPY_INSTALLED and isinstance(obj, np.ndarray):
+            encoder = _encode_ndarray
+        else:
+            encoder = _encode_other
+    if cached:
+        _RECURSIVE_DICT_ENCODERS[cls] = encoder
+    return encoder
 
-    if hasattr(obj, "to_dict"):
-        return recursive_dict(obj.to_dict(), preserve_unicode)
 
-    if isinstance(obj, dict):
-        return {recursive_dict(k, preserve_unicode): recursive_dict(v, preserve_unicode) for k, v in obj.items()}
+def _encode_unchanged(obj, preserve_unicode):
+    return obj
 
-    if isinstance(obj, (list, tuple)):
-        return [recursive_dict(v, preserve_unicode) for v in obj]
 
-    if isinstance(obj, (int, float)):
-        return obj
+def _encode_as_dict(obj, preserve_unicode):
+    return recursive_dict(obj.as_dict(), preserve_unicode)
 
-    if isinstance(obj, datetime.datetime):
-        return obj.isoformat()
 
-    if preserve_unicode and isinstance(obj, str) and obj != obj.encode("ascii", "ignore"):
-        return obj
+def _encode_to_dict(obj, preserve_unicode):
+    to_dict = obj.to_dict
+    m_dict = to_dict()
+    # the result of a @recursive_serialize to_dict() is converted already
+    if preserve_unicode and getattr(to_dict, "serializes_recursively", False):
+        return m_dict
+    return recursive_dict(m_dict, preserve_unicode)
+
+
+def _encode_dict(obj, preserve_unicode):
+    # the common str keys and scalar values are kept without a call
+    return {
+        (k if type(k) is str else recursive_dict(k, preserve_unicode)): (
+            v if type(v) in _UNCHANGED_TYPES else recursive_dict(v, preserve_unicode)
+        )
+        for k, v in obj.items()
+    }
+
+
+def _encode_list(obj, preserve_unicode):
+    return [v if type(v) in _UNCHANGED_TYPES else recursive_dict(v, preserve_unicode) for v in obj]
+
+
+def _encode_datetime(obj, preserve_unicode):
+    return obj.isoformat()
+
+
+def _encode_str(obj, preserve_unicode):
+    return obj if preserve_unicode else str(obj)
+
+
+def _encode_ndarray(obj, preserve_unicode):
+    # arrays of booleans and numbers convert to Python numbers in one call
+    if obj.dtype.kind in "biuf":
+        return obj.tolist()
+    return [recursive_dict(v, preserve_unicode) for v in obj.tolist()]
 
-    if NUMPY_INSTALLED and isinstance(obj, np.ndarray):
-        return [recursive_dict(v, preserve_unicode) for v in obj.tolist()]
 
+def _encode_other(obj, preserve_unicode):
     return str(obj)
 
 
-# TODO: is reconstitute_dates really needed? Can this method just do everything?
-def _recursive_load(obj):
-    if obj is None:
-        return None
+# classes that recursive_dict() returns unchanged
+_UNCHANGED_TYPES = frozenset((type(None), bool, int, float, str))
+
+# functions of recursive_dict() by class, see _get_recursive_dict_encoder()
+_RECURSIVE_DICT_ENCODERS = {
+    **dict.fromkeys(_UNCHANGED_TYPES, _encode_unchanged),
+    dict: _encode_dict,
+    list: _encode_list,
+    tuple: _encode_list,
+    datetime.datetime: _encode_datetime,
+}
+
+
+def _recursive_load(obj, decoded=None):
+    """Decode a document in one pass: load objects with a _fw_name or Monty's @module and @class
+    and reconstitute datetimes.
+
+    Args:
+        obj: the document
+        decoded (dict): the decoded dicts are added to this dict by their ids, if given
+    """
+    # fast paths for the exact types of parsed documents
+    obj_type = type(obj)
+    if obj_type is str:
+        return _parse_date(obj) if _ISO_DATETIME_START.match(obj) else obj
+    if obj_type in (int, float, bool) or obj is None:
+        return obj
+    if obj_type is list:
+        return [_recursive_load(v, decoded) for v in obj]
+
+    if isinstance(obj, str):
+        return _reconstitute_date(obj)
 
     if hasattr(obj, "_fw_name") or isinstance(obj, MSONable):
         return obj
@@ -126,15 +378,18 @@ def _recursive_load(obj):
             return load_object(obj)
 
         if DECODE_MONTY and "@module" in obj and "@class" in obj:  # MontyDecoder compatibility
-            return json.loads(json.dumps(obj), cls=MontyDecoder)
+            return _MONTY_DECODER.process_decoded(obj)
 
-        return {k: _recursive_load(v) for k, v in obj.items()}
+        if COMPRESSED_KEY in obj and len(obj) == 1:
+            return _recursive_load(decompress_value(obj), decoded)
 
-    if isinstance(obj, (list, tuple)):
-        return [_recursive_load(v) for v in obj]
+        m_dict = {k: _recursive_load(v, decoded) for k, v in obj.items()}
+        if decoded is not None:
+            decoded[id(m_dict)] = m_dict
+        return m_dict
 
-    if isinstance(obj, str):
-        return reconstitute_dates(obj)
+    if isinstance(obj, (list, tuple)):
+        return [_recursive_load(v, decoded) for v in obj]
 
     return obj
 
@@ -148,22 +403,45 @@ def recursive_serialize(func):
         m_dict = func(self, *args, **kwargs)
         return recursive_dict(m_dict)
 
+    _decorator.serializes_recursively = True
     return _decorator
 
 
 def recursive_deserialize(func):
     """A decorator to add FW serializations keys
     see documentation of FWSerializable for more details.
+
+    The dict is decoded only once: the from_dict() methods called by func on parts of an already
+    decoded dict, e.g. Launch.from_dict() within Firework.from_dict(), skip the decoding.
     """
 
     def _decorator(self, *args, **kwargs):
-        new_args = list(args)
-        new_args[0] = {k: _recursive_load(v) for k, v in args[0].items()}
-        return func(self, *new_args, **kwargs)
-
+        decoded = getattr(_DECODED_DICTS, "dicts", None)
+        if decoded is not None and decoded.get(id(args[0])) is args[0]:
+            return func(self, *args, **kwargs)
+        outermost = decoded is None
+        if outermost:
+            decoded = _DECODED_DICTS.dicts = {}
+        try:
+            new_args = list(args)
+            new_args[0] = {k: _recursive_load(v, decoded) for k, v in args[0].items()}
+            return func(self, *new_args, **kwargs)
+        finally:
+            if outermost:
+                _DECODED_DICTS.dicts = None
+
+    _decorator.decodes_dates = True
     return _decorator
 
 
+def decodes_dates(func):
+    """Mark a from_dict() method that reconstitutes the datetimes itself, so that from_format()
+    does not need to reconstitute those of the whole document first.
+    """
+    func.decodes_dates = True
+    return func
+
+
 def serialize_fw(func):
     """A decorator to add FW serializations keys
     see documentation of FWSerializable for more details.
@@ -174,6 +452,7 @@ def serialize_fw(func):
         m_dict["_fw_name"] = self.fw_name
         return m_dict
 
+    _decorator.serializes_recursively = getattr(func, "serializes_recursively", False)
     return _decorator
 
 
@@ -192,8 +471,15 @@ class FWSerializable(abc.ABC):
     that implements the to_dict() and from_dict() for all its subclasses.
 
     For an example of serialization, see the class QueueAdapterBase.
+
+    Subclasses are registered with register_fw_class() when they are defined, so that
+    load_object() finds those of USER_PACKAGES without searching them.
     """
 
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        register_fw_class(cls)
+
     @property
     def fw_name(self) -> str:
         try:
@@ -234,7 +520,7 @@ class FWSerializable(abc.ABC):
             FWFormatError: when f_format is not supported
         """
         if f_format == "json":
-            return json.dumps(self.to_dict(), default=DATETIME_HANDLER, **kwargs)
+            return json_dumps(self.to_dict(), **kwargs)
         if f_format == "yaml":
             yaml = YAML(typ="safe", pure=True)
             yaml.default_flow_style = YAML_STYLE
@@ -256,15 +542,17 @@ class FWSerializable(abc.ABC):
             FWSerializable
         """
         if f_format == "json":
-            dct = json.loads(f_str)
+            dct = json_loads(f_str)
         elif f_format == "yaml":
-            dct = YAML(typ="safe", pure=True).load(f_str)
+            dct = yaml_load(f_str)
         else:
             raise FWFormatError(f"Unsupported format {f_format}")
         if not isinstance(dct, dict):
             raise FWSerializationError(f"Serialized object must be a dict but is {type(dct)}")
         if JSON_SCHEMA_VALIDATE and cls.__name__ in JSON_SCHEMA_VALIDATE_LIST:
             fireworks_schema.validate(dct, cls.__name__)
+        if getattr(cls.from_dict, "decodes_dates", False):
+            return cls.from_dict(dct)
         return cls.from_dict(reconstitute_dates(dct))
 
     def to_file(self, filename, f_format=None, **kwargs) -> None:
@@ -282,7 +570,7 @@ class FWSerializable(abc.ABC):
             raise FWFormatError(f"Unsupported format {f_format}")
         with open(filename, "w", **ENCODING_PARAMS) as f_out:
             if f_format == "json":
-                json.dump(dct, f_out, default=DATETIME_HANDLER, **kwargs)
+                f_out.write(json_dumps(dct, **kwargs))
             else:
                 yaml = YAML(typ="safe", pure=True)
                 yaml.default_flow_style = YAML_STYLE
@@ -324,7 +612,8 @@ def load_object(obj_dict):
     We search for a class with the _fw_name property equal to obj_dict['_fw_name']
     If the @module key is set, that module is checked first for a matching class
     to improve speed of lookup.
-    Afterwards, the modules in the USER_PACKAGES global parameter are checked.
+    Afterwards, the modules in the USER_PACKAGES global parameter are checked. Classes of
+    USER_PACKAGES that were already imported are found without searching the modules.
 
     Refactoring class names, module names, etc. will not break object loading
     as long as:
@@ -348,13 +637,24 @@ def load_object(obj_dict):
 
     # check for explicit serialization, e.g. {{fireworks.tasks.MyTask}} - based on pymatgen method
     if fw_name.startswith("{{") and fw_name.endswith("}}"):
+        # the name gives the module, a registered class is used without importing it, e.g. again from a script
+        classes = [c for c in FW_NAME_REGISTRY.get(fw_name, []) if _get_fw_name(c) == fw_name]
+        if len(classes) == 1:
+            return classes[0].from_dict(obj_dict)
         mod_name, classname = fw_name.strip("{} ").rsplit(".", 1)
         mod = __import__(mod_name, globals(), locals(), [classname], 0)
         if hasattr(mod, classname):
             cls_ = getattr(mod, classname)
             return cls_.from_dict(obj_dict)
 
-    # first try to load from known location
+    # first try the classes registered when they were defined, then the index of FW_NAME_INDEX
+    cls_ = _get_registered_class(fw_name)
+    if cls_ is None:
+        cls_ = _get_indexed_class(fw_name)
+    if cls_ is not None:
+        return cls_.from_dict(obj_dict)
+
+    # then try to load from known location
     if fw_name in SAVED_FW_MODULES:
         m_module = importlib.import_module(SAVED_FW_MODULES[fw_name])
         m_object = _search_module_for_obj(m_module, obj_dict)
@@ -387,6 +687,114 @@ def load_object(obj_dict):
     raise FWSerializationError(f"load_object() could not find a class with cls._fw_name {fw_name}")
 
 
+def register_fw_class(cls):
+    """Register a class under its _fw_name for load_object(). Subclasses of FWSerializable are
+    registered automatically, other classes can use this as a class decorator.
+
+    Args:
+        cls (type): class with a from_dict() method
+
+    Returns:
+        type: the class
+    """
+    fw_name = _get_fw_name(cls)
+    if fw_name is not None and cls not in FW_NAME_REGISTRY.get(fw_name, []):
+        FW_NAME_REGISTRY.setdefault(fw_name, []).append(cls)
+    return cls
+
+
+def _get_fw_name(cls):
+    """Return the _fw_name of a class, or None for classes defined in the __main__ module."""
+    try:
+        return getattr(cls, "_fw_name", None) or get_default_serialization(cls)
+    except FWSerializationError:
+        return None
+
+
+def _get_registered_class(fw_name):
+    """Return the only registered class of USER_PACKAGES with the given _fw_name, or None.
+
+    Only classes that the search of USER_PACKAGES would find are returned, so that the registry does
+    not change which class is loaded. Classes registered under a name they no longer have, e.g.
+    after @explicit_serialize, are ignored. Several classes with the same name are left to the
+    search of USER_PACKAGES.
+    """
+    classes = [
+        c
+        for c in FW_NAME_REGISTRY.get(fw_name, [])
+        if _get_fw_name(c) == fw_name and any(c.__module__.startswith(f"{package}.") for package in USER_PACKAGES)
+    ]
+    return classes[0] if len(classes) == 1 else None
+
+
+@functools.cache
+def _load_fw_name_index():
+    """Load the index of FW_NAME_INDEX once per process, see build_fw_name_index()."""
+    if not FW_NAME_INDEX:
+        return {}
+    try:
+        with open(os.path.expanduser(FW_NAME_INDEX), **ENCODING_PARAMS) as f:
+            return json.load(f)
+    except (OSError, ValueError) as ex:
+        get_fw_logger(__name__, stream_level=STREAM_LOGLEVEL).warning(
+            f"Cannot read FW_NAME_INDEX {FW_NAME_INDEX}: {ex!s}"
+        )
+        return {}
+
+
+def _get_indexed_class(fw_name):
+    """Import the class of the given _fw_name from the index of FW_NAME_INDEX, or return None."""
+    index = _load_fw_name_index()
+    if fw_name not in index:
+        return None
+    mod_name, qualname = index[fw_name].split(":")
+    try:
+        cls_ = importlib.import_module(mod_name)
+        for name in qualname.split("."):
+            cls_ = getattr(cls_, name)
+    except (ImportError, AttributeError) as ex:
+        msg = f"{fw_name} of FW_NAME_INDEX cannot be loaded because of {ex!s}, searching USER_PACKAGES instead"
+        get_fw_logger(__name__, stream_level=STREAM_LOGLEVEL).debug(msg)
+        return None
+    # the index may be outdated
+    return cls_ if _get_fw_name(cls_) == fw_name else None
+
+
+def build_fw_name_index(filename=None):
+    """Import all modules of USER_PACKAGES and index the classes by their _fw_name, so that
+    load_object() can import the module of a class directly.
+
+    Set the FW_NAME_INDEX parameter to the file to use the index. Names of several classes are left
+    out of the index.
+
+    Args:
+        filename (str): JSON file to write the index to, not written if None
+
+    Returns:
+        dict: the index, "module:qualname" of the class of each _fw_name
+    """
+    found = {}
+    for package in USER_PACKAGES:
+        root_module = importlib.import_module(package)
+        for _, mod_name, _is_pkg in pkgutil.walk_packages(root_module.__path__, package + "."):
+            try:
+                m_module = importlib.import_module(mod_name)
+            except ImportError as ex:
+                msg = f"{mod_name} cannot be indexed because of {ex!s}. Skipping.."
+                get_fw_logger(__name__, stream_level=STREAM_LOGLEVEL).debug(msg)
+                continue
+            for _, obj in inspect.getmembers(m_module, inspect.isclass):
+                if obj.__module__ == mod_name and hasattr(obj, "from_dict"):
+                    fw_name = _get_fw_name(obj)
+                    if fw_name and not fw_name.startswith("{{"):
+                        found.setdefault(fw_name, set()).add(f"{mod_name}:{obj.__qualname__}")
+    index = {fw_name: paths.pop() for fw_name, paths in sorted(found.items()) if len(paths) == 1}
+    if filename:
+        with open(filename, "w", **ENCODING_PARAMS) as f:
+            json.dump(index, f, indent=2)
+    return index
+
+
 def load_object_from_file(filename, f_format=None):
     """Implicitly load an object from a file. just a friendly wrapper to
     load_object().
@@ -405,9 +813,9 @@ def load_object_from_file(filename, f_format=None):
 
     with open(filename, **ENCODING_PARAMS) as f:
         if f_format == "json":
-            dct = json.loads(f.read())
+            dct = json_loads(f.read())
         elif f_format == "yaml":
-            dct = YAML(typ="safe", pure=True).load(f.read())
+            dct = yaml_load(f.read())
         else:
             raise FWFormatError(f"Unknown file format {f_format} cannot be loaded!")
 
@@ -445,22 +853,33 @@ def reconstitute_dates(obj_dict):
     if isinstance(obj_dict, (list, tuple)):
         return [reconstitute_dates(v) for v in obj_dict]
 
-    if isinstance(obj_dict, str) and "T" in obj_dict:
-        # only attempt datetime parsing for strings containing 'T' (ISO 8601
-        # date-time separator) to avoid converting date-only or version-like
-        # strings such as '2000-02-01' into datetime objects (see #570)
-        for method, args in [
-            (datetime.datetime.fromisoformat, ()),
-            (datetime.datetime.strptime, ("%Y-%m-%dT%H:%M:%S.%f",)),
-            (datetime.datetime.strptime, ("%Y-%m-%dT%H:%M:%S",)),
-        ]:
-            try:
-                return method(obj_dict, *args)
-            except (ValueError, TypeError):
-                continue
+    if isinstance(obj_dict, str):
+        return _reconstitute_date(obj_dict)
     return obj_dict
 
 
+def _reconstitute_date(m_str):
+    """Return the datetime of an ISO 8601 date-time string, or the string itself."""
+    # only attempt datetime parsing for strings that start like an ISO 8601 date-time with the 'T'
+    # separator to avoid converting date-only or version-like strings such as '2000-02-01' into
+    # datetime objects (see #570)
+    return _parse_date(m_str) if _ISO_DATETIME_START.match(m_str) else m_str
+
+
+def _parse_date(m_str):
+    """Return the datetime of a string matching _ISO_DATETIME_START, or the string itself."""
+    for method, args in [
+        (datetime.datetime.fromisoformat, ()),
+        (datetime.datetime.strptime, ("%Y-%m-%dT%H:%M:%S.%f",)),
+        (datetime.datetime.strptime, ("%Y-%m-%dT%H:%M:%S",)),
+    ]:
+        try:
+            return method(m_str, *args)
+        except (ValueError, TypeError):
+            continue
+    return m_str
+
+
 def get_default_serialization(cls):
     """Get the default serialization string for a class."""
     root_mod = cls.__module__.split(".")[0]
@@ -12,6 +12,7 @@ import random
 import socket
 import string
 import sys
+import threading
 import time
 import traceback
 from logging import Formatter, Logger
@@ -200,6 +201,76 @@ class _LaunchPadCallable:
         return self.launchpad
 
 
+class CompletionBatcher:
+    """Group commit of launch completions for job packing. The sub jobs complete their launches
+    through complete_launch(), and the completions that arrive while a batch is being written are
+    written together with LaunchPad.complete_launches(), locking each workflow once per batch
+    instead of once per launch.
+    """
+
+    def __init__(self, launchpad) -> None:
+        """
+        Args:
+            launchpad (LaunchPad): the LaunchPad to write the completions to.
+        """
+        self.launchpad = launchpad
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def complete_launch(self, launch_id, action=None, state="COMPLETED"):
+        """Same as LaunchPad.complete_launch(), returns once the launch is written.
+
+        Args:
+            launch_id (int)
+            action (FWAction): the FWAction of what to do next
+            state (str): COMPLETED or FIZZLED
+
+        Returns:
+            dict: updated launch
+        """
+        entry = {"completion": (launch_id, action, state)}
+        with self._pending_lock:
+            self._pending.append(entry)
+        with self._write_lock:
+            # the first caller to get here writes all pending completions
+            if "result" not in entry and "error" not in entry:
+                with self._pending_lock:
+                    batch, self._pending = self._pending, []
+                self._write(batch)
+        if "error" in entry:
+            raise entry["error"]
+        return entry["result"]
+
+    def _write(self, batch) -> None:
+        try:
+            results = self.launchpad.complete_launches([e["completion"] for e in batch])
+        except Exception:
+            # write the completions one by one, so that each caller gets its own error
+            for e in batch:
+                try:
+                    e["result"] = self.launchpad.complete_launch(*e["completion"])
+                except Exception as exc:
+                    e["error"] = exc
+        else:
+            for e, result in zip(batch, results, strict=True):
+                e["result"] = result
+
+
+class _CompletionBatcherCallable:
+    """Picklable callable returning the same CompletionBatcher of a shared LaunchPad."""
+
+    def __init__(self, launchpad_callable) -> None:
+        self.launchpad_callable = launchpad_callable
+        self.batcher = None
+
+    def __call__(self):
+        # created in the server process, where the calls of the clients arrive in threads
+        if self.batcher is None:
+            self.batcher = CompletionBatcher(self.launchpad_callable())
+        return self.batcher
+
+
 class DataServer(BaseManager):
     """Provide a server that can host shared objects between multiprocessing
     Processes (that normally can't share data). For example, a common LaunchPad is
@@ -224,13 +295,15 @@ class DataServer(BaseManager):
 
     @classmethod
     def register_launchpad(cls, callable_obj=None) -> None:
-        """Register the LaunchPad with the manager.
+        """Register the LaunchPad and its CompletionBatcher (as Completions) with the manager.
 
         Args:
             callable_obj: Callable returning LaunchPad (server-side) or None (client-side).
         """
         # BaseManager creates an AutoProxy that exposes all public methods automatically
         DataServer.register("LaunchPad", callable=callable_obj)
+        completions_callable = _CompletionBatcherCallable(callable_obj) if callable_obj else None
+        DataServer.register("Completions", callable=completions_callable)
 
 
 class NestedClassGetter:
@@ -249,14 +322,19 @@ class NestedClassGetter:
 
 
 def explicit_serialize(o):
-    """Mark a class for explicit serialization by adding _fw_name attribute."""
+    """Mark a class for explicit serialization by adding _fw_name attribute and register it under
+    this name for load_object().
+    """
     module_name = o.__module__
     if module_name == "__main__":
         import __main__
 
         module_name = os.path.splitext(os.path.basename(__main__.__file__))[0]
     o._fw_name = f"{{{{{module_name}.{o.__name__}}}}}"
-    return o
+    # the class was registered under its previous name when it was defined
+    from fireworks.utilities.fw_serializers import register_fw_class
+
+    return register_fw_class(o)
 
 
 @contextlib.contextmanager
@@ -6,13 +6,26 @@ import os
 import unittest
 from tempfile import mkdtemp
 from typing import Any
+from unittest.mock import patch
 
 import numpy as np
 import pytest
+from ruamel.yaml import YAML
 
+from fireworks.user_objects.firetasks.script_task import ScriptTask
 from fireworks.user_objects.firetasks.unittest_tasks import ExportTestSerializer, UnitTestSerializer
+from fireworks.utilities import fw_serializers
 from fireworks.utilities.exceptions import FWFormatError, FWSerializationError
-from fireworks.utilities.fw_serializers import FWSerializable, load_object, load_object_from_file, recursive_dict
+from fireworks.utilities.fw_serializers import (
+    FWSerializable,
+    build_fw_name_index,
+    json_dumps,
+    json_loads,
+    load_object,
+    load_object_from_file,
+    recursive_dict,
+    yaml_load,
+)
 from fireworks.utilities.fw_utilities import explicit_serialize
 
 __author__ = "Anubhav Jain"
@@ -141,6 +154,113 @@ class SerializationTest(unittest.TestCase):
         x = np.array([[1, 2, 3], [4, 5, 6], [7, 8, 9]])
         x = recursive_dict(x)
         assert x == [[1, 2, 3], [4, 5, 6], [7, 8, 9]]
+        x = recursive_dict(np.array([datetime.datetime(2024, 3, 15), 1.5j], dtype=object))
+        assert x == ["2024-03-15T00:00:00", "1.5j"]
+
+    @pytest.mark.skipif(not fw_serializers.ORJSON_INSTALLED, reason="orjson not installed")
+    def test_fast_backend_round_trip(self) -> None:
+        docs = [
+            obj.to_dict() for obj in (self.obj_1, self.obj_2, self.obj_3, self.obj_4, ScriptTask.from_str("echo ä"))
+        ]
+        docs.append(
+            {"naive": datetime.datetime(2024, 3, 15, 8, 30), 1: [1.5, -2, True, "\u2603"], "nested": {"t": (1, 2)}}
+        )
+        for doc in docs:
+            default_str = json_dumps(doc)
+            with patch.object(fw_serializers, "SERIALIZER_BACKEND", "fast"):
+                fast_strs = [json_dumps(doc), json_dumps(doc, ensure_ascii=False)]
+                assert json_loads(default_str) == json.loads(default_str)
+            for fast_str in fast_strs:
+                assert json.loads(fast_str) == json.loads(default_str)
+
+        # documents that orjson cannot write the same way are written by the json module
+        for doc in ({"nan": float("nan"), "none": None}, {"big": 2**70}, {"inf": [np.array([1.0, np.inf])], "n": None}):
+            with patch.object(fw_serializers, "SERIALIZER_BACKEND", "fast"):
+                assert json_dumps(doc) == json.dumps(doc, default=fw_serializers.DATETIME_HANDLER)
+                assert json_loads(json_dumps(doc)).keys() == doc.keys()
+        # but None and "null" in strings are written by orjson
+        with patch.object(fw_serializers, "SERIALIZER_BACKEND", "fast"):
+            assert json_dumps({"a": None, "b": ["/dev/null", 1.5]}) == '{"a":null,"b":["/dev/null",1.5]}'
+
+        with patch.object(fw_serializers, "SERIALIZER_BACKEND", "fast"):
+            assert self.obj_3.from_file("test.json") == self.obj_3
+            assert self.obj_3.from_file("test.yaml") == self.obj_3
+            assert self.obj_1.from_format(self.obj_1.to_format()) == self.obj_1
+            assert json_dumps({"a": np.array([[1, 2], [3, 4]])}) == '{"a":[[1,2],[3,4]]}'
+            assert yaml_load(self.obj_2.to_format("yaml")) == YAML(typ="safe", pure=True).load(
+                self.obj_2.to_format("yaml")
+            )
+
+    def test_recursive_dict_encoders(self) -> None:
+        class Dynamic:
+            def __getattr__(self, name):
+                if name == "to_dict":
+                    return lambda: {"a": (1, "b")}
+                raise AttributeError(name)
+
+        assert recursive_dict({"a": (1, "b"), "c": None}) == {"a": [1, "b"], "c": None}
+        assert recursive_dict(self.obj_1) == recursive_dict(self.obj_1.to_dict())
+        assert UnitTestSerializer in fw_serializers._RECURSIVE_DICT_ENCODERS
+        # the conversion of classes with __getattr__ is not cached
+        assert recursive_dict(Dynamic()) == {"a": [1, "b"]}
+        assert Dynamic not in fw_serializers._RECURSIVE_DICT_ENCODERS
+
+
+class FWNameRegistryTest(unittest.TestCase):
+    def test_registered_class(self) -> None:
+        assert UnitTestSerializer in fw_serializers.FW_NAME_REGISTRY["TestSerializer Name"]
+        obj = UnitTestSerializer("prop1", datetime.datetime.now(datetime.timezone.utc))
+        # registered classes are loaded without searching USER_PACKAGES
+        with patch.dict(fw_serializers.SAVED_FW_MODULES, clear=True), patch("pkgutil.walk_packages") as walk_packages:
+            assert load_object(obj.to_dict()) == obj
+        walk_packages.assert_not_called()
+
+        # classes outside of USER_PACKAGES are not loaded from the registry
+        with (
+            patch.object(fw_serializers, "USER_PACKAGES", ["fireworks.features"]),
+            patch.dict(fw_serializers.SAVED_FW_MODULES, clear=True),
+            pytest.raises(FWSerializationError, match="could not find a class"),
+        ):
+            load_object(obj.to_dict())
+
+    def test_registered_explicit_class(self) -> None:
+        assert ExplicitTestSerializer in fw_serializers.FW_NAME_REGISTRY[ExplicitTestSerializer._fw_name]
+        with patch.dict(fw_serializers.FW_NAME_REGISTRY):
+
+            @explicit_serialize
+            class NotImportable(ExplicitTestSerializer):
+                __module__ = "fw_not_importable_module"
+
+                @classmethod
+                def from_dict(cls, m_dict):
+                    return NotImportable(m_dict["a"])
+
+            obj = NotImportable(1)
+            # the class is loaded from the registry, its module is neither imported nor searched for
+            with patch("pkgutil.walk_packages") as walk_packages:
+                loaded = load_object(obj.to_dict())
+        assert type(loaded) is NotImportable
+        assert loaded.a == 1
+        walk_packages.assert_not_called()
+
+    def test_fw_name_index(self) -> None:
+        index_file = os.path.join(mkdtemp(), "fw_name_index.json")
+        index = build_fw_name_index(index_file)
+        assert index["ScriptTask"] == "fireworks.user_objects.firetasks.script_task:ScriptTask"
+        assert index["TestSerializer Name"] == "fireworks.user_objects.firetasks.unittest_tasks:UnitTestSerializer"
+
+        task = ScriptTask.from_str("echo hello")
+        fw_serializers._load_fw_name_index.cache_clear()
+        with (
+            patch.object(fw_serializers, "FW_NAME_INDEX", index_file),
+            patch.dict(fw_serializers.FW_NAME_REGISTRY, clear=True),
+            patch.dict(fw_serializers.SAVED_FW_MODULES, clear=True),
+            patch("pkgutil.walk_packages") as walk_packages,
+        ):
+            assert load_object(task.to_dict()).to_dict() == task.to_dict()
+            assert fw_serializers.FW_NAME_REGISTRY == {}
+        fw_serializers._load_fw_name_index.cache_clear()
+        walk_packages.assert_not_called()
 
 
 class ExplicitSerializationTest(unittest.TestCase):
@@ -51,6 +51,7 @@ if __name__ == "__main__":
             "workflow-checks": ["igraph>=0.7.1"],
             "graph-plotting": ["graphviz"],
             "mongomock": ["mongomock-persistence>=0.0.3"],
+            "fast-serialization": ["orjson>=3.6", "ruamel.yaml.clib"],
             "dev": ["pytest"],
         },
         classifiers=[